@@ -0,0 +1,102 @@
+# File: async_database.py
+# Purpose: Asyncio front end to Database that runs blocking driver calls on a bounded worker pool
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from database import Database, DatabaseError
+
+
+class AsyncDatabase:
+    """Awaitable wrapper around a Database.
+
+    Neither backend's driver calls can be awaited in the sync managers' code
+    paths, so every call runs on a thread pool with at most max_workers threads
+    (by default the connection pool size). Any number of coroutines may await
+    at once; calls beyond max_workers queue in the executor instead of opening
+    more connections.
+
+    An open stream_query holds its connection between batches, while its
+    consumer awaits, and runs all of its batches on one thread of its own. With
+    a pool of two or more, at most max_streams streams are open at once, by
+    default one less than the pool size, so other calls always have a
+    connection left. Without a pool (or with pool_max=1) a stream holds the only
+    connection: one stream is open at a time, calls share a single worker, and
+    a call made while a stream is open raises DatabaseError instead of waiting
+    for a connection its own caller may never give back.
+    """
+
+    def __init__(self, db=None, max_workers=None, max_streams=None, **options):
+        """db: an existing Database to share; otherwise one is created from options."""
+        self.db = db or Database(**options)
+        pool_size = self.db.pool.max_size if self.db.pool else 1
+        self.exclusive_streams = pool_size < 2
+        self.max_workers = 1 if self.db.pool is None else max_workers or pool_size
+        self.max_streams = 1 if self.exclusive_streams else max_streams or pool_size - 1
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="library-async")
+        self._streams = asyncio.Semaphore(self.max_streams)
+        self._open_streams = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on a worker and returns its result."""
+        if self.exclusive_streams and self._open_streams:
+            raise DatabaseError("The only connection is held by an open stream; "
+                                "finish or close it first, or use a pool of two or more")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def execute_query(self, query, params=None, fetch=False):
+        return await self.run(self.db.execute_query, query, params, fetch)
+
+    async def execute_insert(self, query, params, id_column):
+        return await self.run(self.db.execute_insert, query, params, id_column)
+
+    async def execute_batch(self, query, rows):
+        return await self.run(self.db.execute_batch, query, rows)
+
+    async def stream_query(self, query, params=None, arraysize=1000):
+        """Yields rows of a large result, fetching each batch of arraysize rows on a worker.
+
+        Waits while max_streams other streams are open. The generator borrows and
+        releases its connection on one dedicated thread, since the shared
+        connection's lock must be released by the thread that took it. A consumer
+        that stops early should close the stream (contextlib.aclosing) so the
+        connection is released at once rather than when the stream is collected.
+        """
+        async with self._streams:
+            loop = asyncio.get_running_loop()
+            worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="library-stream")
+            rows = self.db.stream_query(query, params, arraysize)
+            self._open_streams += 1
+            try:
+                while True:
+                    batch = await loop.run_in_executor(worker, lambda: list(islice(rows, arraysize)))
+                    if not batch:
+                        return
+                    for row in batch:
+                        yield row
+            finally:
+                try:
+                    # Releases the connection if the consumer stopped early
+                    await loop.run_in_executor(worker, rows.close)
+                finally:
+                    self._open_streams -= 1
+                    worker.shutdown(wait=False)
+
+    async def setup_database(self):
+        await self.run(self.db.setup_database)
+
+    async def stats(self):
+        return await self.run(self.db.stats)
+
+    async def close(self):
+        """Waits for queued calls, then closes the database."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.db.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,138 @@
+# File: async_managers.py
+# Purpose: Awaitable counterparts of the Book, Customer, Transaction and Report managers
+from book import Book
+from customer import Customer
+from report import HISTORY_STREAM_QUERY, OVERDUE_STREAM_QUERY, Report
+from transaction import Transaction
+
+
+class AsyncBook:
+    """Book operations for asyncio code; each call runs on the AsyncDatabase workers."""
+
+    def __init__(self, adb, search_index=None):
+        self.adb = adb
+        self.manager = Book(adb.db, search_index=search_index)
+
+    async def add_book(self, title, author, genre, isbn):
+        return await self.adb.run(self.manager.add_book, title, author, genre, isbn)
+
+    async def add_books_bulk(self, source, batch_size=1000, fmt=None, on_error=None):
+        return await self.adb.run(self.manager.add_books_bulk, source, batch_size, fmt, on_error)
+
+    async def update_book(self, book_id, title, author, genre, isbn, is_available):
+        return await self.adb.run(self.manager.update_book, book_id, title, author, genre, isbn, is_available)
+
+    async def delete_book(self, book_id):
+        return await self.adb.run(self.manager.delete_book, book_id)
+
+    async def get_book(self, book_id):
+        return await self.adb.run(self.manager.get_book, book_id)
+
+    async def search_books(self, search_term):
+        return await self.adb.run(self.manager.search_books, search_term)
+
+    async def get_books_page(self, after_id=None, before_id=None, last=False, limit=50):
+        return await self.adb.run(self.manager.get_books_page, after_id, before_id, last, limit)
+
+    async def get_books_by_ids(self, book_ids):
+        return await self.adb.run(self.manager.get_books_by_ids, book_ids)
+
+
+class AsyncCustomer:
+    """Customer operations for asyncio code."""
+
+    def __init__(self, adb):
+        self.adb = adb
+        self.manager = Customer(adb.db)
+
+    async def add_customer(self, name, email, membership_status):
+        return await self.adb.run(self.manager.add_customer, name, email, membership_status)
+
+    async def add_customers_bulk(self, source, batch_size=1000, fmt=None, on_error=None):
+        return await self.adb.run(self.manager.add_customers_bulk, source, batch_size, fmt, on_error)
+
+    async def update_customer(self, customer_id, name, email, membership_status):
+        return await self.adb.run(self.manager.update_customer, customer_id, name, email, membership_status)
+
+    async def delete_customer(self, customer_id):
+        return await self.adb.run(self.manager.delete_customer, customer_id)
+
+    async def get_customer(self, customer_id):
+        return await self.adb.run(self.manager.get_customer, customer_id)
+
+    async def get_customers_page(self, after_id=None, before_id=None, last=False, limit=50):
+        return await self.adb.run(self.manager.get_customers_page, after_id, before_id, last, limit)
+
+
+class AsyncTransaction:
+    """Checkout and return operations for asyncio code.
+
+    Each call keeps the sync manager's single-transaction semantics: the whole
+    checkout or return runs on one worker with one commit.
+    """
+
+    def __init__(self, adb, fine_engine=None, overdue_index=None):
+        self.adb = adb
+        self.manager = Transaction(adb.db, fine_engine=fine_engine, overdue_index=overdue_index)
+
+    async def checkout_book(self, book_id, customer_id):
+        return await self.adb.run(self.manager.checkout_book, book_id, customer_id)
+
+    async def checkout_many(self, book_ids, customer_id):
+        return await self.adb.run(self.manager.checkout_many, book_ids, customer_id)
+
+    async def return_book(self, book_id, transaction_id):
+        return await self.adb.run(self.manager.return_book, book_id, transaction_id)
+
+    async def return_many(self, book_ids):
+        return await self.adb.run(self.manager.return_many, book_ids)
+
+    async def accrue_fines(self):
+        return await self.adb.run(self.manager.accrue_fines)
+
+    async def get_transaction(self, transaction_id):
+        return await self.adb.run(self.manager.get_transaction, transaction_id)
+
+    async def get_transactions_by_ids(self, transaction_ids):
+        return await self.adb.run(self.manager.get_transactions_by_ids, transaction_ids)
+
+    async def get_transactions_by_customer(self, customer_id):
+        return await self.adb.run(self.manager.get_transactions_by_customer, customer_id)
+
+    async def get_transactions_page(self, after_id=None, before_id=None, last=False, limit=50):
+        return await self.adb.run(self.manager.get_transactions_page, after_id, before_id, last, limit)
+
+
+class AsyncReport:
+    """Reports for asyncio code; the iter_* methods are async generators."""
+
+    def __init__(self, adb, overdue_index=None):
+        self.adb = adb
+        self.manager = Report(adb.db, overdue_index=overdue_index)
+
+    async def generate_overdue_report(self):
+        return await self.adb.run(self.manager.generate_overdue_report)
+
+    async def generate_due_soon_report(self, days):
+        return await self.adb.run(self.manager.generate_due_soon_report, days)
+
+    async def count_overdue(self):
+        return await self.adb.run(self.manager.count_overdue)
+
+    async def generate_transaction_history(self, start_date, end_date):
+        return await self.adb.run(self.manager.generate_transaction_history, start_date, end_date)
+
+    def iter_overdue_report(self):
+        """Yields overdue report rows, fetching STREAM_ARRAYSIZE rows per worker call."""
+        return self.adb.stream_query(OVERDUE_STREAM_QUERY, arraysize=Report.STREAM_ARRAYSIZE)
+
+    def iter_transaction_history(self, start_date, end_date):
+        """Yields transaction history rows for a date range, batch by batch."""
+        return self.adb.stream_query(HISTORY_STREAM_QUERY, [start_date, end_date], arraysize=Report.STREAM_ARRAYSIZE)
+
+    async def export_overdue_report(self, path, fmt=None, on_progress=None):
+        return await self.adb.run(self.manager.export_overdue_report, path, fmt, on_progress)
+
+    async def export_transaction_history(self, start_date, end_date, path, fmt=None, on_progress=None):
+        return await self.adb.run(self.manager.export_transaction_history, start_date, end_date, path, fmt,
+                                  on_progress)
@@ -0,0 +1,413 @@
+# File: backends.py
+# Purpose: Pluggable database backends (Oracle server or embedded SQLite)
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+
+try:
+    import oracledb
+except ImportError:  # The Oracle driver is only needed for the Oracle backend
+    oracledb = None
+
+
+ORACLE_SCHEMA = [
+    """
+    CREATE TABLE books (
+        book_id NUMBER PRIMARY KEY,
+        title VARCHAR2(100),
+        author VARCHAR2(50),
+        genre VARCHAR2(50),
+        isbn VARCHAR2(13),
+        is_available NUMBER(1) DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE customers (
+        customer_id NUMBER PRIMARY KEY,
+        name VARCHAR2(100),
+        email VARCHAR2(100),
+        membership_status VARCHAR2(20)
+    )
+    """,
+    """
+    CREATE TABLE transactions (
+        transaction_id NUMBER PRIMARY KEY,
+        book_id NUMBER,
+        customer_id NUMBER,
+        checkout_date DATE,
+        return_date DATE,
+        due_date DATE,
+        fine NUMBER DEFAULT 0,
+        FOREIGN KEY (book_id) REFERENCES books(book_id),
+        FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+    )
+    """,
+    # Sequences for auto-incrementing IDs
+    "CREATE SEQUENCE book_seq START WITH 1 INCREMENT BY 1",
+    "CREATE SEQUENCE customer_seq START WITH 1 INCREMENT BY 1",
+    "CREATE SEQUENCE transaction_seq START WITH 1 INCREMENT BY 1",
+    """
+    CREATE OR REPLACE TRIGGER book_trigger
+    BEFORE INSERT ON books
+    FOR EACH ROW
+    BEGIN
+        SELECT book_seq.NEXTVAL INTO :NEW.book_id FROM dual;
+    END;
+    """,
+    """
+    CREATE OR REPLACE TRIGGER customer_trigger
+    BEFORE INSERT ON customers
+    FOR EACH ROW
+    BEGIN
+        SELECT customer_seq.NEXTVAL INTO :NEW.customer_id FROM dual;
+    END;
+    """,
+    """
+    CREATE OR REPLACE TRIGGER transaction_trigger
+    BEFORE INSERT ON transactions
+    FOR EACH ROW
+    BEGIN
+        SELECT transaction_seq.NEXTVAL INTO :NEW.transaction_id FROM dual;
+    END;
+    """,
+]
+
+# Secondary indexes behind the hot filters. Oracle has no partial indexes, but a
+# B-tree skips rows whose keys are all NULL, so (return_date, due_date) serves
+# "return_date IS NULL AND due_date < ..." as a range scan over open loans only.
+# The *_BASE_INDEXES lists are what schema migration 3 creates and must not change;
+# later indexes get their own list and migration.
+ORACLE_BASE_INDEXES = [
+    "CREATE INDEX ix_transactions_customer ON transactions (customer_id)",
+    "CREATE INDEX ix_transactions_book ON transactions (book_id)",
+    "CREATE INDEX ix_transactions_checkout ON transactions (checkout_date)",
+    "CREATE INDEX ix_transactions_open_due ON transactions (return_date, due_date)",
+    "CREATE INDEX ix_books_title_lower ON books (LOWER(title))",
+]
+# Schema migration 4: ISBN lookups and author prefix search (same SQL on both backends)
+BOOK_SEARCH_INDEXES = [
+    "CREATE INDEX ix_books_author_lower ON books (LOWER(author))",
+    "CREATE INDEX ix_books_isbn ON books (isbn)",
+]
+ORACLE_INDEXES = ORACLE_BASE_INDEXES + BOOK_SEARCH_INDEXES
+
+ORACLE_VERSION_TABLE = """
+    CREATE TABLE schema_version (
+        version NUMBER PRIMARY KEY,
+        description VARCHAR2(200),
+        applied_at DATE
+    )
+"""
+# Looks up an object by kind and name in the current user's schema
+ORACLE_OBJECT_EXISTS = {
+    "table": "SELECT COUNT(*) FROM user_tables WHERE table_name = UPPER(:1)",
+    "sequence": "SELECT COUNT(*) FROM user_sequences WHERE sequence_name = UPPER(:1)",
+    "trigger": "SELECT COUNT(*) FROM user_triggers WHERE trigger_name = UPPER(:1)",
+    "index": "SELECT COUNT(*) FROM user_indexes WHERE index_name = UPPER(:1)",
+}
+ORACLE_INDEX_NAMES = "SELECT LOWER(index_name) FROM user_indexes"
+
+# AUTOINCREMENT keys play the role of the Oracle sequences and ID triggers
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE books (
+        book_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        author TEXT,
+        genre TEXT,
+        isbn TEXT,
+        is_available INTEGER DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE customers (
+        customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        email TEXT,
+        membership_status TEXT
+    )
+    """,
+    """
+    CREATE TABLE transactions (
+        transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        book_id INTEGER,
+        customer_id INTEGER,
+        checkout_date TEXT,
+        return_date TEXT,
+        due_date TEXT,
+        fine REAL DEFAULT 0,
+        FOREIGN KEY (book_id) REFERENCES books(book_id),
+        FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+    )
+    """,
+]
+
+SQLITE_BASE_INDEXES = [
+    "CREATE INDEX ix_transactions_customer ON transactions (customer_id)",
+    "CREATE INDEX ix_transactions_book ON transactions (book_id)",
+    "CREATE INDEX ix_transactions_checkout ON transactions (checkout_date)",
+    "CREATE INDEX ix_transactions_open_due ON transactions (due_date) WHERE return_date IS NULL",
+    "CREATE INDEX ix_books_title_lower ON books (LOWER(title))",
+]
+SQLITE_INDEXES = SQLITE_BASE_INDEXES + BOOK_SEARCH_INDEXES
+
+SQLITE_VERSION_TABLE = """
+    CREATE TABLE schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TEXT
+    )
+"""
+SQLITE_OBJECT_EXISTS = {kind: f"SELECT COUNT(*) FROM sqlite_master WHERE type = '{kind}' AND name = LOWER(:1)"
+                        for kind in ("table", "trigger", "index")}
+SQLITE_INDEX_NAMES = "SELECT LOWER(name) FROM sqlite_master WHERE type = 'index'"
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+# Dates are stored as sortable ISO text so comparisons behave like Oracle DATEs
+SQLITE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_ORACLE_DATE_TOKENS = [("YYYY", "%Y"), ("HH24", "%H"), ("MM", "%m"), ("DD", "%d"), ("MI", "%M"), ("SS", "%S")]
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_POSITIONAL_BIND = re.compile(r":(\d+)")
+_SYSDATE = re.compile(r"\bSYSDATE\b", re.IGNORECASE)
+_FETCH_FIRST = re.compile(r"\bFETCH\s+FIRST\s+(\S+)\s+ROWS?\s+ONLY\b", re.IGNORECASE)
+
+
+def _to_date(value, fmt):
+    """SQLite implementation of Oracle's TO_DATE for the formats the managers use."""
+    if value is None:
+        return None
+    pattern = fmt
+    for token, directive in _ORACLE_DATE_TOKENS:
+        pattern = pattern.replace(token, directive)
+    return datetime.strptime(value, pattern).strftime(SQLITE_DATE_FORMAT)
+
+
+@lru_cache(maxsize=512)
+def translate_oracle_sql(query):
+    """Rewrites Oracle-dialect SQL used by the managers into SQLite SQL.
+
+    Translations are cached so the same manager query always maps to the same
+    string, which keeps sqlite3's prepared statement cache hot.
+    """
+    parts = _STRING_LITERAL.split(query)
+    for i in range(0, len(parts), 2):  # Even parts are outside string literals
+        part = _POSITIONAL_BIND.sub(r"?\1", parts[i])
+        part = _FETCH_FIRST.sub(r"LIMIT \1", part)
+        parts[i] = _SYSDATE.sub("datetime('now', 'localtime')", part)
+    return "".join(parts)
+
+
+class OracleBackend:
+    """Connects to an Oracle server through python-oracledb."""
+    name = "oracle"
+    schema = ORACLE_SCHEMA
+    base_indexes = ORACLE_BASE_INDEXES
+    indexes = ORACLE_INDEXES
+    version_table = ORACLE_VERSION_TABLE
+    object_exists = ORACLE_OBJECT_EXISTS
+    index_names = ORACLE_INDEX_NAMES
+
+    def __init__(self, user="your_username", password="your_password", dsn="your_dsn", statement_cache_size=256):
+        self.user = user
+        self.password = password
+        self.dsn = dsn  # e.g., localhost:1521/orcl
+        self.statement_cache_size = statement_cache_size
+        self.errors = (oracledb.Error,) if oracledb else ()
+
+    def connect(self):
+        """Opens a new connection to the Oracle server."""
+        if oracledb is None:
+            raise RuntimeError("The Oracle backend requires python-oracledb (pip install oracledb).")
+        connection = oracledb.connect(user=self.user, password=self.password, dsn=self.dsn)
+        connection.stmtcachesize = self.statement_cache_size
+        return connection
+
+    def ping(self, connection):
+        """Raises a driver error if the connection is no longer usable."""
+        connection.ping()
+
+    def execute_batch(self, cursor, query, rows):
+        """Runs executemany, collecting per-row failures instead of stopping at the first."""
+        cursor.executemany(query, rows, batcherrors=True)
+        return [(error.offset, error.message) for error in cursor.getbatcherrors()]
+
+    def execute_many_counts(self, cursor, query, rows):
+        """Runs executemany in one round trip; returns the rows each params row affected."""
+        cursor.executemany(query, rows, arraydmlrowcounts=True)
+        return cursor.getarraydmlrowcounts()
+
+    def insert_returning_id(self, cursor, query, params, id_column):
+        """Runs an INSERT and returns the ID the sequence trigger assigned."""
+        id_var = cursor.var(oracledb.NUMBER)
+        params = list(params) + [id_var]
+        cursor.execute(f"{query.rstrip()} RETURNING {id_column} INTO :{len(params)}", params)
+        return int(id_var.getvalue()[0])
+
+    def days_between(self, later, earlier):
+        """Returns SQL for the whole calendar days from earlier to later."""
+        return f"(TRUNC({later}) - TRUNC({earlier}))"
+
+    def set_input_sizes(self, cursor, binds):
+        """Declares bind types and maximum string lengths before an execute."""
+        sizes = []
+        for bind in binds:
+            if isinstance(bind, tuple):
+                sizes.append(bind[1])  # (str, n): a VARCHAR2 of up to n characters
+            elif bind is int or bind is float:
+                sizes.append(oracledb.DB_TYPE_NUMBER)
+            elif bind is datetime or bind is date:
+                sizes.append(oracledb.DB_TYPE_DATE)
+            else:
+                sizes.append(None)  # Let the driver infer it
+        cursor.setinputsizes(*sizes)
+
+    def full_scans(self, cursor, query, bind_count):
+        """Returns the lower-cased tables the optimizer's plan for query reads with a full scan."""
+        cursor.execute("DELETE FROM plan_table WHERE statement_id = 'library_plan'")
+        cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = 'library_plan' FOR {query}")
+        cursor.execute("""
+            SELECT LOWER(object_name) FROM plan_table
+            WHERE statement_id = 'library_plan' AND operation = 'TABLE ACCESS' AND options = 'FULL'
+        """)
+        return [row[0] for row in cursor.fetchall()]
+
+    def prepare(self, query):
+        """Returns the SQL to send to the server (already Oracle dialect)."""
+        return query
+
+    def adapt_params(self, params):
+        """Returns bind values in the form the driver expects."""
+        return params
+
+
+class SQLiteBackend:
+    """Runs the library schema in-process on SQLite, tuned for local use.
+
+    Every connection to ":memory:" is a separate database, so pooled use needs a
+    file path or a shared-cache URI such as "file:library?mode=memory&cache=shared".
+    """
+    name = "sqlite"
+    schema = SQLITE_SCHEMA
+    base_indexes = SQLITE_BASE_INDEXES
+    indexes = SQLITE_INDEXES
+    version_table = SQLITE_VERSION_TABLE
+    object_exists = SQLITE_OBJECT_EXISTS
+    index_names = SQLITE_INDEX_NAMES
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path="library.db", timeout=5.0, statement_cache_size=256, cache_size_kb=20000):
+        self.path = path
+        self.timeout = timeout
+        self.statement_cache_size = statement_cache_size
+        self.cache_size_kb = cache_size_kb
+
+    def connect(self):
+        """Opens a new SQLite connection with WAL and the Oracle compatibility functions."""
+        connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                                     cached_statements=self.statement_cache_size, uri=self.path.startswith("file:"))
+        if self.path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        connection.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        connection.create_function("TO_DATE", 2, _to_date, deterministic=True)
+        return connection
+
+    def ping(self, connection):
+        """Raises a driver error if the connection is no longer usable."""
+        connection.execute("SELECT 1").fetchone()
+
+    def execute_batch(self, cursor, query, rows):
+        """Runs executemany, collecting per-row failures instead of stopping at the first.
+
+        SQLite has no batch error mode, so a failing batch is rolled back to a
+        savepoint and replayed row by row to isolate the bad rows.
+        """
+        cursor.execute("SAVEPOINT batch_insert")
+        try:
+            cursor.executemany(query, rows)
+            cursor.execute("RELEASE batch_insert")
+            return []
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK TO batch_insert")
+        errors = []
+        for offset, row in enumerate(rows):
+            try:
+                cursor.execute(query, row)
+            except sqlite3.Error as e:
+                errors.append((offset, str(e)))
+        cursor.execute("RELEASE batch_insert")
+        return errors
+
+    def execute_many_counts(self, cursor, query, rows):
+        """Returns the rows each params row affected, running one execute per row (in-process, no round trips)."""
+        counts = []
+        for row in rows:
+            cursor.execute(query, row)
+            counts.append(cursor.rowcount)
+        return counts
+
+    def insert_returning_id(self, cursor, query, params, id_column):
+        """Runs an INSERT and returns the AUTOINCREMENT key it assigned."""
+        cursor.execute(query, params)
+        return cursor.lastrowid
+
+    def days_between(self, later, earlier):
+        """Returns SQL for the whole calendar days from earlier to later."""
+        return f"(julianday(date({later})) - julianday(date({earlier})))"
+
+    def set_input_sizes(self, cursor, binds):
+        """SQLite binds are dynamically typed, so declarations are not needed."""
+
+    def full_scans(self, cursor, query, bind_count):
+        """Returns the tables (or aliases) EXPLAIN QUERY PLAN reads without any index."""
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", [None] * bind_count)
+        scans = []
+        for row in cursor.fetchall():
+            match = _SQLITE_FULL_SCAN.match(row[-1])
+            if match:
+                scans.append(match.group(1).lower())
+        return scans
+
+    def prepare(self, query):
+        """Translates Oracle binds and date functions into SQLite SQL."""
+        return translate_oracle_sql(query)
+
+    def adapt_params(self, params):
+        """Stores datetimes as ISO text, the format the schema compares on."""
+        if not params:
+            return params
+        return [self._adapt(value) for value in params]
+
+    @staticmethod
+    def _adapt(value):
+        if isinstance(value, datetime):
+            return value.strftime(SQLITE_DATE_FORMAT)
+        if isinstance(value, date):
+            return value.strftime("%Y-%m-%d")
+        return value
+
+
+def create_backend():
+    """Builds the backend selected by the LIBRARY_DB_* environment variables.
+
+    LIBRARY_DB_BACKEND picks "oracle" (default) or "sqlite". The Oracle backend
+    reads LIBRARY_DB_USER, LIBRARY_DB_PASSWORD and LIBRARY_DB_DSN; the SQLite
+    backend reads LIBRARY_DB_PATH (default library.db). Both take the
+    per-connection statement cache size from LIBRARY_DB_STATEMENT_CACHE.
+    """
+    kind = os.environ.get("LIBRARY_DB_BACKEND", "oracle").lower()
+    statement_cache_size = int(os.environ.get("LIBRARY_DB_STATEMENT_CACHE", "256"))
+    if kind == "sqlite":
+        return SQLiteBackend(os.environ.get("LIBRARY_DB_PATH", "library.db"),
+                             statement_cache_size=statement_cache_size)
+    if kind == "oracle":
+        return OracleBackend(user=os.environ.get("LIBRARY_DB_USER", "your_username"),
+                             password=os.environ.get("LIBRARY_DB_PASSWORD", "your_password"),
+                             dsn=os.environ.get("LIBRARY_DB_DSN", "your_dsn"),
+                             statement_cache_size=statement_cache_size)
+    raise ValueError(f"Unknown LIBRARY_DB_BACKEND: {kind}")
@@ -0,0 +1,96 @@
+# File: background.py
+# Purpose: Runs database work on worker threads and hands results back to the Tk loop
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundExecutor:
+    """Thread pool whose results are delivered on the Tk thread through root.after.
+
+    Tk widgets must only be touched from the main loop, so callbacks never run on
+    the worker threads: finished futures are queued and drained by a short
+    root.after poll that only runs while work is pending. Submitting with a key
+    supersedes earlier work under the same key: a queued call is cancelled and a
+    running one has its result dropped, so a slow old search can never overwrite
+    a newer one.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=30, on_busy_change=None):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.on_busy_change = on_busy_change  # Called as on_busy_change(descriptions)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="library-db")
+        self._done = queue.SimpleQueue()
+        self._latest = {}  # key -> generation of the newest submission
+        self._futures = {}  # key -> newest future
+        self._running = {}  # id(future) -> description, for progress display
+        self._polling = False
+        self._closed = False
+
+    def submit(self, fn, *args, on_success=None, on_error=None, key=None, description="Working"):
+        """Runs fn(*args) in the background; on_success(result) or on_error(exc) runs on the Tk thread."""
+        if self._closed:
+            return None
+        generation = None
+        if key is not None:
+            generation = self._latest.get(key, 0) + 1
+            self._latest[key] = generation
+            previous = self._futures.get(key)
+            if previous is not None and previous.cancel():
+                self._running.pop(id(previous), None)
+        future = self._pool.submit(fn, *args)
+        if key is not None:
+            self._futures[key] = future
+        self._running[id(future)] = description
+        future.add_done_callback(lambda f: self._done.put((f, key, generation, on_success, on_error)))
+        self._notify_busy()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+        return future
+
+    def cancel(self, key):
+        """Supersedes the work submitted under key: a queued call is cancelled, a running one's result dropped."""
+        self._latest[key] = self._latest.get(key, 0) + 1
+        future = self._futures.pop(key, None)
+        if future is not None and future.cancel():
+            self._running.pop(id(future), None)
+            self._notify_busy()
+
+    def is_busy(self):
+        return bool(self._running)
+
+    def _notify_busy(self):
+        if self.on_busy_change:
+            self.on_busy_change(list(self._running.values()))
+
+    def _poll(self):
+        """Delivers finished results; reschedules itself only while work is pending."""
+        while True:
+            try:
+                future, key, generation, on_success, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._running.pop(id(future), None)
+            if key is not None and self._futures.get(key) is future:
+                del self._futures[key]
+            if future.cancelled() or (key is not None and generation != self._latest.get(key)):
+                continue  # Superseded by a newer request with the same key
+            error = future.exception()
+            if error is not None:
+                logging.error(f"Background task failed: {error!r}")
+                if on_error:
+                    on_error(error)
+            elif on_success:
+                on_success(future.result())
+        self._notify_busy()
+        if self._running and not self._closed:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self):
+        """Stops accepting work and cancels anything not yet started."""
+        self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
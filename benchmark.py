@@ -0,0 +1,337 @@
+# File: benchmark.py
+# Purpose: Times the manager hot paths on synthetic data and checks them against regression thresholds
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from backends import SQLiteBackend
+from book import ADD_BOOK_QUERY, Book
+from customer import ADD_CUSTOMER_QUERY, Customer
+from database import Database
+from report import Report
+from statements import statement
+from transaction import LOAN_DAYS, Transaction
+
+# Books per data size step; customers and loans scale with them
+DEFAULT_SIZES = (1000, 5000, 20000)
+CUSTOMERS_PER_BOOK = 0.2
+LOANS_PER_BOOK = 4
+# Timed calls per benchmark and data size (reports scan more, so they run fewer times)
+DEFAULT_REPEAT = 20
+REPORT_REPEAT = 5
+# Times below this are treated as equal when comparing runs, so timer noise is not a regression
+NOISE_FLOOR_MS = 0.05
+# Largest acceptable growth exponent of the median time against data size
+# (0 = flat, 1 = linear). Point lookups must stay flat; scans and reports whose
+# answer grows with the data may grow linearly, but no worse.
+SCALING_THRESHOLDS = {
+    "book.search_books": 1.25,
+    "transaction.checkout_book": 0.35,
+    "transaction.return_book": 0.35,
+    "transaction.get_transactions_by_customer": 0.35,  # Served by ix_transactions_customer
+    "report.generate_overdue_report": 1.25,
+    "report.generate_transaction_history": 1.25,
+}
+# A median this many times slower than the baseline run at the same size is a regression
+DEFAULT_TOLERANCE = 1.5
+
+INSERT_LOAN_QUERY = statement("benchmark.insert_loan", """
+    INSERT INTO transactions (book_id, customer_id, checkout_date, due_date, return_date, fine)
+    VALUES (:1, :2, :3, :4, :5, :6)
+""", (int, int, datetime, datetime, datetime, float))
+MARK_ON_LOAN_QUERY = statement("benchmark.mark_on_loan", """
+    UPDATE books SET is_available = 0
+    WHERE book_id IN (SELECT book_id FROM transactions WHERE return_date IS NULL)
+""")
+
+ADJECTIVES = ("Silent", "Crimson", "Hidden", "Last", "Golden", "Broken", "Distant", "Secret", "Burning", "Frozen",
+              "Quiet", "Wild", "Lost", "Hollow", "Bright", "Endless")
+NOUNS = ("River", "Empire", "Garden", "Machine", "Harbor", "Kingdom", "Forest", "Signal", "Mirror", "Voyage",
+         "Tower", "Winter", "Atlas", "Theory", "Island", "Letter", "Orchard", "Storm", "Archive", "Compass")
+FIRST_NAMES = ("Amal", "Bruno", "Chen", "Dana", "Elif", "Farah", "Goran", "Hana", "Ivan", "Jun", "Kofi", "Lena",
+               "Mahmoud", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sami", "Tariq")
+LAST_NAMES = ("Khalil", "Novak", "Okafor", "Silva", "Tanaka", "Weber", "Haddad", "Ivanova", "Moreau", "Kim",
+              "Larsen", "Costa", "Nasser", "Patel", "Quinn", "Rossi")
+GENRES = ("Fiction", "Non-Fiction", "Science", "History")
+MEMBERSHIPS = ("Active", "Active", "Active", "Inactive", "Suspended")
+
+
+class Dataset:
+    """What generate_dataset loaded, for picking realistic benchmark arguments."""
+
+    def __init__(self, books, customers, loans, open_loans, overdue_loans, start, end):
+        self.books = books
+        self.customers = customers
+        self.loans = loans
+        self.open_loans = open_loans
+        self.overdue_loans = overdue_loans
+        self.start = start  # Earliest checkout date
+        self.end = end  # Generation time; every date is at or before it
+        self.available_book_ids = []
+
+    def as_dict(self):
+        return {"books": self.books, "customers": self.customers, "loans": self.loans,
+                "open_loans": self.open_loans, "overdue_loans": self.overdue_loans}
+
+
+def _batches(rows, size=5000):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def generate_dataset(db, books, customers=None, loans=None, years=3, open_ratio=0.05, overdue_ratio=0.3,
+                     late_ratio=0.15, seed=42):
+    """Loads a reproducible synthetic library into an empty schema and returns its Dataset.
+
+    loans spread over the past years; open_ratio of them are still out (at most
+    one per book), overdue_ratio of the open loans are past due, and late_ratio
+    of the returned loans came back late with a fine. The same arguments and
+    seed always produce the same rows.
+    """
+    rng = random.Random(seed)
+    customers = customers or max(1, int(books * CUSTOMERS_PER_BOOK))
+    loans = loans if loans is not None else books * LOANS_PER_BOOK
+    end = datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=365 * years)
+
+    book_rows = [(f"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}",
+                  f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.choice(GENRES), f"978{i:010d}")
+                 for i in range(books)]
+    for batch in _batches(book_rows):
+        db.execute_batch(ADD_BOOK_QUERY, batch)
+    customer_rows = []
+    for i in range(customers):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        customer_rows.append((f"{first} {last}", f"{first.lower()}.{last.lower()}{i}@example.com",
+                              rng.choice(MEMBERSHIPS)))
+    for batch in _batches(customer_rows):
+        db.execute_batch(ADD_CUSTOMER_QUERY, batch)
+
+    # IDs start at 1 in a fresh schema
+    open_count = min(int(loans * open_ratio), books // 2)
+    open_books = rng.sample(range(1, books + 1), open_count)
+    overdue_count = int(open_count * overdue_ratio)
+    loan_rows = []
+    history_days = (end - start).days - 60  # Returned loans end at least a month before now
+    for _ in range(loans - open_count):
+        checkout = start + timedelta(days=rng.uniform(0, history_days))
+        late = rng.random() < late_ratio
+        kept_days = rng.uniform(LOAN_DAYS + 1, LOAN_DAYS + 30) if late else rng.uniform(1, LOAN_DAYS)
+        due = checkout + timedelta(days=LOAN_DAYS)
+        returned = checkout + timedelta(days=kept_days)
+        fine = float((returned.date() - due.date()).days) if late else 0.0
+        loan_rows.append((rng.randint(1, books), rng.randint(1, customers), checkout, due, returned, fine))
+    for position, book_id in enumerate(open_books):
+        if position < overdue_count:
+            checkout = end - timedelta(days=rng.uniform(LOAN_DAYS + 1, 120))
+        else:
+            checkout = end - timedelta(days=rng.uniform(0, LOAN_DAYS - 1))
+        loan_rows.append((book_id, rng.randint(1, customers), checkout, checkout + timedelta(days=LOAN_DAYS), None,
+                          0.0))
+    loan_rows.sort(key=lambda row: row[2])  # IDs follow checkout order, as in real use
+    loan_rows = [tuple(value.replace(microsecond=0) if isinstance(value, datetime) else value for value in row)
+                 for row in loan_rows]
+    for batch in _batches(loan_rows):
+        db.execute_batch(INSERT_LOAN_QUERY, batch)
+    db.execute_query(MARK_ON_LOAN_QUERY)
+
+    dataset = Dataset(books, customers, loans, open_count, overdue_count, start, end)
+    on_loan = set(open_books)
+    dataset.available_book_ids = [book_id for book_id in range(1, books + 1) if book_id not in on_loan]
+    return dataset
+
+
+def _timed(fn, repeat):
+    """Calls fn() repeat times after one warm-up call; returns (milliseconds per call, last result)."""
+    result = fn()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return times, result
+
+
+def _summary(name, size, times, rows):
+    times = sorted(times)
+    return {
+        "benchmark": name,
+        "size": size,
+        "calls": len(times),
+        "rows": rows,
+        "median_ms": statistics.median(times),
+        "p95_ms": times[min(len(times) - 1, int(0.95 * len(times)))],
+        "min_ms": times[0],
+        "max_ms": times[-1],
+    }
+
+
+def run_benchmarks(db, dataset, size, repeat=DEFAULT_REPEAT, seed=42):
+    """Times each hot path against a loaded dataset; returns one summary dict per benchmark."""
+    rng = random.Random(seed)
+    books = Book(db, search_index=True)  # As the GUI and service search
+    customers = Customer(db)
+    transactions = Transaction(db)
+    reports = Report(db)
+    results = []
+
+    terms = [rng.choice(NOUNS) for _ in range(repeat + 1)]
+    times, rows = _timed(lambda: books.search_books(terms.pop()), repeat)
+    results.append(_summary("book.search_books", size, times, len(rows)))
+
+    # Each round checks out an available book and returns it, so the data does not drift
+    customer_ids = [rng.randint(1, dataset.customers) for _ in range(repeat + 1)]
+    book_ids = rng.sample(dataset.available_book_ids, min(repeat + 1, len(dataset.available_book_ids)))
+    checkout_times, return_times = [], []
+    for book_id, customer_id in zip(book_ids, customer_ids):
+        started = time.perf_counter()
+        result = transactions.checkout_book(book_id, customer_id)
+        checkout_times.append((time.perf_counter() - started) * 1000)
+        if not result:
+            raise RuntimeError(f"Benchmark checkout of book {book_id} failed: {result.status}")
+        started = time.perf_counter()
+        if not transactions.return_book(book_id, result.transaction[0]):
+            raise RuntimeError(f"Benchmark return of book {book_id} failed")
+        return_times.append((time.perf_counter() - started) * 1000)
+    # The first round warms the statement caches, as _timed does
+    results.append(_summary("transaction.checkout_book", size, checkout_times[1:], 1))
+    results.append(_summary("transaction.return_book", size, return_times[1:], 1))
+
+    times, rows = _timed(lambda: transactions.get_transactions_by_customer(customer_ids.pop()), repeat)
+    results.append(_summary("transaction.get_transactions_by_customer", size, times, len(rows)))
+
+    times, rows = _timed(reports.generate_overdue_report, REPORT_REPEAT)
+    results.append(_summary("report.generate_overdue_report", size, times, len(rows)))
+
+    month_end = dataset.end - timedelta(days=90)
+    month_start = month_end - timedelta(days=30)
+    times, rows = _timed(lambda: reports.generate_transaction_history(month_start.strftime("%Y-%m-%d"),
+                                                                      month_end.strftime("%Y-%m-%d")),
+                         REPORT_REPEAT)
+    results.append(_summary("report.generate_transaction_history", size, times, len(rows)))
+    return results
+
+
+def scaling_exponents(results):
+    """Returns {benchmark: growth exponent of the median between the smallest and largest size}.
+
+    The exponent k fits time ~ size ** k: about 0 for constant-time paths and
+    about 1 for paths that scan the data once.
+    """
+    by_name = {}
+    for result in results:
+        by_name.setdefault(result["benchmark"], []).append(result)
+    exponents = {}
+    for name, runs in by_name.items():
+        runs.sort(key=lambda run: run["size"])
+        small, large = runs[0], runs[-1]
+        if large["size"] == small["size"]:
+            continue
+        ratio = max(large["median_ms"], NOISE_FLOOR_MS) / max(small["median_ms"], NOISE_FLOOR_MS)
+        exponents[name] = math.log(ratio) / math.log(large["size"] / small["size"])
+    return exponents
+
+
+def find_regressions(results, exponents, thresholds=None, baseline=None, tolerance=DEFAULT_TOLERANCE):
+    """Returns a description of every scaling threshold or baseline comparison the run fails."""
+    thresholds = SCALING_THRESHOLDS if thresholds is None else thresholds
+    regressions = []
+    for name, exponent in sorted(exponents.items()):
+        limit = thresholds.get(name)
+        if limit is not None and exponent > limit:
+            regressions.append({"benchmark": name, "kind": "scaling", "value": exponent, "limit": limit})
+    if baseline:
+        previous = {(run["benchmark"], run["size"]): run for run in baseline.get("results", [])}
+        for result in results:
+            before = previous.get((result["benchmark"], result["size"]))
+            if before is None:
+                continue
+            limit = max(before["median_ms"], NOISE_FLOOR_MS) * tolerance
+            if result["median_ms"] > limit:
+                regressions.append({"benchmark": result["benchmark"], "kind": "baseline", "size": result["size"],
+                                    "value": result["median_ms"], "limit": limit})
+    return regressions
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, seed=42, directory=None, thresholds=None, baseline=None,
+              tolerance=DEFAULT_TOLERANCE, log=None):
+    """Builds a fresh SQLite database per size, runs every benchmark and returns the report dict."""
+    results = []
+    datasets = {}
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        for size in sizes:
+            db = Database(SQLiteBackend(os.path.join(workdir, f"bench_{size}.db")))
+            try:
+                db.setup_database()
+                started = time.perf_counter()
+                dataset = generate_dataset(db, size, seed=seed)
+                if log:
+                    log(f"Generated {size} books, {dataset.loans} loans in {time.perf_counter() - started:.1f} s")
+                datasets[size] = dataset.as_dict()
+                results.extend(run_benchmarks(db, dataset, size, repeat=repeat, seed=seed))
+            finally:
+                db.close()
+    exponents = scaling_exponents(results)
+    return {
+        "environment": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                        "platform": platform.platform(), "seed": seed, "repeat": repeat,
+                        "generated_at": datetime.now().isoformat(timespec="seconds")},
+        "datasets": {str(size): counts for size, counts in datasets.items()},
+        "results": results,
+        "scaling": exponents,
+        "regressions": find_regressions(results, exponents, thresholds, baseline, tolerance),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the library managers on synthetic data.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated book counts to generate (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the synthetic data")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare medians against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown factor against the baseline (default: %(default)s)")
+    parser.add_argument("--thresholds", help="JSON file of {benchmark: max scaling exponent} overrides")
+    args = parser.parse_args(argv)
+
+    thresholds = dict(SCALING_THRESHOLDS)
+    if args.thresholds:
+        with open(args.thresholds, encoding="utf-8") as handle:
+            thresholds.update(json.load(handle))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    report = run_suite(sizes, args.repeat, args.seed, thresholds=thresholds, baseline=baseline,
+                       tolerance=args.tolerance, log=lambda message: print(message, file=sys.stderr))
+    for result in report["results"]:
+        print(f"{result['benchmark']:<45} {result['size']:>8} {result['median_ms']:>10.3f} ms "
+              f"(p95 {result['p95_ms']:.3f} ms, {result['rows']} rows)", file=sys.stderr)
+    for regression in report["regressions"]:
+        print(f"REGRESSION {regression['benchmark']} ({regression['kind']}): "
+              f"{regression['value']:.3f} > {regression['limit']:.3f}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,60 +1,243 @@
 # File: book.py
 # Purpose: Handles book-related logic
+import logging
+
+from database import DatabaseError
+from paging import KeysetQuery
+from ingest import bulk_insert
+from search_index import MIN_TERM_LENGTH, TrigramIndex
+from search_router import BOOK_ID, ISBN, PREFIX, SUBSTRING, prefix_bounds, route_search
+from statements import InListQuery, statement
+
+BOOK_TEXT_BINDS = ((str, 100), (str, 50), (str, 50), (str, 13))  # title, author, genre, isbn
+
+ADD_BOOK_QUERY = statement("book.add", """
+    INSERT INTO books (title, author, genre, isbn)
+    VALUES (:1, :2, :3, :4)
+""", BOOK_TEXT_BINDS)
+UPDATE_BOOK_QUERY = statement("book.update", """
+    UPDATE books
+    SET title = :1, author = :2, genre = :3, isbn = :4, is_available = :5
+    WHERE book_id = :6
+""", BOOK_TEXT_BINDS + (int, int))
+DELETE_BOOK_QUERY = statement("book.delete", "DELETE FROM books WHERE book_id = :1", (int,))
+GET_BOOK_QUERY = statement("book.get", """
+    SELECT book_id, title, author, genre, isbn, is_available
+    FROM books
+    WHERE book_id = :1
+""", (int,))
+SEARCH_BOOKS_QUERY = statement("book.search", """
+    SELECT book_id, title, author, genre, isbn, is_available
+    FROM books
+    WHERE LOWER(title) LIKE LOWER(:1)
+    OR LOWER(author) LIKE LOWER(:1)
+    OR LOWER(genre) LIKE LOWER(:1)
+    OR isbn LIKE :1
+""", ((str, 102),))
+BOOK_COLUMNS = "book_id, title, author, genre, isbn, is_available"
+# Barcode scans: both stored forms of the ISBN in one probe of ix_books_isbn
+BOOKS_BY_ISBN_QUERY = statement("book.by_isbn", f"SELECT {BOOK_COLUMNS} FROM books WHERE isbn IN (:1, :2)",
+                                ((str, 13), (str, 13)))
+# Prefix searches as range scans on the LOWER() expression indexes, keyed by the columns searched
+PREFIX_QUERIES = {
+    ("title",): statement("book.title_prefix", f"""
+        SELECT {BOOK_COLUMNS} FROM books WHERE LOWER(title) >= :1 AND LOWER(title) < :2
+    """, ((str, 100), (str, 100))),
+    ("author",): statement("book.author_prefix", f"""
+        SELECT {BOOK_COLUMNS} FROM books WHERE LOWER(author) >= :1 AND LOWER(author) < :2
+    """, ((str, 100), (str, 100))),
+    ("title", "author"): statement("book.name_prefix", f"""
+        SELECT {BOOK_COLUMNS} FROM books
+        WHERE (LOWER(title) >= :1 AND LOWER(title) < :2) OR (LOWER(author) >= :3 AND LOWER(author) < :4)
+    """, ((str, 100),) * 4),
+}
+INDEX_ROWS_QUERY = statement("book.index_rows", "SELECT book_id, title, author, genre, isbn FROM books")
+BOOKS_PAGE = KeysetQuery("book.page", "SELECT book_id, title, author, genre, isbn, is_available FROM books",
+                         "book_id")
+# Oracle allows at most 1000 entries in an IN list
+BOOKS_BY_IDS = InListQuery("book.by_ids", """
+    SELECT book_id, title, author, genre, isbn, is_available
+    FROM books
+    WHERE book_id IN ({binds})
+""", max_size=500)
+
+
+def matches_search(book, search_term):
+    """True if a book row matches search_term as search_books does (a term without LIKE wildcards)."""
+    route = route_search(search_term)
+    if route.kind == ISBN and book[4] in route.value:
+        return True  # Otherwise the substring fallback matched it
+    if route.kind == BOOK_ID:
+        return book[0] == route.value
+    if route.kind == PREFIX:
+        return any((book[1 if column == "title" else 2] or "").lower().startswith(route.value)
+                   for column in route.columns)
+    lowered = search_term.lower()
+    return (any(lowered in (field or "").lower() for field in book[1:4])
+            or search_term in (book[4] or ""))
+
+
+def search_narrows(previous_term, search_term):
+    """True if every book matching search_term also matches previous_term.
+
+    Results of the previous term can then be filtered with matches_search
+    instead of querying. Exact lookups and LIKE wildcard terms never narrow.
+    """
+    previous, current = route_search(previous_term), route_search(search_term)
+    if current.kind in (ISBN, BOOK_ID) or any(c in search_term for c in "%_"):
+        return False
+    if previous.kind == SUBSTRING:
+        if any(c in previous_term for c in "%_"):
+            return False
+        value = search_term if current.kind == SUBSTRING else current.value
+        return previous_term.lower() in value.lower() if current.kind == PREFIX else previous_term in value
+    return (previous.kind == current.kind == PREFIX and set(current.columns) <= set(previous.columns)
+            and current.value.startswith(previous.value))
+
 
 class Book:
-    def __init__(self, db):
+    # Column limits from the books table, checked before rows reach the database
+    BULK_FIELDS = ("title", "author", "genre", "isbn")
+    BULK_MAX_LENGTHS = {"title": 100, "author": 50, "genre": 50, "isbn": 13}
+
+    FETCH_CHUNK = BOOKS_BY_IDS.max_size
+    # Indexed matches fetched by ID at most; broader terms are answered by one LIKE query
+    INDEXED_FETCH_LIMIT = 4 * FETCH_CHUNK
+
+    def __init__(self, db, search_index=None):
+        """search_index: a TrigramIndex (or True for a default one) to serve search_books."""
         self.db = db
+        self.search_index = TrigramIndex() if search_index is True else search_index
 
     def add_book(self, title, author, genre, isbn):
-        """Adds a new book to the database."""
-        query = """
-            INSERT INTO books (title, author # File: book.py (continued)
-            author, genre, isbn) 
-            VALUES (:1, :2, :3, :4)
-        """
+        """Adds a new book to the database and returns its row, or False on failure."""
         try:
-            self.db.execute_query(query, [title, author, genre, isbn])
-            return True
-        except oracledb.Error as e:
+            book_id = self.db.execute_insert(ADD_BOOK_QUERY, [title, author, genre, isbn], "book_id")
+            row = (book_id, title, author, genre, isbn, 1)  # is_available defaults to 1
+            if self.search_index is not None:
+                self.search_index.upsert(row)
+            return row
+        except DatabaseError as e:
             logging.error(f"Error adding book: {e}")
             return False
 
-    def update_book(self, book_id, title, author, genre, isbn, is_available):
-        """Updates book details."""
-        query = """
-            UPDATE books 
-            SET title = :1, author = :2, genre = :3, isbn = :4, is_available = :5
-            WHERE book_id = :6
+    def add_books_bulk(self, source, batch_size=1000, fmt=None, on_error=None):
+        """Streams books from a CSV/JSONL path or an iterable of records in batches.
+
+        Records are dicts with title, author, genre and isbn keys, or sequences in
+        that order. Returns a BulkLoadResult with per-row errors.
         """
+        result = bulk_insert(self.db, ADD_BOOK_QUERY, self.BULK_FIELDS, source, batch_size=batch_size,
+                             max_lengths=self.BULK_MAX_LENGTHS, fmt=fmt, on_error=on_error)
+        if self.search_index is not None:
+            self.search_index.invalidate()
+        return result
+
+    def update_book(self, book_id, title, author, genre, isbn, is_available):
+        """Updates book details and returns the updated row, or False on failure."""
         try:
-            self.db.execute_query(query, [title, author, genre, isbn, is_available, book_id])
-            return True
-        except oracledb.Error as e:
+            if not self.db.execute_query(UPDATE_BOOK_QUERY, [title, author, genre, isbn, is_available, book_id]):
+                logging.error(f"Error updating book: book {book_id} not found")
+                return False
+            row = (book_id, title, author, genre, isbn, is_available)
+            if self.search_index is not None:
+                self.search_index.upsert(row)
+            return row
+        except DatabaseError as e:
             logging.error(f"Error updating book: {e}")
             return False
 
     def delete_book(self, book_id):
         """Deletes a book from the database."""
-        query = "DELETE FROM books WHERE book_id = :1"
         try:
-            self.db.execute_query(query, [book_id])
+            self.db.execute_query(DELETE_BOOK_QUERY, [book_id])
+            if self.search_index is not None:
+                self.search_index.remove(book_id)
             return True
-        except oracledb.Error as e:
+        except DatabaseError as e:
             logging.error(f"Error deleting book: {e}")
             return False
 
+    def get_book(self, book_id):
+        """Fetches book details by ID."""
+        try:
+            result = self.db.execute_query(GET_BOOK_QUERY, [book_id], fetch=True)
+            return result[0] if result else None
+        except DatabaseError as e:
+            logging.error(f"Error fetching book: {e}")
+            return None
+
     def search_books(self, search_term):
-        """Searches books by title, author, genre, or ISBN."""
-        query = """
-            SELECT book_id, title, author, genre, isbn, is_available
-            FROM books
-            WHERE LOWER(title) LIKE LOWER(:1)
-            OR LOWER(author) LIKE LOWER(:1)
-            OR LOWER(genre) LIKE LOWER(:1)
-            OR isbn LIKE :1
+        """Searches books by title, author, genre, or ISBN, routed by the shape of the term.
+
+        A valid ISBN is one exact lookup (falling back to the substring search
+        when no book is stored under it, e.g. one stored with hyphens), "#123"
+        or "id:123" a lookup by book ID, and "title:", "author:" or a trailing
+        "*" a prefix range scan; see route_search.
         """
+        route = route_search(search_term)
+        try:
+            if route.kind == ISBN:
+                books = self.db.execute_query(BOOKS_BY_ISBN_QUERY, (route.value * 2)[:2], fetch=True)
+                if books:
+                    return books
+            elif route.kind == BOOK_ID:
+                return self.db.execute_query(GET_BOOK_QUERY, [route.value], fetch=True)
+            elif route.kind == PREFIX:
+                params = [bound for _ in route.columns for bound in prefix_bounds(route.value)]
+                return self.db.execute_query(PREFIX_QUERIES[route.columns], params, fetch=True)
+        except DatabaseError as e:
+            logging.error(f"Error searching books: {e}")
+            return []
+        return self._search_substring(search_term)
+
+    def _search_substring(self, search_term):
+        # LIKE wildcards in the term keep their SQL meaning, so only the database can answer those;
+        # terms without a trigram would make every book a candidate
+        if (self.search_index is not None and len(search_term) >= MIN_TERM_LENGTH
+                and not any(c in search_term for c in "%_")):
+            try:
+                return self._search_indexed(search_term)
+            except DatabaseError as e:
+                logging.error(f"Error searching books: {e}")
+                return []
         try:
-            return self.db.execute_query(query, ['%' + search_term + '%'], fetch=True)
-        except oracledb.Error as e:
+            return self.db.execute_query(SEARCH_BOOKS_QUERY, ['%' + search_term + '%'], fetch=True)
+        except DatabaseError as e:
             logging.error(f"Error searching books: {e}")
             return []
+
+    def get_books_page(self, after_id=None, before_id=None, last=False, limit=50):
+        """Fetches one page of books in book_id order (keyset pagination)."""
+        query, params, reverse = BOOKS_PAGE.build(after_id, before_id, last, limit)
+        try:
+            rows = self.db.execute_query(query, params, fetch=True)
+            return rows[::-1] if reverse else rows
+        except DatabaseError as e:
+            logging.error(f"Error fetching books page: {e}")
+            return []
+
+    def _search_indexed(self, search_term):
+        """Ranks matches with the trigram index, then fetches their current rows by ID.
+
+        Past INDEXED_FETCH_LIMIT matches, one LIKE query is cheaper than the IN
+        chunks; its rows are put in the index's ranking order.
+        """
+        if not self.search_index.is_loaded:
+            rows = self.db.execute_query(INDEX_ROWS_QUERY, fetch=True)
+            self.search_index.rebuild(rows)
+        book_ids = self.search_index.search(search_term)
+        if len(book_ids) <= self.INDEXED_FETCH_LIMIT:
+            return self.get_books_by_ids(book_ids)
+        rank = {book_id: i for i, book_id in enumerate(book_ids)}
+        rows = self.db.execute_query(SEARCH_BOOKS_QUERY, ['%' + search_term + '%'], fetch=True)
+        return sorted(rows, key=lambda row: rank.get(row[0], len(rank)))
+
+    def get_books_by_ids(self, book_ids):
+        """Fetches book rows for the given IDs, preserving their order."""
+        found = {}
+        for start in range(0, len(book_ids), self.FETCH_CHUNK):
+            query, params = BOOKS_BY_IDS.build(book_ids[start:start + self.FETCH_CHUNK])
+            for row in self.db.execute_query(query, params, fetch=True):
+                found[row[0]] = row
+        return [found[book_id] for book_id in book_ids if book_id in found]
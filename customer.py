@@ -1,56 +1,95 @@
 # File: customer.py
 # Purpose: Manages customer-related operations
+import logging
+
+from database import DatabaseError
+from paging import KeysetQuery
+from ingest import bulk_insert
+from statements import statement
+
+CUSTOMER_TEXT_BINDS = ((str, 100), (str, 100), (str, 20))  # name, email, membership_status
+
+ADD_CUSTOMER_QUERY = statement("customer.add", """
+    INSERT INTO customers (name, email, membership_status)
+    VALUES (:1, :2, :3)
+""", CUSTOMER_TEXT_BINDS)
+UPDATE_CUSTOMER_QUERY = statement("customer.update", """
+    UPDATE customers
+    SET name = :1, email = :2, membership_status = :3
+    WHERE customer_id = :4
+""", CUSTOMER_TEXT_BINDS + (int,))
+DELETE_CUSTOMER_QUERY = statement("customer.delete", "DELETE FROM customers WHERE customer_id = :1", (int,))
+GET_CUSTOMER_QUERY = statement("customer.get", """
+    SELECT customer_id, name, email, membership_status
+    FROM customers
+    WHERE customer_id = :1
+""", (int,))
+CUSTOMERS_PAGE = KeysetQuery("customer.page", "SELECT customer_id, name, email, membership_status FROM customers",
+                             "customer_id")
+
+
 class Customer:
+    # Column limits from the customers table, checked before rows reach the database
+    BULK_FIELDS = ("name", "email", "membership_status")
+    BULK_MAX_LENGTHS = {"name": 100, "email": 100, "membership_status": 20}
+
     def __init__(self, db):
         self.db = db
 
     def add_customer(self, name, email, membership_status):
-        """Adds a new customer to the database."""
-        query = """
-            INSERT INTO customers (name, email, membership_status)
-            VALUES (:1, :2, :3)
-        """
+        """Adds a new customer to the database and returns their row, or False on failure."""
         try:
-            self.db.execute_query(query, [name, email, membership_status])
-            return True
-        except oracledb.Error as e:
+            customer_id = self.db.execute_insert(ADD_CUSTOMER_QUERY, [name, email, membership_status],
+                                                 "customer_id")
+            return customer_id, name, email, membership_status
+        except DatabaseError as e:
             logging.error(f"Error adding customer: {e}")
             return False
 
-    def update_customer(self, customer_id, name, email, membership_status):
-        """Updates customer details."""
-        query = """
-            UPDATE customers
-            SET name = :1, email = :2, membership_status = :3
-            WHERE customer_id = :4
+    def add_customers_bulk(self, source, batch_size=1000, fmt=None, on_error=None):
+        """Streams customers from a CSV/JSONL path or an iterable of records in batches.
+
+        Records are dicts with name, email and membership_status keys, or sequences
+        in that order. Returns a BulkLoadResult with per-row errors.
         """
+        return bulk_insert(self.db, ADD_CUSTOMER_QUERY, self.BULK_FIELDS, source, batch_size=batch_size,
+                           max_lengths=self.BULK_MAX_LENGTHS, fmt=fmt, on_error=on_error)
+
+    def update_customer(self, customer_id, name, email, membership_status):
+        """Updates customer details and returns the updated row, or False on failure."""
         try:
-            self.db.execute_query(query, [name, email, membership_status, customer_id])
-            return True
-        except oracledb.Error as e:
+            if not self.db.execute_query(UPDATE_CUSTOMER_QUERY, [name, email, membership_status, customer_id]):
+                logging.error(f"Error updating customer: customer {customer_id} not found")
+                return False
+            return customer_id, name, email, membership_status
+        except DatabaseError as e:
             logging.error(f"Error updating customer: {e}")
             return False
 
     def delete_customer(self, customer_id):
         """Deletes a customer from the database."""
-        query = "DELETE FROM customers WHERE customer_id = :1"
         try:
-            self.db.execute_query(query, [customer_id])
+            self.db.execute_query(DELETE_CUSTOMER_QUERY, [customer_id])
             return True
-        except oracledb.Error as e:
+        except DatabaseError as e:
             logging.error(f"Error deleting customer: {e}")
             return False
 
     def get_customer(self, customer_id):
         """Fetches customer details by ID."""
-        query = """
-            SELECT customer_id, name, email, membership_status
-            FROM customers
-            WHERE customer_id = :1
-        """
         try:
-            result = self.db.execute_query(query, [customer_id], fetch=True)
+            result = self.db.execute_query(GET_CUSTOMER_QUERY, [customer_id], fetch=True)
             return result[0] if result else None
-        except oracledb.Error as e:
+        except DatabaseError as e:
             logging.error(f"Error fetching customer: {e}")
             return None
+
+    def get_customers_page(self, after_id=None, before_id=None, last=False, limit=50):
+        """Fetches one page of customers in customer_id order (keyset pagination)."""
+        query, params, reverse = CUSTOMERS_PAGE.build(after_id, before_id, last, limit)
+        try:
+            rows = self.db.execute_query(query, params, fetch=True)
+            return rows[::-1] if reverse else rows
+        except DatabaseError as e:
+            logging.error(f"Error fetching customers page: {e}")
+            return []
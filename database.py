@@ -1,142 +1,390 @@
 # File: database.py
-# Purpose: Handles Oracle Database connectivity and queries
-import oracledb
+# Purpose: Handles database connectivity and queries for the configured backend
 import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from backends import create_backend
+from pool import ConnectionPool, PoolTimeout
+from query_cache import QueryCache, read_tables, written_table
+from statements import ADHOC, Statement, StatementCounters
+from metrics import QueryMetrics
 
 # Configure logging for error tracking
 logging.basicConfig(level=logging.INFO, filename='library.log')
 
+
+class DatabaseError(Exception):
+    """Raised when the active backend reports a database error."""
+
+
+# Name under which whole transaction() units are timed
+TRANSACTION = Statement("(transaction)", "COMMIT")
+
+
+def _resolve(query):
+    """Returns (name, sql, binds) for a Statement or plain SQL text."""
+    if isinstance(query, Statement):
+        return query.name, query.sql, query.binds
+    return ADHOC, query, ()
+
+
+class Unit:
+    """Runs statements on a borrowed cursor without committing; see Database.transaction."""
+
+    def __init__(self, db, connection, cursor):
+        self.db = db
+        self.connection = connection
+        self.cursor = cursor
+        self.written = set()  # Tables to invalidate in the query cache after commit
+
+    def execute(self, query, params=None, fetch=False):
+        """Executes a statement; returns the fetched rows or the affected row count."""
+        self._note_write(query)
+        started = time.perf_counter() if self.db.metrics is not None else None
+        self.db._run(self.connection, self.cursor, query, params)
+        result = self.cursor.fetchall() if fetch else self.cursor.rowcount
+        if started is not None:
+            self.db._observe(query, params, started, rows=len(result) if fetch else max(result, 0))
+        return result
+
+    def insert(self, query, params, id_column):
+        """Executes an INSERT and returns the generated value of id_column."""
+        self._note_write(query)
+        started = time.perf_counter() if self.db.metrics is not None else None
+        sql = self.db._prepare(self.connection, self.cursor, query)
+        new_id = self.db.backend.insert_returning_id(self.cursor, sql, self.db.backend.adapt_params(params),
+                                                     id_column)
+        if started is not None:
+            self.db._observe(query, params, started, rows=1)
+        return new_id
+
+    def execute_many(self, query, rows, per_row=False):
+        """Executes a statement once per params row with one executemany call; returns the rows affected.
+
+        per_row: return a list with the count for each params row instead of the total.
+        """
+        self._note_write(query)
+        started = time.perf_counter() if self.db.metrics is not None else None
+        sql = self.db._prepare(self.connection, self.cursor, query)
+        rows = [self.db.backend.adapt_params(row) for row in rows]
+        if per_row:
+            counts = self.db.backend.execute_many_counts(self.cursor, sql, rows)
+            if started is not None:
+                self.db._observe(query, None, started, rows=sum(counts))
+            return counts
+        self.cursor.executemany(sql, rows)
+        count = max(self.cursor.rowcount, 0)
+        if started is not None:
+            self.db._observe(query, None, started, rows=count)
+        return count
+
+    def _note_write(self, query):
+        table = written_table(_resolve(query)[1])
+        if table:
+            self.written.add(table)
+
+
 class Database:
-    def __init__(self):
+    def __init__(self, backend=None, pool_min=None, pool_max=None, acquire_timeout=5.0,
+                 health_check_interval=30.0, query_cache=None, metrics=None):
+        """Opens one shared connection, or a connection pool when pool_max is given.
+
+        query_cache: a QueryCache (or True for a default one) to serve repeated reads.
+        metrics: a QueryMetrics (or True for one without a slow-query log) to time
+        every execution by statement name; off by default.
+        Queries may be SQL text or catalog Statements; Statements declare their
+        bind types and are counted by name in statement_stats().
+        """
+        self.backend = backend or create_backend()
+        self.query_cache = QueryCache() if query_cache is True else query_cache
+        self.metrics = QueryMetrics() if metrics is True else metrics
+        self.statement_counters = StatementCounters(self.backend.statement_cache_size)
         self.connection = None
         self.cursor = None
-        self.connect()
+        self.pool = None
+        self._lock = threading.RLock()  # Serializes use of the shared cursor
+        if pool_max:
+            self.pool = ConnectionPool(self.backend, min_size=pool_min if pool_min is not None else 1,
+                                       max_size=pool_max, acquire_timeout=acquire_timeout,
+                                       health_check_interval=health_check_interval)
+            logging.info(f"Database pool created ({self.backend.name}, max {pool_max}).")
+        else:
+            self.connect()
 
     def connect(self):
-        """Establishes connection to Oracle Database."""
+        """Establishes connection to the configured backend."""
         try:
-            self.connection = oracledb.connect(
-                user="your_username",
-                password="your_password",
-                dsn="your_dsn"  # e.g., localhost:1521/orcl
-            )
+            self.connection = self.backend.connect()
             self.cursor = self.connection.cursor()
-            logging.info("Database connection established.")
-        except oracledb.Error as e:
+            logging.info(f"Database connection established ({self.backend.name}).")
+        except self.backend.errors as e:
             logging.error(f"Database connection error: {e}")
+            raise DatabaseError(str(e)) from e
+
+    @contextmanager
+    def _borrow(self):
+        """Yields a (connection, cursor) pair for one unit of work.
+
+        In pooled mode each call borrows its own connection and a fresh cursor;
+        otherwise callers take turns on the shared connection. Any exception in
+        the caller, not only a database error, rolls back its uncommitted work,
+        so the next user of the connection cannot commit it by accident.
+        """
+        if self.pool is None:
+            with self._lock:
+                try:
+                    yield self.connection, self.cursor
+                except BaseException:
+                    self._rollback(self.connection)
+                    raise
+            return
+        try:
+            connection = self.pool.acquire()
+        except PoolTimeout as e:
+            logging.error(f"Connection pool error: {e}")
+            raise DatabaseError(str(e)) from e
+        cursor = connection.cursor()
+        broken = False
+        try:
+            yield connection, cursor
+        except BaseException:
+            broken = not self._rollback(connection)
             raise
+        finally:
+            try:
+                cursor.close()
+            except self.backend.errors:
+                broken = True
+            if broken:
+                self.statement_counters.forget(connection)
+            self.pool.release(connection, discard=broken)
+
+    def _rollback(self, connection):
+        """Rolls back after a failed statement; returns False if the connection is unusable."""
+        try:
+            connection.rollback()
+            return True
+        except self.backend.errors as e:
+            logging.error(f"Rollback error: {e}")
+            return False
+
+    def _prepare(self, connection, cursor, query, params=True):
+        """Counts an execution of query, declares its bind types and returns the SQL to send."""
+        name, sql, binds = _resolve(query)
+        sql = self.backend.prepare(sql)
+        self.statement_counters.record(connection, sql, name)
+        if binds and params:
+            self.backend.set_input_sizes(cursor, binds)
+        return sql
+
+    def _observe(self, query, params, started, rows=0, commits=0):
+        """Records a finished execution; only called when metrics are on."""
+        name, sql, _ = _resolve(query)
+        self.metrics.record(name, time.perf_counter() - started, rows, commits, sql, params)
+
+    def _observe_error(self, query):
+        if self.metrics is not None:
+            self.metrics.record_error(_resolve(query)[0])
+
+    def _run(self, connection, cursor, query, params):
+        """Executes query (SQL text or a Statement) on cursor."""
+        sql = self._prepare(connection, cursor, query, params)
+        if params:
+            cursor.execute(sql, self.backend.adapt_params(params))
+        else:
+            cursor.execute(sql)
 
     def execute_query(self, query, params=None, fetch=False):
-        """Executes a SQL query with optional parameters."""
+        """Executes a SQL query or catalog Statement with optional parameters.
+
+        Returns the fetched rows when fetch is True, otherwise the number of rows
+        the statement affected. With a query cache, repeated reads are served
+        from it and writes invalidate the tables they touch.
+        """
+        sql = _resolve(query)[1]
+        cache = self.query_cache
+        if cache is not None and fetch and cache.cacheable(query):
+            key = cache.key(sql, params)
+            rows = cache.get(key)
+            if rows is not None:
+                return rows
+            tables = read_tables(sql)
+            snapshot = cache.snapshot(tables)
+            rows = self._execute(query, params, fetch)
+            cache.put(key, tables, rows, snapshot)
+            return rows
+        result = self._execute(query, params, fetch)
+        if not fetch:
+            self._invalidate(written_table(sql))
+        return result
+
+    def _execute(self, query, params, fetch):
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            if fetch:
-                return self.cursor.fetchall()
-            self.connection.commit()
-        except oracledb.Error as e:
+            with self._borrow() as (connection, cursor):
+                started = time.perf_counter() if self.metrics is not None else None
+                self._run(connection, cursor, query, params)
+                if fetch:
+                    rows = cursor.fetchall()
+                    if started is not None:
+                        self._observe(query, params, started, rows=len(rows))
+                    return rows
+                connection.commit()
+                if started is not None:
+                    self._observe(query, params, started, rows=max(cursor.rowcount, 0), commits=1)
+                return cursor.rowcount
+        except self.backend.errors as e:
             logging.error(f"Query execution error: {e}")
-            raise
+            self._observe_error(query)
+            raise DatabaseError(str(e)) from e
+
+    def _invalidate(self, *tables):
+        """Drops cached reads of tables after a committed write."""
+        if self.query_cache is not None:
+            for table in tables:
+                if table:
+                    self.query_cache.invalidate(table)
+
+    def stream_query(self, query, params=None, arraysize=1000):
+        """Yields result rows one at a time, fetching them from the driver arraysize at a time.
+
+        A connection stays borrowed until the generator is exhausted or closed,
+        so memory stays flat however many rows the query returns.
+        """
+        try:
+            with self._borrow() as (connection, _):
+                cursor = connection.cursor()  # Own cursor, so other queries can run between batches
+                started = time.perf_counter() if self.metrics is not None else None
+                count = 0
+                try:
+                    cursor.arraysize = arraysize
+                    self._run(connection, cursor, query, params)
+                    while True:
+                        rows = cursor.fetchmany()
+                        if not rows:
+                            break
+                        count += len(rows)
+                        yield from rows
+                finally:
+                    cursor.close()
+                if started is not None:  # Includes the time the consumer spent between batches
+                    self._observe(query, params, started, rows=count)
+        except self.backend.errors as e:
+            logging.error(f"Query execution error: {e}")
+            self._observe_error(query)
+            raise DatabaseError(str(e)) from e
+
+    def execute_insert(self, query, params, id_column):
+        """Executes an INSERT, commits, and returns the generated value of id_column."""
+        table = written_table(_resolve(query)[1])
+        try:
+            with self._borrow() as (connection, cursor):
+                started = time.perf_counter() if self.metrics is not None else None
+                sql = self._prepare(connection, cursor, query)
+                new_id = self.backend.insert_returning_id(cursor, sql, self.backend.adapt_params(params), id_column)
+                connection.commit()
+                if started is not None:
+                    self._observe(query, params, started, rows=1, commits=1)
+                self._invalidate(table)
+                return new_id
+        except self.backend.errors as e:
+            logging.error(f"Query execution error: {e}")
+            self._observe_error(query)
+            raise DatabaseError(str(e)) from e
+
+    def execute_batch(self, query, rows):
+        """Inserts or updates many rows with one executemany call and one commit.
+
+        Returns a list of (offset, message) for rows the database rejected; the
+        remaining rows are still committed.
+        """
+        table = written_table(_resolve(query)[1])
+        rows = [self.backend.adapt_params(row) for row in rows]
+        try:
+            with self._borrow() as (connection, cursor):
+                started = time.perf_counter() if self.metrics is not None else None
+                sql = self._prepare(connection, cursor, query)
+                errors = self.backend.execute_batch(cursor, sql, rows)
+                connection.commit()
+                if started is not None:
+                    self._observe(query, None, started, rows=len(rows) - len(errors), commits=1)
+                self._invalidate(table)
+                return errors
+        except self.backend.errors as e:
+            logging.error(f"Batch execution error: {e}")
+            self._observe_error(query)
+            raise DatabaseError(str(e)) from e
+
+    @contextmanager
+    def transaction(self):
+        """Yields a Unit of work whose statements share one connection and one commit.
+
+        Everything executed through the unit is committed together when the block
+        exits normally and rolled back if any statement fails.
+        """
+        try:
+            with self._borrow() as (connection, cursor):
+                started = time.perf_counter() if self.metrics is not None else None
+                unit = Unit(self, connection, cursor)
+                yield unit
+                connection.commit()
+                if started is not None:  # The unit's statements are also timed individually
+                    self._observe(TRANSACTION, None, started, commits=1)
+                self._invalidate(*unit.written)
+        except self.backend.errors as e:
+            logging.error(f"Transaction error: {e}")
+            self._observe_error(TRANSACTION)
+            raise DatabaseError(str(e)) from e
+
+    def pool_stats(self):
+        """Returns pool wait time and utilization counters, or None when not pooled."""
+        return self.pool.stats() if self.pool else None
+
+    def cache_stats(self):
+        """Returns query cache hit/miss/eviction counters, or None when caching is off."""
+        return self.query_cache.stats() if self.query_cache else None
+
+    def statement_stats(self):
+        """Returns execution and parse counts, in total and per statement name."""
+        return self.statement_counters.stats()
+
+    def query_stats(self):
+        """Returns per-statement latency percentiles and counts, or None when metrics are off."""
+        return self.metrics.stats() if self.metrics is not None else None
+
+    def stats(self):
+        """Returns a snapshot of every diagnostic counter the database keeps."""
+        return {
+            "queries": self.query_stats(),
+            "statements": self.statement_stats(),
+            "pool": self.pool_stats(),
+            "cache": self.cache_stats(),
+        }
 
     def setup_database(self):
-        """Sets up database tables, sequences, and triggers."""
+        """Creates or upgrades the schema to the latest version; returns the migrations applied.
+
+        Safe to call on every start: a database that is already current costs
+        three catalog queries, the last confirming the declared indexes exist.
+        """
+        from migrations import migrate, verify_indexes  # migrations builds on Database
         try:
-            # Create Books Table
-            self.execute_query("""
-                CREATE TABLE books (
-                    book_id NUMBER PRIMARY KEY,
-                    title VARCHAR2(100),
-                    author VARCHAR2(50),
-                    genre VARCHAR2(50),
-                    isbn VARCHAR2(13),
-                    is_available NUMBER(1) DEFAULT 1
-                )
-            """)
-
-            # Create Customers Table
-            self.execute_query("""
-                CREATE TABLE customers (
-                    customer_id NUMBER PRIMARY KEY,
-                    name VARCHAR2(100),
-                    email VARCHAR2(100),
-                    membership_status VARCHAR2(20)
-                )
-            """)
-
-            # Create Transactions Table
-            self.execute_query("""
-                CREATE TABLE transactions (
-                    transaction_id NUMBER PRIMARY KEY,
-                    book_id NUMBER,
-                    customer_id NUMBER,
-                    checkout_date DATE,
-                    return_date DATE,
-                    due_date DATE,
-                    fine NUMBER DEFAULT 0,
-                    FOREIGN KEY (book_id) REFERENCES books(book_id),
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-                )
-            """)
-
-            # Create Sequence for Auto-incrementing IDs
-            self.execute_query("CREATE SEQUENCE book_seq START WITH 1 INCREMENT BY 1")
-            self.execute_query("CREATE SEQUENCE customer_seq START WITH 1 INCREMENT BY 1")
-            self.execute_query("CREATE SEQUENCE transaction_seq START WITH 1 INCREMENT BY 1")
-
-            # Create Trigger for Auto-incrementing Book ID
-            self.execute_query("""
-                CREATE OR REPLACE TRIGGER book_trigger
-                BEFORE INSERT ON books
-                FOR EACH ROW
-                BEGIN
-                    SELECT book_seq.NEXTVAL INTO :NEW.book_id FROM dual;
-                END;
-            """)
-
-            # Create Trigger for Auto-incrementing Customer ID
-            self.execute_query("""
-                CREATE OR REPLACE TRIGGER customer_trigger
-                BEFORE INSERT ON customers
-                FOR EACH ROW
-                BEGIN
-                    SELECT customer_seq.NEXTVAL INTO :NEW.customer_id FROM dual;
-                END;
-            """)
-
-            # Create Trigger for Auto-incrementing Transaction ID
-            self.execute_query("""
-                CREATE OR REPLACE TRIGGER transaction_trigger
-                BEFORE INSERT ON transactions
-                FOR EACH ROW
-                BEGIN
-                    SELECT transaction_seq.NEXTVAL INTO :NEW.transaction_id FROM dual;
-                END;
-            """)
-
-            # Database Trigger to Calculate Fines
-            self.execute_query("""
-                CREATE OR REPLACE TRIGGER fine_trigger
-                AFTER UPDATE OF return_date ON transactions
-                FOR EACH ROW
-                BEGIN
-                    IF :NEW.return_date > :NEW.due_date THEN
-                        UPDATE transactions
-                        SET fine = (TRUNC(:NEW.return_date) - TRUNC(:NEW.due_date)) * 1
-                        WHERE transaction_id = :NEW.transaction_id;
-                    END IF;
-                END;
-            """)
-            logging.info("Database setup completed.")
-        except oracledb.Error as e:
+            applied = migrate(self)
+            verify_indexes(self)
+            if applied:
+                logging.info(f"Database setup completed (migrations {applied}).")
+            return applied
+        except DatabaseError as e:
             logging.error(f"Database setup error: {e}")
             raise
 
     def close(self):
-        """Closes the database connection."""
+        """Closes the database connection or pool."""
+        if self.pool:
+            self.pool.close()
         if self.cursor:
             self.cursor.close()
         if self.connection:
             self.connection.close()
-        logging.info("Database connection closed.")
\ No newline at end of file
+        logging.info("Database connection closed.")
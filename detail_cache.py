@@ -0,0 +1,106 @@
+# File: detail_cache.py
+# Purpose: Bounded cache of master-detail rows (a customer's transactions), filled by batched prefetch
+import threading
+import time
+from collections import OrderedDict
+
+
+class DetailCache:
+    """LRU cache of detail rows per master key, e.g. customer_id -> transaction rows.
+
+    Detail rows carry their own key in column 0 (the transaction_id), so a change
+    to one detail row can drop the master entry that holds it. Every
+    invalidation bumps a generation; a fetch that started before it is not
+    stored, so a prefetch racing with a checkout never caches the old list.
+    Entries older than max_age seconds count as missing, so loans made at
+    other desks or through the service show up.
+    """
+
+    def __init__(self, max_entries=200, max_age=None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # master key -> rows
+        self._stored_at = {}  # master key -> time.monotonic() when stored
+        self._owners = {}  # detail key -> master key
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached rows for key, or None on a miss."""
+        with self._lock:
+            rows = self._entries.get(key) if self._fresh(key) else None
+            if rows is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rows
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._fresh(key)
+
+    def missing(self, keys):
+        """Returns the keys that are not cached (or have expired), in order and without duplicates."""
+        with self._lock:
+            return [key for key in dict.fromkeys(keys) if not self._fresh(key)]
+
+    def _fresh(self, key):
+        """True if key is cached and not older than max_age; drops it once expired."""
+        if key not in self._entries:
+            return False
+        if self.max_age is not None and time.monotonic() - self._stored_at[key] >= self.max_age:
+            self._drop(key)
+            return False
+        return True
+
+    @property
+    def generation(self):
+        """Taken before a fetch and passed to put_many."""
+        return self._generation
+
+    def put_many(self, rows_by_key, generation):
+        """Stores fetched rows unless an invalidation happened since generation."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            now = time.monotonic()
+            for key, rows in rows_by_key.items():
+                self._drop(key)
+                self._entries[key] = rows
+                self._stored_at[key] = now
+                for row in rows:
+                    self._owners[row[0]] = key
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, key=None):
+        """Drops the entry for key, or every entry when key is None."""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+                self._stored_at.clear()
+                self._owners.clear()
+            else:
+                self._drop(key)
+
+    def invalidate_detail(self, detail_key):
+        """Drops the entry holding the detail row detail_key (e.g. a returned transaction)."""
+        with self._lock:
+            self._generation += 1
+            key = self._owners.get(detail_key)
+            if key is not None:
+                self._drop(key)
+
+    def _drop(self, key):
+        rows = self._entries.pop(key, None)
+        self._stored_at.pop(key, None)
+        for row in rows or ():
+            self._owners.pop(row[0], None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,46 @@
+# File: export.py
+# Purpose: Streams report rows to CSV or JSONL files with constant memory
+import csv
+import json
+import os
+
+# Rows written between on_progress calls
+PROGRESS_EVERY = 1000
+
+
+def export_rows(rows, path, columns, fmt=None, on_progress=None, progress_every=PROGRESS_EVERY):
+    """Writes rows from any iterable to path as CSV (with a header) or JSONL objects.
+
+    The format is taken from the file extension unless fmt ("csv" or "jsonl") is
+    given. Rows go to a temporary file that replaces path only once the export
+    has finished, so a failed export never leaves a truncated report behind.
+    on_progress(rows_written) is called every progress_every rows and at the
+    end. Returns the number of rows written.
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    if fmt not in ("csv", "jsonl", "ndjson"):
+        raise ValueError(f"Unsupported export format: {fmt}")
+    partial = f"{path}.part"
+    written = 0
+    try:
+        with open(partial, "w", newline="", encoding="utf-8") as handle:
+            if fmt == "csv":
+                writer = csv.writer(handle)
+                writer.writerow(columns)
+                write = writer.writerow
+            else:
+                def write(row):
+                    handle.write(json.dumps(dict(zip(columns, row)), default=str) + "\n")
+            for row in rows:
+                write(row)
+                written += 1
+                if on_progress and written % progress_every == 0:
+                    on_progress(written)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    if on_progress:
+        on_progress(written)
+    return written
@@ -0,0 +1,53 @@
+# File: incremental_search.py
+# Purpose: Answers a search locally when the term extends the previous one (search-as-you-type)
+import time
+
+# LIKE wildcards make a term mean something other than a plain substring
+WILDCARDS = "%_"
+
+
+def contains_term(previous_term, term):
+    """Default narrows test for plain substring searches."""
+    return previous_term in term and not any(c in term for c in WILDCARDS)
+
+
+class IncrementalSearch:
+    """Keeps the last search term and its results so a longer term is filtered locally.
+
+    Every row matching a term also matches any substring of it, so when the new
+    term contains the previous one, filtering the previous results with
+    matches(row, term) gives the same rows as a new query. narrows(previous,
+    term) decides when that holds, for searches with more shapes than a
+    substring. Results older than max_age seconds are not narrowed, so other
+    desks' edits show up.
+    """
+
+    def __init__(self, matches, narrows=contains_term, max_age=None):
+        self.matches = matches
+        self.narrows = narrows
+        self.max_age = max_age
+        self.term = None
+        self.results = None
+        self._stored_at = None
+
+    def store(self, term, results):
+        """Remembers the results a query returned for term."""
+        self.term = term
+        self.results = results
+        self._stored_at = time.monotonic()
+
+    def narrow(self, term):
+        """Returns the rows matching term from the stored results, or None if a query is needed."""
+        if self.results is None or not self.narrows(self.term, term):
+            return None
+        if self.max_age is not None and time.monotonic() - self._stored_at > self.max_age:
+            return None
+        if term != self.term:
+            self.results = [row for row in self.results if self.matches(row, term)]
+            self.term = term
+        return self.results
+
+    def reset(self):
+        """Forgets the stored results, e.g. after a book was added or changed."""
+        self.term = None
+        self.results = None
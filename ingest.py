@@ -0,0 +1,113 @@
+# File: ingest.py
+# Purpose: Streams records from files or iterators into the database in batches
+import csv
+import json
+import logging
+from itertools import islice
+
+from database import DatabaseError
+
+
+class BulkLoadResult:
+    """Summary of a bulk load: row counts plus the first max_errors row errors."""
+
+    def __init__(self, max_errors=1000):
+        self.inserted = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []  # (row_number, message), capped at max_errors
+        self.max_errors = max_errors
+        self.aborted = None  # Error message if a batch failed as a whole
+
+    def add_error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((row_number, message))
+
+    def __repr__(self):
+        return (f"BulkLoadResult(inserted={self.inserted}, failed={self.failed}, "
+                f"batches={self.batches}, aborted={self.aborted!r})")
+
+
+def read_records(source, fmt=None):
+    """Yields records one at a time from a CSV/JSONL path, or from an iterable as-is.
+
+    CSV rows and JSONL objects come back as dicts. The format is taken from the
+    file extension unless fmt ("csv" or "jsonl") is given.
+    """
+    if not isinstance(source, str):
+        yield from source
+        return
+    fmt = fmt or ("csv" if source.lower().endswith(".csv") else "jsonl")
+    with open(source, newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+        elif fmt in ("jsonl", "ndjson"):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported bulk load format: {fmt}")
+
+
+def _to_row(record, fields, max_lengths):
+    """Turns a dict or sequence record into a bind row, or raises ValueError."""
+    if isinstance(record, dict):
+        row = [record.get(field) for field in fields]
+    else:
+        row = list(record)
+        if len(row) != len(fields):
+            raise ValueError(f"expected {len(fields)} values, got {len(row)}")
+    for field, value in zip(fields, row):
+        if value is None or str(value).strip() == "":
+            raise ValueError(f"missing {field}")
+        limit = max_lengths.get(field)
+        if limit and len(str(value)) > limit:
+            raise ValueError(f"{field} longer than {limit} characters")
+    return row
+
+
+def bulk_insert(db, query, fields, source, batch_size=1000, max_lengths=None, fmt=None,
+                on_error=None, max_errors=1000):
+    """Loads records into the database with one executemany and one commit per batch.
+
+    Invalid or rejected rows are counted and reported (and passed to on_error as
+    (row_number, message)) without aborting the load. A database error that fails
+    a whole batch stops the load and is recorded in result.aborted; earlier
+    batches stay committed. Only one batch is held in memory at a time,
+    whatever the size of the input.
+    """
+    max_lengths = max_lengths or {}
+    result = BulkLoadResult(max_errors)
+    records = enumerate(read_records(source, fmt), start=1)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        rows = []
+        row_numbers = []
+        for row_number, record in chunk:
+            try:
+                rows.append(_to_row(record, fields, max_lengths))
+                row_numbers.append(row_number)
+            except ValueError as e:
+                result.add_error(row_number, str(e))
+                if on_error:
+                    on_error(row_number, str(e))
+        if not rows:
+            continue
+        try:
+            errors = db.execute_batch(query, rows)
+        except DatabaseError as e:
+            result.aborted = str(e)
+            logging.error(f"Bulk load aborted at row {row_numbers[0]}: {e}")
+            break
+        result.batches += 1
+        result.inserted += len(rows) - len(errors)
+        for offset, message in errors:
+            result.add_error(row_numbers[offset], message)
+            if on_error:
+                on_error(row_numbers[offset], message)
+    if result.failed:
+        logging.warning(f"Bulk load finished with {result.failed} rejected rows: {result}")
+    return result
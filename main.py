@@ -1,39 +1,92 @@
 # File: main.py
 # Purpose: Entry point of the application and GUI launcher
+import copy
+import functools
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
 import logging
 
 # Assuming other modules (database.py, book.py, customer.py, transaction.py, report.py) are available
-from database import Database
-from book import Book
+from database import Database, DatabaseError
+from book import Book, matches_search, search_narrows
 from customer import Customer
-from transaction import Transaction
+from transaction import Transaction, ON_LOAN, NOT_FOUND
 from report import Report
+from paging import KeysetPager, ListPager
+from record_store import RecordStore
+from widgets import VirtualTreeview
+from background import BackgroundExecutor
+from overdue_index import OverdueIndex
+from search_index import TrigramIndex
+from query_cache import QueryCache
+from detail_cache import DetailCache
+from incremental_search import IncrementalSearch
+from metrics import QueryMetrics
 
 # Configure logging for error tracking
 logging.basicConfig(level=logging.INFO, filename='library.log')
 
+# Rows fetched per page in the browse views
+PAGE_SIZE = 50
+# Worker threads (and pooled connections) for database work off the Tk thread
+BACKGROUND_WORKERS = 4
+# Seconds before the overdue index is rebuilt to pick up other desks' loans
+OVERDUE_INDEX_MAX_AGE = 300
+# Seconds before the book search index is rebuilt to pick up other desks' edits
+SEARCH_INDEX_MAX_AGE = 300
+# Seconds a cached read may be served before other desks' changes show up
+QUERY_CACHE_TTL = 30
+# Milliseconds between progress updates while a report export runs
+EXPORT_PROGRESS_INTERVAL = 200
+# Milliseconds after which a query is written to the slow-query log
+SLOW_QUERY_MS = 500
+# Customers before and after the current one whose transactions are prefetched
+PREFETCH_NEIGHBOURS = 3
+# Customers whose transaction lists are kept for instant browsing
+CUSTOMER_DETAIL_CACHE_SIZE = 200
+# Milliseconds of typing pause before the book search runs
+SEARCH_DEBOUNCE_MS = 300
+# Shortest term searched while typing; shorter terms match most of the catalog
+SEARCH_MIN_CHARS = 2
+# Column-wise containers for the book and customer lists: IDs in typed arrays, repeated text shared
+BOOK_STORE = functools.partial(RecordStore, ("book_id", "title", "author", "genre", "isbn", "is_available"),
+                               typecodes={"book_id": "q", "is_available": "b"}, interned=("author", "genre"))
+CUSTOMER_STORE = functools.partial(RecordStore, ("customer_id", "name", "email", "membership_status"),
+                                   typecodes={"customer_id": "q"}, interned=("membership_status",))
+
 
 class LibraryGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Library Management System")
-        self.db = Database()
-        self.book_manager = Book(self.db)
+        self.db = Database(pool_max=BACKGROUND_WORKERS, query_cache=QueryCache(ttl=QUERY_CACHE_TTL),
+                           metrics=QueryMetrics(slow_query_ms=SLOW_QUERY_MS))
+        self.executor = BackgroundExecutor(root, max_workers=BACKGROUND_WORKERS, on_busy_change=self.show_busy)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.book_manager = Book(self.db, search_index=TrigramIndex(max_age=SEARCH_INDEX_MAX_AGE))
         self.customer_manager = Customer(self.db)
-        self.transaction_manager = Transaction(self.db)
-        self.report_manager = Report(self.db)
+        overdue_index = OverdueIndex(max_age=OVERDUE_INDEX_MAX_AGE)
+        detail_cache = DetailCache(max_entries=CUSTOMER_DETAIL_CACHE_SIZE, max_age=QUERY_CACHE_TTL)
+        self.transaction_manager = Transaction(self.db, overdue_index=overdue_index, detail_cache=detail_cache)
+        self.report_manager = Report(self.db, overdue_index=overdue_index)
         self.current_customer_index = 0
-        self.customers = []
+        self.customers = CUSTOMER_STORE()
         self.current_book_index = 0
-        self.books = []
-
-        # Setup database tables and triggers
+        self.books = BOOK_STORE()
+        self.book_search_results = IncrementalSearch(matches_search, search_narrows,
+                                                     max_age=QUERY_CACHE_TTL)
+        self.pending_book_search = None  # Tk after id of the debounced search
+        self.exporting = False
+        self.export_rows_written = 0  # Written by the export worker, read by the progress poll
+        self.book_pager = KeysetPager(self.book_manager.get_books_page, PAGE_SIZE, BOOK_STORE)
+        self.customer_pager = KeysetPager(self.customer_manager.get_customers_page, PAGE_SIZE, CUSTOMER_STORE)
+        self.transaction_pager = KeysetPager(self.transaction_manager.get_transactions_page, PAGE_SIZE)
+
+        # Create or upgrade the schema (a quick version check once it is current)
         try:
             self.db.setup_database()
-        except oracledb.Error as e:
+        except DatabaseError as e:
             messagebox.showerror("Error", f"Failed to setup database: {e}")
             self.root.quit()
 
@@ -42,6 +95,14 @@ class LibraryGUI:
 
     def create_widgets(self):
         """Creates the main GUI layout with tabs."""
+        # Status bar showing background database work (packed first so it stays at the bottom)
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
+        self.status_label = tk.Label(status_frame, text="Ready", anchor="w")
+        self.status_label.pack(side="left", fill="x", expand=True)
+        self.progress = ttk.Progressbar(status_frame, mode="indeterminate", length=120)
+        self.progress.pack(side="right")
+
         # Notebook for tabs
         notebook = ttk.Notebook(self.root)
         notebook.pack(pady=10, expand=True)
@@ -66,6 +127,48 @@ class LibraryGUI:
         notebook.add(report_frame, text="Reports")
         self.create_report_widgets(report_frame)
 
+        # Diagnostics Tab
+        diagnostics_frame = ttk.Frame(notebook)
+        notebook.add(diagnostics_frame, text="Diagnostics")
+        self.create_diagnostics_widgets(diagnostics_frame)
+
+        # Each tab loads its data the first time it is shown, so startup runs no queries
+        self.notebook = notebook
+        self.tab_loaders = {str(book_frame): self.load_books, str(customer_frame): self.load_customers,
+                            str(transaction_frame): self.load_transactions}
+        notebook.bind("<<NotebookTabChanged>>", self.load_selected_tab)
+        self.root.after_idle(self.load_selected_tab)
+
+    def load_selected_tab(self, event=None):
+        """Loads the selected tab's data if it has not been loaded yet."""
+        loader = self.tab_loaders.pop(self.notebook.select(), None)
+        if loader:
+            loader()
+
+    def run_in_background(self, fn, *args, on_success=None, key=None, description="Working"):
+        """Runs a manager call off the Tk thread and passes its result to on_success."""
+        self.executor.submit(fn, *args, on_success=on_success, on_error=self.show_background_error, key=key,
+                             description=description)
+
+    def show_background_error(self, error):
+        """Reports an unexpected failure from a background call."""
+        messagebox.showerror("Error", f"Operation failed: {error}")
+
+    def show_busy(self, descriptions):
+        """Updates the status bar while background work is running."""
+        if descriptions:
+            self.status_label.config(text=f"{descriptions[-1]}...")
+            self.progress.start(10)
+        else:
+            self.status_label.config(text="Ready")
+            self.progress.stop()
+
+    def close(self):
+        """Stops background work and closes the database before exiting."""
+        self.executor.shutdown()
+        self.db.close()
+        self.root.destroy()
+
     def create_book_widgets(self, frame):
         """Creates widgets for book management."""
         # Input fields for book details
@@ -93,6 +196,7 @@ class LibraryGUI:
         tk.Label(frame, text="Search").grid(row=5, column=0, padx=5, pady=5, sticky="e")
         self.book_search = tk.Entry(frame)
         self.book_search.grid(row=5, column=1, padx=5, pady=5)
+        self.book_search.bind("<KeyRelease>", self.schedule_book_search)
         tk.Button(frame, text="Search", command=self.search_books).grid(row=5, column=2, padx=5, pady=5)
 
         # CRUD buttons
@@ -107,8 +211,7 @@ class LibraryGUI:
         tk.Button(frame, text="Last", command=self.last_book).grid(row=7, column=3, padx=5, pady=5)
 
         # Treeview for displaying books
-        self.book_tree = ttk.Treeview(frame, columns=("ID", "Title", "Author", "Genre", "ISBN", "Available"),
-                                      show="headings")
+        self.book_tree = VirtualTreeview(frame, columns=("ID", "Title", "Author", "Genre", "ISBN", "Available"))
         self.book_tree.heading("ID", text="Book ID")
         self.book_tree.heading("Title", text="Title")
         self.book_tree.heading("Author", text="Author")
@@ -116,10 +219,13 @@ class LibraryGUI:
         self.book_tree.heading("ISBN", text="ISBN")
         self.book_tree.heading("Available", text="Available")
         self.book_tree.grid(row=8, column=0, columnspan=4, padx=5, pady=5)
-        self.book_tree.bind("<<TreeviewSelect>>", self.load_selected_book)
+        self.book_tree.bind_select(self.load_selected_book)
 
-        # Load initial book data
-        self.load_books()
+        # Page controls
+        self.book_page_label = tk.Label(frame, text="")
+        self.book_page_label.grid(row=9, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        tk.Button(frame, text="Previous Page", command=self.prev_book_page).grid(row=9, column=2, padx=5, pady=5)
+        tk.Button(frame, text="Next Page", command=self.next_book_page).grid(row=9, column=3, padx=5, pady=5)
 
     def create_customer_widgets(self, frame):
         """Creates widgets for customer management with master-detail form."""
@@ -148,17 +254,17 @@ class LibraryGUI:
         tk.Button(frame, text="Last", command=self.last_customer).grid(row=4, column=3, padx=5, pady=5)
 
         # Treeview for displaying customers
-        self.customer_tree = ttk.Treeview(frame, columns=("ID", "Name", "Email", "Membership"), show="headings")
+        self.customer_tree = VirtualTreeview(frame, columns=("ID", "Name", "Email", "Membership"))
         self.customer_tree.heading("ID", text="Customer ID")
         self.customer_tree.heading("Name", text="Name")
         self.customer_tree.heading("Email", text="Email")
         self.customer_tree.heading("Membership", text="Membership")
         self.customer_tree.grid(row=5, column=0, columnspan=4, padx=5, pady=5)
-        self.customer_tree.bind("<<TreeviewSelect>>", self.load_selected_customer)
+        self.customer_tree.bind_select(self.load_selected_customer)
 
         # Treeview for displaying customer transactions (master-detail)
-        self.customer_transactions_tree = ttk.Treeview(frame, columns=("ID", "Book Title", "Checkout", "Due", "Return",
-                                                                       "Fine"), show="headings")
+        self.customer_transactions_tree = VirtualTreeview(frame, columns=("ID", "Book Title", "Checkout", "Due",
+                                                                          "Return", "Fine"))
         self.customer_transactions_tree.heading("ID", text="Transaction ID")
         self.customer_transactions_tree.heading("Book Title", text="Book Title")
         self.customer_transactions_tree.heading("Checkout", text="Checkout Date")
@@ -167,8 +273,11 @@ class LibraryGUI:
         self.customer_transactions_tree.heading("Fine", text="Fine")
         self.customer_transactions_tree.grid(row=6, column=0, columnspan=4, padx=5, pady=5)
 
-        # Load initial customer data
-        self.load_customers()
+        # Page controls
+        self.customer_page_label = tk.Label(frame, text="")
+        self.customer_page_label.grid(row=7, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        tk.Button(frame, text="Previous Page", command=self.prev_customer_page).grid(row=7, column=2, padx=5, pady=5)
+        tk.Button(frame, text="Next Page", command=self.next_customer_page).grid(row=7, column=3, padx=5, pady=5)
 
     def create_transaction_widgets(self, frame):
         """Creates widgets for transaction management."""
@@ -188,11 +297,12 @@ class LibraryGUI:
         # Transaction buttons
         tk.Button(frame, text="Checkout Book", command=self.checkout_book).grid(row=3, column=0, padx=5, pady=5)
         tk.Button(frame, text="Return Book", command=self.return_book).grid(row=3, column=1, padx=5, pady=5)
+        tk.Button(frame, text="Batch Return", command=self.open_batch_return).grid(row=3, column=2, padx=5, pady=5)
 
         # Treeview for displaying transactions
-        self.transaction_tree = ttk.Treeview(frame,
-                                             columns=("ID", "Book Title", "Customer", "Checkout", "Due", "Return",
-                                                      "Fine"), show="headings")
+        self.transaction_tree = VirtualTreeview(frame,
+                                                columns=("ID", "Book Title", "Customer", "Checkout", "Due", "Return",
+                                                         "Fine"))
         self.transaction_tree.heading("ID", text="Transaction ID")
         self.transaction_tree.heading("Book Title", text="Book Title")
         self.transaction_tree.heading("Customer", text="Customer Name")
@@ -202,14 +312,22 @@ class LibraryGUI:
         self.transaction_tree.heading("Fine", text="Fine")
         self.transaction_tree.grid(row=4, column=0, columnspan=4, padx=5, pady=5)
 
-        # Load initial transaction data
-        self.load_transactions()
+        # Page controls
+        self.transaction_page_label = tk.Label(frame, text="")
+        self.transaction_page_label.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        tk.Button(frame, text="Previous Page", command=self.prev_transaction_page).grid(row=5, column=2, padx=5,
+                                                                                       pady=5)
+        tk.Button(frame, text="Next Page", command=self.next_transaction_page).grid(row=5, column=3, padx=5,
+                                                                                   pady=5)
 
     def create_report_widgets(self, frame):
         """Creates widgets for report generation."""
         # Static report button
         tk.Button(frame, text="Generate Overdue Report", command=self.show_overdue_report).grid(row=0, column=0, padx=5,
                                                                                                 pady=5)
+        tk.Button(frame, text="Update Overdue Fines", command=self.accrue_fines).grid(row=0, column=1, padx=5, pady=5)
+        tk.Button(frame, text="Export Overdue Report", command=self.export_overdue_report).grid(row=0, column=2, padx=5,
+                                                                                                pady=5)
 
         # Dynamic report input
         tk.Label(frame, text="Start Date (YYYY-MM-DD)").grid(row=1, column=0, padx=5, pady=5, sticky="e")
@@ -225,35 +343,146 @@ class LibraryGUI:
                                                                                                           columnspan=2,
                                                                                                           padx=5,
                                                                                                           pady=5)
+        tk.Button(frame, text="Export Transaction History", command=self.export_transaction_history).grid(row=3,
+                                                                                                          column=2,
+                                                                                                          padx=5,
+                                                                                                          pady=5)
+
+        # Loans falling due soon
+        tk.Label(frame, text="Due Within (days)").grid(row=4, column=0, padx=5, pady=5, sticky="e")
+        self.report_due_days = tk.Entry(frame)
+        self.report_due_days.insert(0, "7")
+        self.report_due_days.grid(row=4, column=1, padx=5, pady=5)
+        tk.Button(frame, text="Generate Due Soon Report", command=self.show_due_soon_report).grid(row=5, column=0,
+                                                                                                   columnspan=2,
+                                                                                                   padx=5, pady=5)
 
         # Treeview for displaying reports
-        self.report_tree = ttk.Treeview(frame, columns=("ID", "Book Title", "Customer", "Details"), show="headings")
+        self.report_tree = VirtualTreeview(frame, columns=("ID", "Book Title", "Customer", "Details"))
         self.report_tree.heading("ID", text="ID")
         self.report_tree.heading("Book Title", text="Book Title")
         self.report_tree.heading("Customer", text="Customer")
         self.report_tree.heading("Details", text="Details")
-        self.report_tree.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+        self.report_tree.grid(row=6, column=0, columnspan=2, padx=5, pady=5)
+        self.report_summary = tk.Label(frame, text="")
+        self.report_summary.grid(row=7, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+
+    def create_diagnostics_widgets(self, frame):
+        """Creates widgets for the query latency and pool/cache statistics."""
+        tk.Button(frame, text="Refresh", command=self.show_diagnostics).grid(row=0, column=0, padx=5, pady=5,
+                                                                            sticky="w")
+        columns = ("Statement", "Count", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Rows", "Commits", "Slow")
+        self.diagnostics_tree = VirtualTreeview(frame, columns=columns)
+        for column in columns:
+            self.diagnostics_tree.heading(column, text=column)
+            self.diagnostics_tree.tree.column(column, width=260 if column == "Statement" else 70)
+        self.diagnostics_tree.grid(row=1, column=0, padx=5, pady=5)
+        self.diagnostics_summary = tk.Label(frame, text="", justify="left")
+        self.diagnostics_summary.grid(row=2, column=0, padx=5, pady=5, sticky="w")
+
+    @staticmethod
+    def page_text(pager, noun):
+        """Describes the page a pager is showing, e.g. "Books: IDs 1-50"."""
+        if not pager.rows:
+            return f"No {noun.lower()}"
+        return f"{noun}: IDs {pager.rows[0][0]}-{pager.rows[-1][0]}"
 
     # Book Management Methods
     def load_books(self):
-        """Loads all books into the treeview."""
-        self.books = self.book_manager.search_books("")
-        self.book_tree.delete(*self.book_tree.get_children())
-        for book in self.books:
-            self.book_tree.insert("", "end", values=book)
-        if self.books:
-            self.current_book_index = 0
+        """Loads the first page of books into the treeview."""
+        pager = KeysetPager(self.book_manager.get_books_page, PAGE_SIZE, BOOK_STORE)
+        self.run_in_background(self.pager_step(pager, 0, "first"), on_success=self.show_book_pager,
+                               key="books", description="Loading books")
+
+    def show_book_pager(self, pager):
+        """Makes pager the active book pager and shows its page."""
+        self.book_pager = pager
+        self.show_book_page()
+
+    def show_book_page(self):
+        """Shows the book pager's current page and record."""
+        self.books = self.book_pager.rows
+        self.book_tree.set_rows(self.books)
+        self.book_page_label.config(text=self.page_text(self.book_pager, "Books"))
+        self.current_book_index = self.book_pager.index
+        self.display_book()
+
+    @staticmethod
+    def pager_step(pager, index, step):
+        """Returns a background task running one navigation step on a copy of pager."""
+        pager = copy.copy(pager)
+        pager.index = index
+
+        def run():
+            getattr(pager, step)()
+            return pager
+        return run
+
+    def move_book(self, step):
+        """Runs a pager navigation step, redrawing the tree only if the page changed."""
+        self.run_in_background(self.pager_step(self.book_pager, self.current_book_index, step),
+                               on_success=self.show_moved_book, key="books", description="Loading books")
+
+    def show_moved_book(self, pager):
+        """Shows the result of a book navigation step."""
+        page_changed = pager.rows is not self.book_pager.rows
+        self.book_pager = pager
+        if page_changed:
+            self.show_book_page()
+        else:
+            self.current_book_index = pager.index
             self.display_book()
 
     def search_books(self):
         """Searches books based on user input."""
+        self.cancel_book_search()
         search_term = self.book_search.get()
-        self.books = self.book_manager.search_books(search_term)
-        self.book_tree.delete(*self.book_tree.get_children())
-        for book in self.books:
-            self.book_tree.insert("", "end", values=book)
-        self.current_book_index = 0
-        self.display_book()
+        self.run_in_background(self.book_manager.search_books, search_term,
+                               on_success=lambda results: self.book_search_done(search_term, results),
+                               key="books", description="Searching books")
+
+    def schedule_book_search(self, event):
+        """Restarts the debounce timer on every key press in the search entry."""
+        self.cancel_book_search()
+        self.pending_book_search = self.root.after(SEARCH_DEBOUNCE_MS, self.live_search_books)
+
+    def cancel_book_search(self):
+        if self.pending_book_search is not None:
+            self.root.after_cancel(self.pending_book_search)
+            self.pending_book_search = None
+
+    def live_search_books(self):
+        """Runs the search once typing pauses, narrowing the last results locally when possible."""
+        self.pending_book_search = None
+        search_term = self.book_search.get()
+        if search_term == self.book_search_results.term:
+            return
+        if not search_term:
+            self.book_search_results.reset()
+            self.load_books()
+            return
+        if len(search_term) < SEARCH_MIN_CHARS:
+            return
+        results = self.book_search_results.narrow(search_term)
+        if results is None:
+            self.run_in_background(self.book_manager.search_books, search_term,
+                                   on_success=lambda rows: self.book_search_done(search_term, rows),
+                                   key="books", description="Searching books")
+            return
+        self.executor.cancel("books")  # A query for a shorter term must not replace these rows
+        self.show_book_results(results)
+
+    def book_search_done(self, search_term, results):
+        """Shows a finished search and keeps its results for narrowing."""
+        self.book_search_results.store(search_term, results)
+        self.show_book_results(results)
+
+    def show_book_results(self, results):
+        """Shows search results in the book treeview."""
+        # The virtual tree draws only visible rows, so all matches go on one page
+        pager = ListPager(results, max(len(results), 1), BOOK_STORE)
+        pager.first()
+        self.show_book_pager(pager)
 
     def add_book(self):
         """Adds a new book."""
@@ -264,9 +493,15 @@ class LibraryGUI:
         if not all([title, author, genre, isbn]):
             messagebox.showerror("Error", "All fields are required!")
             return
-        if self.book_manager.add_book(title, author, genre, isbn):
+        self.run_in_background(self.book_manager.add_book, title, author, genre, isbn,
+                               on_success=self.book_added, description="Adding book")
+
+    def book_added(self, result):
+        """Adds the new book to the list after add_book finishes."""
+        if result:
             messagebox.showinfo("Success", "Book added successfully!")
-            self.load_books()
+            if self.book_pager.append(result):  # Only when the final page is showing
+                self.refresh_books()
             self.clear_book_fields()
         else:
             messagebox.showerror("Error", "Failed to add book.")
@@ -285,9 +520,15 @@ class LibraryGUI:
         if not all([title, author, genre, isbn]):
             messagebox.showerror("Error", "All fields are required!")
             return
-        if self.book_manager.update_book(book_id, title, author, genre, isbn, is_available):
+        self.run_in_background(self.book_manager.update_book, book_id, title, author, genre, isbn, is_available,
+                               on_success=self.book_updated, description="Updating book")
+
+    def book_updated(self, result):
+        """Patches the updated row into the list after update_book finishes."""
+        if result:
             messagebox.showinfo("Success", "Book updated successfully!")
-            self.load_books()
+            self.book_pager.replace(result)
+            self.refresh_books()
         else:
             messagebox.showerror("Error", "Failed to update book.")
 
@@ -297,24 +538,42 @@ class LibraryGUI:
             messagebox.showerror("Error", "No book selected!")
             return
         book_id = self.books[self.current_book_index][0]
-        if self.book_manager.delete_book(book_id):
+        self.run_in_background(self.book_manager.delete_book, book_id,
+                               on_success=lambda result: self.book_deleted(book_id, result),
+                               description="Deleting book")
+
+    def book_deleted(self, book_id, result):
+        """Drops the deleted row from the list after delete_book finishes."""
+        if result:
             messagebox.showinfo("Success", "Book deleted successfully!")
-            self.load_books()
+            self.book_pager.remove(book_id)
+            self.refresh_books()
         else:
             messagebox.showerror("Error", "Failed to delete book.")
 
+    def refresh_books(self):
+        """Redraws the book page after its rows were patched in place."""
+        self.book_search_results.reset()  # A changed book may now match a different term
+        self.books = self.book_pager.rows
+        self.current_book_index = min(self.current_book_index, max(len(self.books) - 1, 0))
+        self.book_tree.refresh()
+        self.book_page_label.config(text=self.page_text(self.book_pager, "Books"))
+        self.display_book()
+
+    def set_book_available(self, book_id, is_available):
+        """Updates a loaded book's availability after a checkout or return."""
+        if self.books.update(book_id, is_available=is_available):
+            self.refresh_books()
+
     def load_selected_book(self, event):
         """Loads the selected book into input fields."""
-        selected = self.book_tree.selection()
-        if not selected:
+        book_id = self.book_tree.selected_key()
+        if book_id is None:
             return
-        item = self.book_tree.item(selected[0])
-        book_id = item["values"][0]
-        for i, book in enumerate(self.books):
-            if book[0] == book_id:
-                self.current_book_index = i
-                self.display_book()
-                break
+        index = self.books.position_of(book_id)
+        if index is not None:
+            self.current_book_index = index
+            self.display_book()
 
     def display_book(self):
         """Displays the current book in input fields."""
@@ -340,37 +599,59 @@ class LibraryGUI:
 
     def first_book(self):
         """Navigates to the first book."""
-        self.current_book_index = 0
-        self.display_book()
+        self.move_book("first")
 
     def prev_book(self):
         """Navigates to the previous book."""
-        if self.current_book_index > 0:
-            self.current_book_index -= 1
-            self.display_book()
+        self.move_book("prev")
 
     def next_book(self):
         """Navigates to the next book."""
-        if self.current_book_index < len(self.books) - 1:
-            self.current_book_index += 1
-            self.display_book()
+        self.move_book("next")
 
     def last_book(self):
         """Navigates to the last book."""
-        self.current_book_index = len(self.books) - 1
-        self.display_book()
+        self.move_book("last")
+
+    def prev_book_page(self):
+        """Shows the previous page of books."""
+        self.move_book("prev_page")
+
+    def next_book_page(self):
+        """Shows the next page of books."""
+        self.move_book("next_page")
 
     # Customer Management Methods
     def load_customers(self):
-        """Loads all customers into the treeview."""
-        self.customers = self.db.execute_query("SELECT customer_id, name, email, membership_status FROM customers",
-                                               fetch=True)
-        self.customer_tree.delete(*self.customer_tree.get_children())
-        for customer in self.customers:
-            self.customer_tree.insert("", "end", values=customer)
-        if self.customers:
-            self.current_customer_index = 0
+        """Loads the first page of customers into the treeview."""
+        self.move_customer("first")
+
+    def show_customer_page(self):
+        """Shows the customer pager's current page and record."""
+        self.customers = self.customer_pager.rows
+        self.customer_tree.set_rows(self.customers)
+        self.customer_page_label.config(text=self.page_text(self.customer_pager, "Customers"))
+        self.current_customer_index = self.customer_pager.index
+        self.display_customer()
+
+    def move_customer(self, step):
+        """Runs a pager navigation step and loads the new customer's transactions."""
+        self.run_in_background(self.pager_step(self.customer_pager, self.current_customer_index, step),
+                               on_success=self.show_moved_customer, key="customers",
+                               description="Loading customers")
+
+    def show_moved_customer(self, pager):
+        """Shows the result of a customer navigation step."""
+        page_changed = pager.rows is not self.customer_pager.rows
+        self.customer_pager = pager
+        if page_changed:
+            self.show_customer_page()
+        else:
+            self.current_customer_index = pager.index
             self.display_customer()
+        customer = pager.current()
+        if customer:
+            self.load_customer_transactions(customer[0])
 
     def add_customer(self):
         """Adds a new customer."""
@@ -380,9 +661,15 @@ class LibraryGUI:
         if not all([name, email, membership]):
             messagebox.showerror("Error", "All fields are required!")
             return
-        if self.customer_manager.add_customer(name, email, membership):
+        self.run_in_background(self.customer_manager.add_customer, name, email, membership,
+                               on_success=self.customer_added, description="Adding customer")
+
+    def customer_added(self, result):
+        """Adds the new customer to the list after add_customer finishes."""
+        if result:
             messagebox.showinfo("Success", "Customer added successfully!")
-            self.load_customers()
+            if self.customer_pager.append(result):  # Only when the final page is showing
+                self.refresh_customers()
             self.clear_customer_fields()
         else:
             messagebox.showerror("Error", "Failed to add customer.")
@@ -399,9 +686,15 @@ class LibraryGUI:
         if not all([name, email, membership]):
             messagebox.showerror("Error", "All fields are required!")
             return
-        if self.customer_manager.update_customer(customer_id, name, email, membership):
+        self.run_in_background(self.customer_manager.update_customer, customer_id, name, email, membership,
+                               on_success=self.customer_updated, description="Updating customer")
+
+    def customer_updated(self, result):
+        """Patches the updated row into the list after update_customer finishes."""
+        if result:
             messagebox.showinfo("Success", "Customer updated successfully!")
-            self.load_customers()
+            self.customer_pager.replace(result)
+            self.refresh_customers()
         else:
             messagebox.showerror("Error", "Failed to update customer.")
 
@@ -411,25 +704,39 @@ class LibraryGUI:
             messagebox.showerror("Error", "No customer selected!")
             return
         customer_id = self.customers[self.current_customer_index][0]
-        if self.customer_manager.delete_customer(customer_id):
+        self.run_in_background(self.customer_manager.delete_customer, customer_id,
+                               on_success=lambda result: self.customer_deleted(customer_id, result),
+                               description="Deleting customer")
+
+    def customer_deleted(self, customer_id, result):
+        """Drops the deleted row from the list after delete_customer finishes."""
+        if result:
             messagebox.showinfo("Success", "Customer deleted successfully!")
-            self.load_customers()
+            self.customer_pager.remove(customer_id)
+            self.transaction_manager.detail_cache.invalidate(customer_id)
+            self.refresh_customers()
+            self.customer_transactions_tree.set_rows([])
         else:
             messagebox.showerror("Error", "Failed to delete customer.")
 
+    def refresh_customers(self):
+        """Redraws the customer page after its rows were patched in place."""
+        self.customers = self.customer_pager.rows
+        self.current_customer_index = min(self.current_customer_index, max(len(self.customers) - 1, 0))
+        self.customer_tree.refresh()
+        self.customer_page_label.config(text=self.page_text(self.customer_pager, "Customers"))
+        self.display_customer()
+
     def load_selected_customer(self, event):
         """Loads the selected customer into input fields and their transactions."""
-        selected = self.customer_tree.selection()
-        if not selected:
+        customer_id = self.customer_tree.selected_key()
+        if customer_id is None:
             return
-        item = self.customer_tree.item(selected[0])
-        customer_id = item["values"][0]
-        for i, customer in enumerate(self.customers):
-            if customer[0] == customer_id:
-                self.current_customer_index = i
-                self.display_customer()
-                self.load_customer_transactions(customer_id)
-                break
+        index = self.customers.position_of(customer_id)
+        if index is not None:
+            self.current_customer_index = index
+            self.display_customer()
+            self.load_customer_transactions(customer_id)
 
     def display_customer(self):
         """Displays the current customer in input fields."""
@@ -450,49 +757,85 @@ class LibraryGUI:
 
     def first_customer(self):
         """Navigates to the first customer."""
-        self.current_customer_index = 0
-        self.display_customer()
-        self.load_customer_transactions(self.customers[self.current_customer_index][0])
+        self.move_customer("first")
 
     def prev_customer(self):
         """Navigates to the previous customer."""
-        if self.current_customer_index > 0:
-            self.current_customer_index -= 1
-            self.display_customer()
-            self.load_customer_transactions(self.customers[self.current_customer_index][0])
+        self.move_customer("prev")
 
     def next_customer(self):
         """Navigates to the next customer."""
-        if self.current_customer_index < len(self.customers) - 1:
-            self.current_customer_index += 1
-            self.display_customer()
-            self.load_customer_transactions(self.customers[self.current_customer_index][0])
+        self.move_customer("next")
 
     def last_customer(self):
         """Navigates to the last customer."""
-        self.current_customer_index = len(self.customers) - 1
-        self.display_customer()
-        self.load_customer_transactions(self.customers[self.current_customer_index][0])
+        self.move_customer("last")
+
+    def prev_customer_page(self):
+        """Shows the previous page of customers."""
+        self.move_customer("prev_page")
+
+    def next_customer_page(self):
+        """Shows the next page of customers."""
+        self.move_customer("next_page")
 
     def load_customer_transactions(self, customer_id):
-        """Loads transactions for the selected customer."""
-        transactions = self.transaction_manager.get_transactions_by_customer(customer_id)
-        self.customer_transactions_tree.delete(*self.customer_transactions_tree.get_children())
-        for transaction in transactions:
-            self.customer_transactions_tree.insert("", "end", values=transaction)
+        """Loads transactions for the selected customer, and prefetches its neighbours' in the same query.
+
+        Once prefetched, moving to a neighbour shows its transactions at once and
+        only prefetches the next uncached neighbours in the background.
+        """
+        neighbours = self.neighbour_customer_ids()
+        rows = self.transaction_manager.detail_cache.get(customer_id)
+        if rows is None:
+            self.run_in_background(self.transaction_manager.get_transactions_by_customer, customer_id, neighbours,
+                                   on_success=self.customer_transactions_tree.set_rows, key="customer_transactions",
+                                   description="Loading customer transactions")
+            return
+        self.executor.cancel("customer_transactions")  # A slower load for an earlier customer must not win
+        self.customer_transactions_tree.set_rows(rows)
+        if self.transaction_manager.detail_cache.missing(neighbours):
+            self.run_in_background(self.transaction_manager.prefetch_transactions_by_customers, neighbours,
+                                   key="customer_prefetch", description="Prefetching customer transactions")
+
+    def neighbour_customer_ids(self):
+        """Returns the IDs of the customers around the current one on the page, nearest first."""
+        ids = []
+        for distance in range(1, PREFETCH_NEIGHBOURS + 1):
+            for index in (self.current_customer_index + distance, self.current_customer_index - distance):
+                if 0 <= index < len(self.customers):
+                    ids.append(self.customers[index][0])
+        return ids
 
     # Transaction Management Methods
     def load_transactions(self):
-        """Loads all transactions into the treeview."""
-        transactions = self.db.execute_query("""
-            SELECT t.transaction_id, b.title, c.name, t.checkout_date, t.due_date, t.return_date, t.fine
-            FROM transactions t
-            JOIN books b ON t.book_id = b.book_id
-            JOIN customers c ON t.customer_id = c.customer_id
-        """, fetch=True)
-        self.transaction_tree.delete(*self.transaction_tree.get_children())
-        for transaction in transactions:
-            self.transaction_tree.insert("", "end", values=transaction)
+        """Loads the most recent page of transactions into the treeview."""
+        self.move_transactions("last")
+
+    def move_transactions(self, step):
+        """Runs a transaction pager step in the background."""
+        self.run_in_background(self.pager_step(self.transaction_pager, self.transaction_pager.index, step),
+                               on_success=self.show_transaction_page, key="transactions",
+                               description="Loading transactions")
+
+    def show_transaction_page(self, pager):
+        """Shows a transaction pager's current page."""
+        self.transaction_pager = pager
+        self.transaction_tree.set_rows(pager.rows)
+        self.transaction_page_label.config(text=self.page_text(pager, "Transactions"))
+
+    def refresh_transactions(self):
+        """Redraws the transaction page after its rows were patched in place."""
+        self.transaction_tree.refresh()
+        self.transaction_page_label.config(text=self.page_text(self.transaction_pager, "Transactions"))
+
+    def prev_transaction_page(self):
+        """Shows the previous page of transactions."""
+        self.move_transactions("prev_page")
+
+    def next_transaction_page(self):
+        """Shows the next page of transactions."""
+        self.move_transactions("next_page")
 
     def checkout_book(self):
         """Checks out a book to a customer."""
@@ -504,15 +847,29 @@ class LibraryGUI:
         try:
             book_id = int(book_id)
             customer_id = int(customer_id)
-            if self.transaction_manager.checkout_book(book_id, customer_id):
-                messagebox.showinfo("Success", "Book checked out successfully!")
-                self.load_transactions()
-                self.transaction_book_id.delete(0, tk.END)
-                self.transaction_customer_id.delete(0, tk.END)
-            else:
-                messagebox.showerror("Error", "Failed to check out book.")
         except ValueError:
             messagebox.showerror("Error", "Invalid Book ID or Customer ID!")
+            return
+        self.run_in_background(self.transaction_manager.checkout_book, book_id, customer_id,
+                               on_success=lambda result: self.book_checked_out(book_id, result),
+                               description="Checking out book")
+
+    def book_checked_out(self, book_id, result):
+        """Adds the new transaction and marks the book on loan after checkout_book finishes."""
+        if result:
+            messagebox.showinfo("Success", "Book checked out successfully!")
+            if result.transaction and self.transaction_pager.append(result.transaction):
+                self.refresh_transactions()  # Only when the latest page is showing
+            self.set_book_available(book_id, 0)
+            self.transaction_book_id.delete(0, tk.END)
+            self.transaction_customer_id.delete(0, tk.END)
+        elif result.status == ON_LOAN:
+            messagebox.showerror("Error", f"Book {book_id} is already on loan.")
+            self.set_book_available(book_id, 0)
+        elif result.status == NOT_FOUND:
+            messagebox.showerror("Error", f"No book with ID {book_id}.")
+        else:
+            messagebox.showerror("Error", "Failed to check out book.")
 
     def return_book(self):
         """Returns a book to the library."""
@@ -524,26 +881,117 @@ class LibraryGUI:
         try:
             book_id = int(book_id)
             transaction_id = int(transaction_id)
-            if self.transaction_manager.return_book(book_id, transaction_id):
-                messagebox.showinfo("Success", "Book returned successfully!")
-                self.load_transactions()
-                self.transaction_book_id.delete(0, tk.END)
-                self.transaction_id.delete(0, tk.END)
-            else:
-                messagebox.showerror("Error", "Failed to return book.")
         except ValueError:
             messagebox.showerror("Error", "Invalid Book ID or Transaction ID!")
+            return
+        self.run_in_background(self.transaction_manager.return_book, book_id, transaction_id,
+                               on_success=lambda result: self.book_returned(book_id, result),
+                               description="Returning book")
+
+    def book_returned(self, book_id, result):
+        """Patches the returned transaction and marks the book available after return_book finishes."""
+        if result:
+            messagebox.showinfo("Success", "Book returned successfully!")
+            self.transaction_pager.replace(result)
+            self.refresh_transactions()
+            self.set_book_available(book_id, 1)
+            self.transaction_book_id.delete(0, tk.END)
+            self.transaction_id.delete(0, tk.END)
+        else:
+            messagebox.showerror("Error", "Failed to return book.")
+
+    def open_batch_return(self):
+        """Opens the batch return window, where book-drop scans are pasted or scanned one per line."""
+        window = tk.Toplevel(self.root)
+        window.title("Batch Return")
+        tk.Label(window, text="Scanned Book IDs (one per line)").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        self.batch_return_ids = tk.Text(window, width=30, height=12)
+        self.batch_return_ids.grid(row=1, column=0, padx=5, pady=5, sticky="ns")
+        self.batch_return_ids.focus_set()
+        self.batch_return_tree = VirtualTreeview(window, columns=("Book", "Status", "Transaction", "Fine"),
+                                                 key=id)  # Rows are ReturnResults; a book may be scanned twice
+        self.batch_return_tree.heading("Book", text="Book ID")
+        self.batch_return_tree.heading("Status", text="Result")
+        self.batch_return_tree.heading("Transaction", text="Transaction ID")
+        self.batch_return_tree.heading("Fine", text="Fine")
+        self.batch_return_tree.grid(row=1, column=1, padx=5, pady=5)
+        self.batch_return_summary = tk.Label(window, text="")
+        self.batch_return_summary.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+        tk.Button(window, text="Process Returns", command=self.return_books_batch).grid(row=2, column=0, padx=5,
+                                                                                       pady=5)
+
+    def return_books_batch(self):
+        """Returns every scanned book in one background call and one commit."""
+        tokens = self.batch_return_ids.get("1.0", tk.END).replace(",", " ").split()
+        invalid = [token for token in tokens if not token.isdecimal()]
+        if invalid:
+            messagebox.showerror("Error", f"Invalid Book IDs: {', '.join(invalid[:10])}")
+            return
+        if not tokens:
+            messagebox.showerror("Error", "Scan at least one Book ID!")
+            return
+        self.run_in_background(self.transaction_manager.return_many, [int(token) for token in tokens],
+                               on_success=self.books_returned, key="batch_return", description="Returning books")
+
+    def books_returned(self, results):
+        """Patches the returned loans and books and lists each scan's outcome after return_many finishes."""
+        returned = [result for result in results if result]
+        for result in returned:
+            if result.transaction:
+                self.transaction_pager.replace(result.transaction)
+            self.books.update(result.book_id, is_available=1)
+        if returned:
+            self.refresh_transactions()
+            self.refresh_books()
+        if not self.batch_return_tree.winfo_exists():
+            return  # The batch window was closed while the returns ran
+        self.batch_return_tree.set_rows(results, format_row=lambda result: (
+            result.book_id, result.status.replace("_", " "),
+            result.transaction[0] if result.transaction else "",
+            result.transaction[6] if result.transaction else ""))
+        self.batch_return_summary.config(text=f"{len(returned)} of {len(results)} scans returned")
+        if returned:
+            self.batch_return_ids.delete("1.0", tk.END)
 
     # Report Generation Methods
     def show_overdue_report(self):
         """Displays the overdue books report."""
-        report = self.report_manager.generate_overdue_report()
-        self.report_tree.delete(*self.report_tree.get_children())
-        for row in report:
-            self.report_tree.insert("", "end", values=(row[0], row[1], row[2], f"Due: {row[3]}, Fine: {row[4]}"))
+        self.run_in_background(self.report_manager.generate_overdue_report, on_success=self.show_overdue_rows,
+                               key="report", description="Generating overdue report")
 
-    def show_transaction_history(self):
-        """Displays the transaction history report for a date range."""
+    def show_overdue_rows(self, report):
+        """Shows overdue report rows in the report treeview."""
+        self.report_tree.set_rows(report, format_row=lambda row: (row[0], row[1], row[2],
+                                                                   f"Due: {row[3]}, Fine: {row[4]}"))
+        self.report_summary.config(text=f"{len(report)} overdue loans")
+
+    def show_due_soon_report(self):
+        """Displays open loans falling due within the entered number of days."""
+        try:
+            days = int(self.report_due_days.get())
+        except ValueError:
+            messagebox.showerror("Error", "Days must be a whole number!")
+            return
+        self.run_in_background(self.report_manager.generate_due_soon_report, days,
+                               on_success=lambda report: self.show_due_soon_rows(days, report), key="report",
+                               description="Generating due soon report")
+
+    def show_due_soon_rows(self, days, report):
+        """Shows due soon report rows in the report treeview."""
+        self.report_tree.set_rows(report, format_row=lambda row: (row[0], row[1], row[2], f"Due: {row[3]}"))
+        self.report_summary.config(text=f"{len(report)} loans due within {days} days")
+
+    def accrue_fines(self):
+        """Recomputes running fines for all open overdue loans."""
+        self.run_in_background(self.transaction_manager.accrue_fines, on_success=self.fines_accrued,
+                               key="fines", description="Updating overdue fines")
+
+    def fines_accrued(self, changed):
+        """Reports how many loans the fine accrual job updated."""
+        messagebox.showinfo("Success", f"Updated fines on {changed} overdue loans.")
+
+    def report_dates(self):
+        """Returns the entered (start_date, end_date), or None after reporting a bad format."""
         start_date = self.report_start_date.get()
         end_date = self.report_end_date.get()
         try:
@@ -551,11 +999,98 @@ class LibraryGUI:
             datetime.strptime(end_date, "%Y-%m-%d")
         except ValueError:
             messagebox.showerror("Error", "Invalid date format! Use YYYY-MM-DD.")
+            return None
+        return start_date, end_date
+
+    def show_transaction_history(self):
+        """Displays the transaction history report for a date range."""
+        dates = self.report_dates()
+        if dates is None:
+            return
+        start_date, end_date = dates
+        self.run_in_background(self.report_manager.generate_transaction_history, start_date, end_date,
+                               on_success=self.show_history_rows, key="report",
+                               description="Generating transaction history")
+
+    def show_history_rows(self, report):
+        """Shows transaction history rows in the report treeview."""
+        self.report_tree.set_rows(report, format_row=lambda row: (row[0], row[1], row[2],
+                                                                   f"Checkout: {row[3]}, Return: {row[4]}"))
+        self.report_summary.config(text=f"{len(report)} transactions")
+
+    @staticmethod
+    def ask_export_path(name):
+        """Asks where to save an export; returns the path or an empty string."""
+        return filedialog.asksaveasfilename(defaultextension=".csv", initialfile=f"{name}.csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+
+    def export_overdue_report(self):
+        """Streams the overdue report to a file chosen by the user."""
+        path = self.ask_export_path("overdue_report")
+        if path:
+            self.start_export(lambda on_progress: self.report_manager.export_overdue_report(
+                path, on_progress=on_progress), path)
+
+    def export_transaction_history(self):
+        """Streams the transaction history for the entered dates to a file chosen by the user."""
+        dates = self.report_dates()
+        if dates is None:
             return
-        report = self.report_manager.generate_transaction_history(start_date, end_date)
-        self.report_tree.delete(*self.report_tree.get_children())
-        for row in report:
-            self.report_tree.insert("", "end", values=(row[0], row[1], row[2], f"Checkout: {row[3]}, Return: {row[4]}"))
+        path = self.ask_export_path(f"transactions_{dates[0]}_{dates[1]}")
+        if path:
+            self.start_export(lambda on_progress: self.report_manager.export_transaction_history(
+                *dates, path, on_progress=on_progress), path)
+
+    def start_export(self, export, path):
+        """Runs export(on_progress) in the background and shows its row count as it goes."""
+        self.export_rows_written = 0
+
+        def on_progress(written):
+            self.export_rows_written = written
+        self.exporting = True
+        self.run_in_background(export, on_progress, on_success=lambda written: self.export_finished(path, written),
+                               key="export", description="Exporting report")
+        self.show_export_progress()
+
+    def show_export_progress(self):
+        """Updates the report summary with the rows exported so far while an export runs."""
+        if not self.exporting:
+            return
+        self.report_summary.config(text=f"Exporting... {self.export_rows_written} rows written")
+        self.root.after(EXPORT_PROGRESS_INTERVAL, self.show_export_progress)
+
+    def export_finished(self, path, written):
+        """Reports the outcome of a report export."""
+        self.exporting = False
+        if written is None:
+            self.report_summary.config(text="Export failed")
+            messagebox.showerror("Error", "Failed to export report.")
+        else:
+            self.report_summary.config(text=f"Exported {written} rows to {path}")
+
+    def show_diagnostics(self):
+        """Displays per-statement latency percentiles with the pool and cache counters."""
+        self.run_in_background(self.db.stats, on_success=self.show_diagnostic_stats, key="diagnostics",
+                               description="Collecting statistics")
+
+    def show_diagnostic_stats(self, stats):
+        """Shows a Database.stats() snapshot in the diagnostics tab."""
+        queries = stats["queries"] or {}
+        self.diagnostics_tree.set_rows(list(queries.items()), format_row=lambda item: (
+            item[0], item[1]["count"], f"{item[1]['p50_ms']:.1f}", f"{item[1]['p95_ms']:.1f}",
+            f"{item[1]['p99_ms']:.1f}", f"{item[1]['max_ms']:.1f}", item[1]["rows"], item[1]["commits"],
+            item[1]["slow"]))
+        lines = [f"Statements: {stats['statements']['executions']} executions, "
+                 f"parse ratio {stats['statements']['parse_ratio']:.1%}"]
+        pool = stats["pool"]
+        if pool:
+            lines.append(f"Pool: {pool['in_use']}/{pool['max_size']} in use, avg wait {pool['avg_wait_ms']:.1f} ms, "
+                         f"{pool['timeouts']} timeouts")
+        cache = stats["cache"]
+        if cache:
+            lines.append(f"Cache: {cache['entries']} entries, hit rate {cache['hit_rate']:.1%}, "
+                         f"{cache['invalidations']} invalidations")
+        self.diagnostics_summary.config(text="\n".join(lines))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+# File: metrics.py
+# Purpose: Per-statement latency histograms, row/commit counts and the slow-query log
+import bisect
+import logging
+import threading
+
+# Histogram bucket upper bounds in milliseconds: 0.05 ms to about 2 minutes, 20% apart
+BUCKET_BOUNDS = []
+_bound = 0.05
+while _bound < 120000:
+    BUCKET_BOUNDS.append(_bound)
+    _bound *= 1.2
+del _bound
+
+
+class LatencyHistogram:
+    """Fixed log-scale buckets; percentiles are accurate to the 20% bucket width."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, elapsed_ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, fraction):
+        """Returns the latency below which fraction of the samples fall."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class StatementMetrics:
+    """Counters for one statement name."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.rows = 0
+        self.commits = 0
+        self.errors = 0
+        self.slow = 0
+
+
+class QueryMetrics:
+    """Collects timings per statement name for Database(metrics=...).
+
+    Executions slower than slow_query_ms (None disables the log) are written to
+    library.log with their SQL and binds.
+    """
+
+    def __init__(self, slow_query_ms=None):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._statements = {}
+
+    def _metrics(self, name):
+        metrics = self._statements.get(name)
+        if metrics is None:
+            metrics = self._statements[name] = StatementMetrics()
+        return metrics
+
+    def record(self, name, elapsed, rows=0, commits=0, sql=None, params=None):
+        """Records one execution that took elapsed seconds."""
+        elapsed_ms = elapsed * 1000
+        slow = self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+        with self._lock:
+            metrics = self._metrics(name)
+            metrics.latency.add(elapsed_ms)
+            metrics.rows += rows
+            metrics.commits += commits
+            metrics.slow += slow
+        if slow:
+            logging.warning(f"Slow query {name} took {elapsed_ms:.1f} ms: {' '.join(str(sql).split())} "
+                            f"binds={list(params) if params else []!r}")
+
+    def record_error(self, name):
+        """Counts a failed execution."""
+        with self._lock:
+            self._metrics(name).errors += 1
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+
+    def stats(self):
+        """Returns {name: counters and p50/p95/p99/max latency in ms}, slowest p95 first."""
+        with self._lock:
+            snapshot = {}
+            for name, metrics in self._statements.items():
+                latency = metrics.latency
+                snapshot[name] = {
+                    "count": latency.count,
+                    "errors": metrics.errors,
+                    "slow": metrics.slow,
+                    "rows": metrics.rows,
+                    "commits": metrics.commits,
+                    "total_ms": latency.total_ms,
+                    "mean_ms": latency.total_ms / latency.count if latency.count else 0.0,
+                    "p50_ms": latency.percentile(0.50),
+                    "p95_ms": latency.percentile(0.95),
+                    "p99_ms": latency.percentile(0.99),
+                    "max_ms": latency.max_ms,
+                }
+        return dict(sorted(snapshot.items(), key=lambda item: item[1]["p95_ms"], reverse=True))
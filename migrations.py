@@ -0,0 +1,127 @@
+# File: migrations.py
+# Purpose: Versioned schema bootstrap: a schema_version table and ordered forward migrations
+import logging
+import re
+
+from backends import BOOK_SEARCH_INDEXES
+from database import DatabaseError
+from statements import statement
+
+CURRENT_VERSION_QUERY = statement("schema.current_version", "SELECT MAX(version) FROM schema_version")
+RECORD_VERSION_QUERY = statement("schema.record_version", """
+    INSERT INTO schema_version (version, description, applied_at)
+    VALUES (:1, :2, SYSDATE)
+""", (int, (str, 200)))
+
+_CREATED_OBJECT = re.compile(r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(TABLE|SEQUENCE|TRIGGER|INDEX)\s+(\w+)",
+                             re.IGNORECASE)
+
+
+def _exists(unit, kind, name):
+    return unit.execute(unit.db.backend.object_exists[kind], [name], fetch=True)[0][0] > 0
+
+
+def create_missing(unit, statements):
+    """Runs the CREATE statements whose object does not exist yet.
+
+    Databases set up before versioning have some or all of the base objects;
+    creating only the missing ones adopts them without touching their data.
+    """
+    for sql in statements:
+        match = _CREATED_OBJECT.match(sql)
+        if match and _exists(unit, match.group(1).lower(), match.group(2)):
+            continue
+        unit.execute(sql)
+
+
+def drop_if_exists(unit, kind, name):
+    if kind in unit.db.backend.object_exists and _exists(unit, kind, name):
+        unit.execute(f"DROP {kind.upper()} {name}")
+
+
+class Migration:
+    """One forward step of the schema; apply(unit) runs its DDL inside a Database unit."""
+
+    def __init__(self, version, description, apply):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+    def __repr__(self):
+        return f"Migration({self.version}, {self.description!r})"
+
+
+# In version order; append new steps, never edit applied ones
+MIGRATIONS = [
+    Migration(1, "Base tables, sequences and ID triggers",
+              lambda unit: create_missing(unit, unit.db.backend.schema)),
+    # Fines are set by FineEngine on return; the old trigger would overwrite membership rates
+    Migration(2, "Drop fine_trigger", lambda unit: drop_if_exists(unit, "trigger", "fine_trigger")),
+    Migration(3, "Secondary indexes for loans by customer, book, checkout and due date, and book titles",
+              lambda unit: create_missing(unit, unit.db.backend.base_indexes)),
+    Migration(4, "Indexes for ISBN lookups and author prefix search",
+              lambda unit: create_missing(unit, BOOK_SEARCH_INDEXES)),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(db):
+    """Returns the applied schema version, or 0 for an empty or pre-versioning database."""
+    with db.transaction() as unit:
+        if not _exists(unit, "table", "schema_version"):
+            return 0
+        return unit.execute(CURRENT_VERSION_QUERY, fetch=True)[0][0] or 0
+
+
+def index_name(sql):
+    """Returns the lower-cased index a CREATE INDEX statement creates."""
+    return _CREATED_OBJECT.match(sql).group(2).lower()
+
+
+def verify_indexes(db):
+    """Recreates any declared index that is missing (e.g. dropped by hand); returns their names.
+
+    One catalog query when every index is present.
+    """
+    with db.transaction() as unit:
+        present = {row[0] for row in unit.execute(db.backend.index_names, fetch=True)}
+        missing = [sql for sql in db.backend.indexes if index_name(sql) not in present]
+        for sql in missing:
+            logging.warning(f"Recreating missing index {index_name(sql)}")
+            unit.execute(sql)
+    return [index_name(sql) for sql in missing]
+
+
+def migrate(db, migrations=MIGRATIONS):
+    """Brings the schema up to the latest version; returns the versions applied.
+
+    An up-to-date database costs two small catalog queries. Each migration is
+    recorded in the same unit as its DDL, but neither backend makes that
+    atomic: Oracle commits DDL as it runs, and Python's sqlite3 runs DDL
+    outside a transaction. A step can therefore be applied without being
+    recorded, so every migration must be re-runnable (create_missing, drop_if_exists).
+    If another desk migrates at the same time, a failed step is accepted once
+    the version table shows it applied.
+    """
+    version = current_version(db)
+    if version >= migrations[-1].version:
+        return []
+    if version == 0:
+        with db.transaction() as unit:
+            if not _exists(unit, "table", "schema_version"):
+                unit.execute(db.backend.version_table)
+    applied = []
+    for migration in migrations:
+        if migration.version <= version:
+            continue
+        try:
+            with db.transaction() as unit:
+                migration.apply(unit)
+                unit.execute(RECORD_VERSION_QUERY, [migration.version, migration.description])
+        except DatabaseError:
+            if current_version(db) < migration.version:
+                raise
+            continue  # Applied concurrently by another process
+        logging.info(f"Applied schema migration {migration.version}: {migration.description}")
+        applied.append(migration.version)
+    return applied
@@ -0,0 +1,102 @@
+# File: overdue_index.py
+# Purpose: In-process due-date index of open loans behind the overdue reports
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+
+from backends import SQLITE_DATE_FORMAT
+
+
+def _as_datetime(value):
+    """Due dates come back as datetimes from Oracle and ISO text from SQLite."""
+    if isinstance(value, str):
+        return datetime.strptime(value, SQLITE_DATE_FORMAT)
+    return value
+
+
+def _now():
+    """Current time at the one-second precision the due dates are stored with."""
+    return datetime.now().replace(microsecond=0)
+
+
+class OverdueIndex:
+    """Keeps every open loan ordered by due date, updated on checkout and return.
+
+    Rows have the overdue report's shape: (transaction_id, title, customer name,
+    due_date, fine). Overdue loans are a prefix of the due-date order, so the
+    reports cost time proportional to their answer rather than the loan history.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age  # Seconds before a rebuild picks up other desks' loans
+        self._lock = threading.RLock()
+        self._rows = {}  # transaction_id -> row
+        self._order = []  # Sorted (due_date, transaction_id)
+        self._built_at = None
+
+    @property
+    def is_loaded(self):
+        """True when the index is built and not older than max_age."""
+        if self._built_at is None:
+            return False
+        return self.max_age is None or time.monotonic() - self._built_at < self.max_age
+
+    def __len__(self):
+        return len(self._rows)
+
+    def rebuild(self, rows):
+        """Replaces the contents with the open loans in rows."""
+        with self._lock:
+            self._rows = {row[0]: row for row in rows}
+            self._order = sorted((_as_datetime(row[3]), row[0]) for row in self._rows.values())
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        """Marks the index stale so the next report rebuilds it."""
+        with self._lock:
+            self._built_at = None
+
+    def add(self, row):
+        """Records a new open loan."""
+        with self._lock:
+            self._discard(row[0])
+            self._rows[row[0]] = row
+            bisect.insort(self._order, (_as_datetime(row[3]), row[0]))
+
+    def remove(self, transaction_id):
+        """Drops a loan once it is returned."""
+        with self._lock:
+            self._discard(transaction_id)
+
+    def _discard(self, transaction_id):
+        row = self._rows.pop(transaction_id, None)
+        if row is None:
+            return
+        key = (_as_datetime(row[3]), transaction_id)
+        position = bisect.bisect_left(self._order, key)
+        if position < len(self._order) and self._order[position] == key:
+            del self._order[position]
+
+    def _due_before(self, moment):
+        """Returns the number of open loans due strictly before moment."""
+        return bisect.bisect_left(self._order, (moment,))
+
+    def overdue(self, now=None):
+        """Returns open loans past their due date, most overdue first."""
+        now = now or _now()
+        with self._lock:
+            return [self._rows[tid] for _, tid in self._order[:self._due_before(now)]]
+
+    def overdue_count(self, now=None):
+        """Returns how many open loans are past their due date."""
+        with self._lock:
+            return self._due_before(now or _now())
+
+    def due_within(self, days, now=None):
+        """Returns open loans not yet overdue but due in the next days days, soonest first."""
+        now = now or _now()
+        with self._lock:
+            start = self._due_before(now)
+            end = self._due_before(now + timedelta(days=days))
+            return [self._rows[tid] for _, tid in self._order[start:end]]
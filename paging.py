@@ -0,0 +1,238 @@
+# File: paging.py
+# Purpose: Page-at-a-time record navigation for the GUI's browse views
+from statements import statement
+
+
+def keyset_page_query(select, key, after_id=None, before_id=None, last=False, limit=50):
+    """Builds the SQL for one keyset page of select, ordered by key.
+
+    Returns (query, params, reverse); when reverse is True the rows come back in
+    descending key order and must be reversed by the caller. select must not
+    have its own WHERE clause.
+    """
+    if after_id is not None:
+        return f"{select} WHERE {key} > :1 ORDER BY {key} FETCH FIRST :2 ROWS ONLY", [after_id, limit], False
+    if before_id is not None:
+        return f"{select} WHERE {key} < :1 ORDER BY {key} DESC FETCH FIRST :2 ROWS ONLY", [before_id, limit], True
+    if last:
+        return f"{select} ORDER BY {key} DESC FETCH FIRST :1 ROWS ONLY", [limit], True
+    return f"{select} ORDER BY {key} FETCH FIRST :1 ROWS ONLY", [limit], False
+
+
+class KeysetQuery:
+    """The four keyset page shapes of one select, registered as catalog statements.
+
+    build() takes the same arguments as keyset_page_query and returns
+    (statement, params, reverse), so every page of a table reuses one of four
+    prepared statements.
+    """
+
+    def __init__(self, name, select, key, key_type=int):
+        self.select = select
+        self.key = key
+        self._statements = {
+            "first": statement(f"{name}.first", keyset_page_query(select, key)[0], (int,)),
+            "after": statement(f"{name}.after", keyset_page_query(select, key, after_id=0)[0], (key_type, int)),
+            "before": statement(f"{name}.before", keyset_page_query(select, key, before_id=0)[0], (key_type, int)),
+            "last": statement(f"{name}.last", keyset_page_query(select, key, last=True)[0], (int,)),
+        }
+
+    def build(self, after_id=None, before_id=None, last=False, limit=50):
+        _, params, reverse = keyset_page_query(self.select, self.key, after_id, before_id, last, limit)
+        if after_id is not None:
+            shape = "after"
+        elif before_id is not None:
+            shape = "before"
+        else:
+            shape = "last" if last else "first"
+        return self._statements[shape], params, reverse
+
+
+def _position_of(rows, key):
+    if hasattr(rows, "position_of"):
+        return rows.position_of(key)
+    for i, row in enumerate(rows):
+        if row[0] == key:
+            return i
+    return None
+
+
+class KeysetPager:
+    """Navigates a table page by page, fetching each page by primary key on demand.
+
+    fetch_page(after_id=None, before_id=None, last=False, limit=n) must return up
+    to n rows in ascending key order (key in column 0): the first page when no
+    argument is given, the rows after/before a key, or the final page.
+    store(rows) builds the page container: a list by default, or e.g. a
+    RecordStore, whose position_of() turns lookups by key into dict hits.
+    """
+
+    def __init__(self, fetch_page, page_size=50, store=list):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.store = store
+        self.rows = store(())  # Current page
+        self.index = 0  # Current record within the page
+        self.at_start = True
+        self.at_end = True
+
+    def current(self):
+        """Returns the current record, or None when the table is empty."""
+        return self.rows[self.index] if self.rows else None
+
+    def _load(self, rows, index, at_start, at_end):
+        self.rows = self.store(rows)
+        self.index = max(0, min(index, len(self.rows) - 1))
+        self.at_start = at_start
+        self.at_end = at_end
+        return self.current()
+
+    def first(self):
+        """Moves to the first record of the first page."""
+        rows = self.fetch_page(limit=self.page_size)
+        return self._load(rows, 0, True, len(rows) < self.page_size)
+
+    def last(self):
+        """Moves to the last record of the final page without scanning earlier pages."""
+        rows = self.fetch_page(last=True, limit=self.page_size)
+        return self._load(rows, len(rows) - 1, len(rows) < self.page_size, True)
+
+    def next_page(self):
+        """Loads the page after the current one; stays put on the last page."""
+        if not self.rows:
+            return self.first()
+        rows = self.fetch_page(after_id=self.rows[-1][0], limit=self.page_size)
+        if not rows:
+            self.at_end = True
+            return self.current()
+        return self._load(rows, 0, False, len(rows) < self.page_size)
+
+    def prev_page(self, index_from_end=False):
+        """Loads the page before the current one; stays put on the first page."""
+        if not self.rows:
+            return self.first()
+        rows = self.fetch_page(before_id=self.rows[0][0], limit=self.page_size)
+        if not rows:
+            self.at_start = True
+            return self.current()
+        index = len(rows) - 1 if index_from_end else 0
+        return self._load(rows, index, len(rows) < self.page_size, False)
+
+    def next(self):
+        """Moves to the next record, fetching the next page at a page boundary."""
+        if self.index < len(self.rows) - 1:
+            self.index += 1
+        elif not self.at_end:
+            self.next_page()
+        return self.current()
+
+    def prev(self):
+        """Moves to the previous record, fetching the previous page at a page boundary."""
+        if self.index > 0:
+            self.index -= 1
+        elif not self.at_start:
+            self.prev_page(index_from_end=True)
+        return self.current()
+
+    def position_of(self, key):
+        """Returns the position of the row with key on the current page, or None."""
+        return _position_of(self.rows, key)
+
+    def replace(self, row):
+        """Swaps in an updated row if a row with its key is on the current page."""
+        i = self.position_of(row[0])
+        if i is None:
+            return False
+        self.rows[i] = row
+        return True
+
+    def remove(self, key):
+        """Drops the row with key from the current page."""
+        i = self.position_of(key)
+        if i is None:
+            return False
+        del self.rows[i]
+        if i < self.index or self.index >= len(self.rows):
+            self.index = max(0, self.index - 1)
+        return True
+
+    def append(self, row):
+        """Adds a newly created row (the highest key) when the final page is showing."""
+        if not self.at_end:
+            return False
+        self.rows.append(row)
+        return True
+
+    def reload(self):
+        """Re-fetches the current page from its first key, keeping the position."""
+        if not self.rows:
+            return self.first()
+        index = self.index
+        if self.at_start:
+            rows = self.fetch_page(limit=self.page_size)
+        else:
+            rows = self.fetch_page(after_id=self.rows[0][0] - 1, limit=self.page_size)
+        if not rows:
+            return self.last()
+        return self._load(rows, index, self.at_start, len(rows) < self.page_size)
+
+
+class ListPager(KeysetPager):
+    """Same navigation interface over an already-fetched list, e.g. search results."""
+
+    def __init__(self, records, page_size=50, store=list):
+        super().__init__(None, page_size, store)
+        self.records = store(records)
+        self.offset = 0  # Position of the current page in records
+
+    def _slice(self, offset, index):
+        self.offset = max(0, offset)
+        at_end = self.offset + self.page_size >= len(self.records)
+        if self.offset == 0 and at_end:
+            # One page holds every record: share the container instead of copying it
+            self.rows = self.records
+            self.index = max(0, min(index, len(self.rows) - 1))
+            self.at_start = self.at_end = True
+            return self.current()
+        rows = self.records[self.offset:self.offset + self.page_size]
+        return self._load(rows, index, self.offset == 0, at_end)
+
+    def first(self):
+        return self._slice(0, 0)
+
+    def last(self):
+        offset = max(0, len(self.records) - self.page_size)
+        return self._slice(offset, len(self.records) - offset - 1)
+
+    def next_page(self):
+        if self.at_end:
+            return self.current()
+        return self._slice(self.offset + self.page_size, 0)
+
+    def prev_page(self, index_from_end=False):
+        if self.at_start:
+            return self.current()
+        offset = max(0, self.offset - self.page_size)
+        return self._slice(offset, self.page_size - 1 if index_from_end else 0)
+
+    def replace(self, row):
+        if self.rows is not self.records:
+            i = _position_of(self.records, row[0])
+            if i is not None:
+                self.records[i] = row
+        return super().replace(row)
+
+    def remove(self, key):
+        if self.rows is not self.records:
+            i = _position_of(self.records, key)
+            if i is not None:
+                del self.records[i]
+        return super().remove(key)
+
+    def append(self, row):
+        if self.rows is not self.records:
+            self.records.append(row)
+        return super().append(row)
+
+    def reload(self):
+        return self._slice(self.offset, self.index)
@@ -0,0 +1,152 @@
+# File: pool.py
+# Purpose: Thread-safe connection pool shared by Database in pooled mode
+import logging
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the acquire timeout."""
+
+
+class ConnectionPool:
+    """Keeps between min_size and max_size open backend connections."""
+
+    def __init__(self, backend, min_size=1, max_size=4, acquire_timeout=5.0, health_check_interval=30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.backend = backend
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = deque()  # (connection, time it was released)
+        self._condition = threading.Condition()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._created_at = time.monotonic()
+        self._busy_since = {}  # id(connection) -> time it was handed out
+        # Counters for sizing the pool
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._busy_seconds = 0.0
+        self._peak_in_use = 0
+        self._health_failures = 0
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+            self._size += 1
+
+    def _open(self):
+        return self.backend.connect()
+
+    def _is_healthy(self, connection, released_at):
+        """Pings connections that sat idle longer than the health check interval."""
+        if time.monotonic() - released_at < self.health_check_interval:
+            return True
+        try:
+            self.backend.ping(connection)
+            return True
+        except self.backend.errors as e:
+            logging.warning(f"Discarding unhealthy pooled connection: {e}")
+            self._discard(connection)
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except self.backend.errors:
+            pass
+
+    def acquire(self):
+        """Borrows a connection, waiting up to acquire_timeout for one to free up."""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        while True:
+            with self._condition:
+                connection = None
+                released_at = None
+                while connection is None:
+                    if self._closed:
+                        raise PoolTimeout("Connection pool is closed")
+                    if self._idle:
+                        connection, released_at = self._idle.pop()
+                    elif self._size < self.max_size:
+                        self._size += 1  # Reserve the slot, open outside the lock
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise PoolTimeout(f"No connection available within {self.acquire_timeout}s "
+                                              f"(pool max {self.max_size})")
+                        self._condition.wait(remaining)
+            if connection is None:
+                try:
+                    connection = self._open()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif not self._is_healthy(connection, released_at):
+                with self._condition:
+                    self._size -= 1
+                    self._health_failures += 1
+                continue
+            break
+        waited = time.monotonic() - start
+        with self._condition:
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._acquisitions += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._busy_since[id(connection)] = time.monotonic()
+        return connection
+
+    def release(self, connection, discard=False):
+        """Returns a borrowed connection; broken connections are closed instead."""
+        with self._condition:
+            self._in_use -= 1
+            self._busy_seconds += time.monotonic() - self._busy_since.pop(id(connection), time.monotonic())
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+        if discard or self._closed:
+            self._discard(connection)
+
+    def stats(self):
+        """Returns a snapshot of pool wait time and utilization counters."""
+        with self._condition:
+            elapsed = max(time.monotonic() - self._created_at, 1e-9)
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "max_size": self.max_size,
+                "acquisitions": self._acquisitions,
+                "timeouts": self._timeouts,
+                "health_failures": self._health_failures,
+                "avg_wait_ms": 1000 * self._total_wait / self._acquisitions if self._acquisitions else 0.0,
+                "max_wait_ms": 1000 * self._max_wait,
+                "utilization": self._in_use / self.max_size,
+                "avg_utilization": self._busy_seconds / (elapsed * self.max_size),
+            }
+
+    def close(self):
+        """Closes idle connections; borrowed ones are closed when released."""
+        with self._condition:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection in idle:
+            self._discard(connection)
@@ -0,0 +1,143 @@
+# File: query_cache.py
+# Purpose: Opt-in cache of read query results, invalidated by the tables writes touch
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w$]*)", re.IGNORECASE)
+_WRITE_TABLE = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|MERGE\s+INTO)\s+([A-Za-z_][\w$]*)",
+                          re.IGNORECASE)
+_SCHEMA_CHANGE = re.compile(r"^\s*(?:CREATE|DROP|ALTER|TRUNCATE)\b", re.IGNORECASE)
+# Results of these change with the clock, so they are never cached
+_VOLATILE = re.compile(r"\b(?:SYSDATE|SYSTIMESTAMP|CURRENT_DATE|CURRENT_TIMESTAMP)\b", re.IGNORECASE)
+
+
+def read_tables(query):
+    """Returns the lower-cased tables a SELECT reads."""
+    return frozenset(name.lower() for name in _READ_TABLES.findall(query))
+
+
+def written_table(query):
+    """Returns the table an INSERT/UPDATE/DELETE writes, "*" for schema changes, or None for reads."""
+    match = _WRITE_TABLE.match(query)
+    if match:
+        return match.group(1).lower()
+    return "*" if _SCHEMA_CHANGE.match(query) else None
+
+
+def _size_of(rows):
+    """Approximate memory held by a result: the row tuples plus their values."""
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+                                     for row in rows)
+
+
+class QueryCache:
+    """LRU cache of fetched rows keyed on SQL text plus binds.
+
+    Entries expire after ttl seconds (bounding staleness from other desks'
+    writes) and the least recently used ones are evicted beyond max_entries or
+    max_bytes. A write invalidates every entry that read the written table; each
+    table carries a version so a read that raced with a write is not stored.
+    """
+
+    def __init__(self, max_entries=1000, ttl=30.0, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tables, rows, size)
+        self._versions = {}  # table -> write count
+        self._epoch = 0  # Bumped by schema changes, which touch every table
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def cacheable(query):
+        """True for reads (SQL text or a Statement) whose result depends only on the data and the binds."""
+        if getattr(query, "volatile", False):
+            return False
+        sql = str(query)
+        return written_table(sql) is None and not _VOLATILE.search(sql)
+
+    @staticmethod
+    def key(query, params):
+        return query, tuple(params) if params else ()
+
+    def get(self, key):
+        """Returns a copy of the cached rows for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[2])
+
+    def snapshot(self, tables):
+        """Returns the versions of tables, taken before running the query that reads them."""
+        with self._lock:
+            return self._versions_of(tables)
+
+    def _versions_of(self, tables):
+        return (self._epoch,) + tuple(self._versions.get(table, 0) for table in sorted(tables))
+
+    def put(self, key, tables, rows, snapshot):
+        """Stores rows unless a write to one of tables happened since snapshot."""
+        rows = tuple(rows)
+        size = _size_of(rows)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if snapshot != self._versions_of(tables):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tables, rows, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, table):
+        """Drops every entry that read table ("*" clears the cache)."""
+        with self._lock:
+            if table == "*":
+                self._epoch += 1
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return
+            self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if table in entry[1]]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[3]
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
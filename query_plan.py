@@ -0,0 +1,123 @@
+# File: query_plan.py
+# Purpose: Explains every catalog statement and flags full table scans on large tables
+import argparse
+import re
+import sys
+
+import book  # noqa: F401  Importing the managers registers their statements
+import customer  # noqa: F401
+import fines  # noqa: F401
+import report  # noqa: F401
+import transaction  # noqa: F401
+from database import Database, DatabaseError
+from fines import FineEngine
+from query_cache import read_tables, written_table
+from statements import CATALOG
+
+# Tables with at least this many rows count as large
+DEFAULT_MIN_ROWS = 1000
+# Statements whose full scans are intended, with the reason
+EXPECTED_FULL_SCANS = {
+    "book.index_rows": "rebuilds the trigram search index from every book",
+    "book.search": "substring LIKE cannot use a B-tree index; the GUI and service serve it from a TrigramIndex",
+}
+# Keyset pages without a starting key read the table in key order and stop after one page
+_BOUNDED_PAGE = re.compile(r"\.(first|last)$")
+_TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_NOT_ALIAS = {"where", "join", "on", "set", "order", "group", "left", "right", "inner", "outer", "cross", "using",
+              "limit", "fetch", "union"}
+_BIND = re.compile(r":(\d+)")
+
+
+def table_aliases(sql):
+    """Maps each table and alias in sql to its lower-cased table name."""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(sql):
+        table = table.lower()
+        aliases[table] = table
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def bind_count(sql):
+    return max((int(number) for number in _BIND.findall(sql)), default=0)
+
+
+def table_sizes(db, tables):
+    sizes = {}
+    for table in sorted(tables):
+        try:
+            sizes[table] = db.execute_query(f"SELECT COUNT(*) FROM {table}", fetch=True)[0][0]
+        except DatabaseError:
+            sizes[table] = None
+    return sizes
+
+
+def check_plans(db, statements=None, min_rows=DEFAULT_MIN_ROWS):
+    """Explains each statement; returns one dict per statement with its full scans.
+
+    A statement is flagged when it fully scans a table of at least min_rows rows
+    and the scan is not listed in EXPECTED_FULL_SCANS or bounded by a page limit.
+    """
+    if statements is None:
+        FineEngine(db).statements()  # Built per backend and rate count, so registered on first use
+        statements = CATALOG
+    statements = list(statements)
+    tables = set()
+    for stmt in statements:
+        tables |= read_tables(stmt.sql)
+        written = written_table(stmt.sql)
+        if written and written != "*":
+            tables.add(written)
+    sizes = table_sizes(db, tables)
+    results = []
+    with db.transaction() as unit:
+        for stmt in statements:
+            sql = db.backend.prepare(stmt.sql)
+            aliases = table_aliases(stmt.sql)
+            try:
+                scans = sorted({aliases.get(name, name)
+                                for name in db.backend.full_scans(unit.cursor, sql, bind_count(stmt.sql))})
+            except db.backend.errors as e:
+                results.append({"statement": stmt.name, "error": str(e), "full_scans": [], "flagged": False})
+                continue
+            large = [table for table in scans if (sizes.get(table) or 0) >= min_rows]
+            expected = EXPECTED_FULL_SCANS.get(stmt.name) or ("bounded by the page size"
+                                                             if _BOUNDED_PAGE.search(stmt.name) else None)
+            results.append({"statement": stmt.name, "full_scans": scans, "large_full_scans": large,
+                            "expected": expected, "flagged": bool(large) and expected is None})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag full table scans in the plans of the catalog statements.")
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS,
+                        help="only flag scans of tables with at least this many rows (default: %(default)s)")
+    parser.add_argument("--all", action="store_true", help="list every statement, not only those with scans")
+    args = parser.parse_args(argv)
+
+    db = Database()
+    try:
+        db.setup_database()
+        results = check_plans(db, min_rows=args.min_rows)
+    finally:
+        db.close()
+    flagged = 0
+    for result in results:
+        if result.get("error"):
+            print(f"ERROR   {result['statement']}: {result['error']}")
+        elif result["flagged"]:
+            flagged += 1
+            print(f"FLAGGED {result['statement']}: full scan of {', '.join(result['large_full_scans'])}")
+        elif result["full_scans"] and (args.all or result["large_full_scans"]):
+            print(f"ok      {result['statement']}: full scan of {', '.join(result['full_scans'])} "
+                  f"({result['expected'] or 'small tables'})")
+        elif args.all:
+            print(f"ok      {result['statement']}")
+    print(f"{len(results)} statements explained, {flagged} flagged")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# File: record_store.py
+# Purpose: Column-wise in-memory record list with O(1) lookup by key for the GUI's browse views
+import sys
+from array import array
+
+
+class RecordStore:
+    """Sequence of records kept as one column per field instead of one tuple per row.
+
+    Integer columns named in typecodes live in typed arrays (8 bytes per value
+    instead of a pointer plus an int object) and the text columns named in
+    interned share one string per distinct value, e.g. genre or membership
+    status. store[i] rebuilds the row tuple on demand, so the store drops in
+    wherever a list of driver rows was used (VirtualTreeview, the pagers).
+
+    The key (column 0) maps to its position in a dict, so lookup, replace and
+    single-field updates by key are O(1). Removing a row shifts the rows after
+    it and is O(n), like list deletion. sorted_view() returns positions ordered
+    by a column, cached until the next change.
+    """
+
+    def __init__(self, fields, rows=(), typecodes=None, interned=()):
+        self.fields = tuple(fields)
+        self.typecodes = dict(typecodes or {})
+        self.interned = frozenset(self.fields.index(name) for name in interned)
+        self._columns = [array(self.typecodes[name]) if name in self.typecodes else [] for name in self.fields]
+        self._positions = {}  # key -> position
+        self._views = {}  # (column, key function) -> sorted positions
+        self.extend(rows)
+
+    def _column_index(self, column):
+        return column if isinstance(column, int) else self.fields.index(column)
+
+    def _value(self, column, value):
+        if column in self.interned and isinstance(value, str):
+            return sys.intern(value)
+        return value
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        return tuple(column[position] for column in self._columns)
+
+    def __iter__(self):
+        return zip(*self._columns)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def __setitem__(self, position, row):
+        old_key = self._columns[0][position]
+        for i, column in enumerate(self._columns):
+            column[position] = self._value(i, row[i])
+        if row[0] != old_key:
+            del self._positions[old_key]
+            self._positions[row[0]] = position
+        self._views.clear()
+
+    def __delitem__(self, position):
+        position = range(len(self))[position]
+        del self._positions[self._columns[0][position]]
+        for column in self._columns:
+            del column[position]
+        keys = self._columns[0]
+        for i in range(position, len(keys)):
+            self._positions[keys[i]] = i
+        self._views.clear()
+
+    def append(self, row):
+        self._positions[row[0]] = len(self)
+        for i, column in enumerate(self._columns):
+            column.append(self._value(i, row[i]))
+        self._views.clear()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def position_of(self, key):
+        """Returns the position of the record with key, or None."""
+        return self._positions.get(key)
+
+    def get(self, key, default=None):
+        """Returns the record with key, or default."""
+        position = self._positions.get(key)
+        return default if position is None else self[position]
+
+    def replace(self, row):
+        """Swaps in an updated row with the same key; returns False if the key is not loaded."""
+        position = self._positions.get(row[0])
+        if position is None:
+            return False
+        self[position] = row
+        return True
+
+    def update(self, key, **values):
+        """Sets single fields of the record with key in place, e.g. update(7, is_available=0)."""
+        position = self._positions.get(key)
+        if position is None:
+            return False
+        for name, value in values.items():
+            column = self.fields.index(name)
+            self._columns[column][position] = self._value(column, value)
+        self._views.clear()
+        return True
+
+    def remove(self, key):
+        """Drops the record with key; returns False if the key is not loaded."""
+        position = self._positions.get(key)
+        if position is None:
+            return False
+        del self[position]
+        return True
+
+    def sorted_view(self, column, key=None):
+        """Returns the positions ordered by a column (a field name or index), ascending.
+
+        key maps a value to its sort key, as for sorted(). The view is computed
+        once and reused until a record changes.
+        """
+        column = self._column_index(column)
+        view = self._views.get((column, key))
+        if view is None:
+            values = self._columns[column]
+            sort_key = values.__getitem__ if key is None else lambda i: key(values[i])
+            view = self._views[(column, key)] = sorted(range(len(self)), key=sort_key)
+        return view
@@ -1,36 +1,118 @@
 # File: report.py
 # Purpose: Generates static and dynamic reports
+import logging
+from datetime import datetime, timedelta
+
+from database import DatabaseError
+from export import export_rows
+from statements import statement
+
+OPEN_LOANS_SELECT = """
+    SELECT t.transaction_id, b.title, c.name, t.due_date, t.fine
+    FROM transactions t
+    JOIN books b ON t.book_id = b.book_id
+    JOIN customers c ON t.customer_id = c.customer_id
+    WHERE t.return_date IS NULL
+"""
+OPEN_LOANS_QUERY = statement("report.open_loans", OPEN_LOANS_SELECT)
+OVERDUE_QUERY = statement("report.overdue", f"{OPEN_LOANS_SELECT} AND t.due_date < SYSDATE")
+OVERDUE_STREAM_QUERY = statement("report.overdue_stream",
+                                 f"{OPEN_LOANS_SELECT} AND t.due_date < SYSDATE ORDER BY t.due_date")
+DUE_SOON_QUERY = statement("report.due_soon",
+                           f"{OPEN_LOANS_SELECT} AND t.due_date >= :1 AND t.due_date < :2 ORDER BY t.due_date",
+                           (datetime, datetime), volatile=True)
+COUNT_OVERDUE_QUERY = statement("report.count_overdue", """
+    SELECT COUNT(*) FROM transactions WHERE return_date IS NULL AND due_date < SYSDATE
+""")
+HISTORY_SELECT = """
+    SELECT t.transaction_id, b.title, c.name, t.checkout_date, t.return_date
+    FROM transactions t
+    JOIN books b ON t.book_id = b.book_id
+    JOIN customers c ON t.customer_id = c.customer_id
+    WHERE t.checkout_date BETWEEN TO_DATE(:1, 'YYYY-MM-DD') AND TO_DATE(:2, 'YYYY-MM-DD')
+"""
+HISTORY_QUERY = statement("report.history", HISTORY_SELECT, ((str, 10), (str, 10)))
+HISTORY_STREAM_QUERY = statement("report.history_stream", f"{HISTORY_SELECT} ORDER BY t.checkout_date",
+                                 ((str, 10), (str, 10)))
+OVERDUE_COLUMNS = ("transaction_id", "title", "customer", "due_date", "fine")
+HISTORY_COLUMNS = ("transaction_id", "title", "customer", "checkout_date", "return_date")
+
 
 class Report:
-    def __init__(self, db):
+    # Rows per driver round trip when streaming reports
+    STREAM_ARRAYSIZE = 1000
+
+    def __init__(self, db, overdue_index=None):
+        """overdue_index: an OverdueIndex shared with the Transaction manager that keeps it current."""
         self.db = db
+        self.overdue_index = overdue_index
+
+    def _loaded_index(self):
+        """Returns the overdue index, rebuilding it from the open loans when stale."""
+        if not self.overdue_index.is_loaded:
+            self.overdue_index.rebuild(self.db.execute_query(OPEN_LOANS_QUERY, fetch=True))
+        return self.overdue_index
 
     def generate_overdue_report(self):
         """Generates a static report of overdue books."""
-        query = """
-            SELECT t.transaction_id, b.title, c.name, t.due_date, t.fine
-            FROM transactions t
-            JOIN books b ON t.book_id = b.book_id
-            JOIN customers c ON t.customer_id = c.customer_id
-            WHERE t.return_date IS NULL AND t.due_date < SYSDATE
-        """
         try:
-            return self.db.execute_query(query, fetch=True)
-        except oracledb.Error as e:
+            if self.overdue_index is not None:
+                return self._loaded_index().overdue()
+            return self.db.execute_query(OVERDUE_QUERY, fetch=True)
+        except DatabaseError as e:
             logging.error(f"Error generating overdue report: {e}")
             return []
 
+    def generate_due_soon_report(self, days):
+        """Lists open loans that are not overdue yet but fall due within days days."""
+        try:
+            if self.overdue_index is not None:
+                return self._loaded_index().due_within(days)
+            now = datetime.now()
+            return self.db.execute_query(DUE_SOON_QUERY, [now, now + timedelta(days=days)], fetch=True)
+        except DatabaseError as e:
+            logging.error(f"Error generating due soon report: {e}")
+            return []
+
+    def count_overdue(self):
+        """Returns the number of overdue loans."""
+        try:
+            if self.overdue_index is not None:
+                return self._loaded_index().overdue_count()
+            return self.db.execute_query(COUNT_OVERDUE_QUERY, fetch=True)[0][0]
+        except DatabaseError as e:
+            logging.error(f"Error counting overdue loans: {e}")
+            return 0
+
     def generate_transaction_history(self, start_date, end_date):
         """Generates a dynamic report of transactions within a date range."""
-        query = """
-            SELECT t.transaction_id, b.title, c.name, t.checkout_date, t.return_date
-            FROM transactions t
-            JOIN books b ON t.book_id = b.book_id
-            JOIN customers c ON t.customer_id = c.customer_id
-            WHERE t.checkout_date BETWEEN TO_DATE(:1, 'YYYY-MM-DD') AND TO_DATE(:2, 'YYYY-MM-DD')
-        """
         try:
-            return self.db.execute_query(query, [start_date, end_date], fetch=True)
-        except oracledb.Error as e:
+            return self.db.execute_query(HISTORY_QUERY, [start_date, end_date], fetch=True)
+        except DatabaseError as e:
             logging.error(f"Error generating transaction history: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def iter_overdue_report(self):
+        """Yields overdue report rows straight from the database, in batches of STREAM_ARRAYSIZE."""
+        return self.db.stream_query(OVERDUE_STREAM_QUERY, arraysize=self.STREAM_ARRAYSIZE)
+
+    def iter_transaction_history(self, start_date, end_date):
+        """Yields transaction history rows for a date range, in batches of STREAM_ARRAYSIZE."""
+        return self.db.stream_query(HISTORY_STREAM_QUERY, [start_date, end_date], arraysize=self.STREAM_ARRAYSIZE)
+
+    def export_overdue_report(self, path, fmt=None, on_progress=None):
+        """Streams the overdue report to a CSV/JSONL file; returns rows written, or None on failure."""
+        try:
+            return export_rows(self.iter_overdue_report(), path, OVERDUE_COLUMNS, fmt=fmt, on_progress=on_progress)
+        except (DatabaseError, OSError, ValueError) as e:
+            logging.error(f"Error exporting overdue report: {e}")
+            return None
+
+    def export_transaction_history(self, start_date, end_date, path, fmt=None, on_progress=None):
+        """Streams the transaction history for a date range to a CSV/JSONL file; returns rows written, or None."""
+        try:
+            return export_rows(self.iter_transaction_history(start_date, end_date), path, HISTORY_COLUMNS,
+                               fmt=fmt, on_progress=on_progress)
+        except (DatabaseError, OSError, ValueError) as e:
+            logging.error(f"Error exporting transaction history: {e}")
+            return None
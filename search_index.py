@@ -0,0 +1,132 @@
+# File: search_index.py
+# Purpose: In-process trigram index that answers book substring searches
+import threading
+import time
+from collections import defaultdict
+
+# Searchable columns in ranking order; matches in earlier columns rank higher
+SEARCH_FIELDS = ("title", "author", "genre", "isbn")
+# Shorter terms have no trigram to narrow by; Book sends them to the LIKE query
+MIN_TERM_LENGTH = 3
+# Seconds before the index is rebuilt to pick up other desks' edits
+DEFAULT_MAX_AGE = 300
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Maps every 3-character substring of the searchable columns to book IDs.
+
+    A term's trigrams narrow the catalog to a small candidate set, which is then
+    checked with a plain substring test, so results match the LIKE '%term%'
+    search exactly (case-insensitive on text columns, case-sensitive on ISBN).
+    """
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE):
+        self.max_age = max_age  # Seconds before a rebuild picks up other desks' edits
+        self._lock = threading.RLock()
+        self._fields = {}  # book_id -> (title, author, genre, isbn) as searched
+        self._postings = defaultdict(set)
+        self._built_at = None
+
+    @property
+    def is_loaded(self):
+        """True when the index is built and not older than max_age."""
+        if self._built_at is None:
+            return False
+        return self.max_age is None or time.monotonic() - self._built_at < self.max_age
+
+    def __len__(self):
+        return len(self._fields)
+
+    def rebuild(self, rows):
+        """Replaces the index contents with (book_id, title, author, genre, isbn, ...) rows."""
+        with self._lock:
+            self._fields.clear()
+            self._postings.clear()
+            for row in rows:
+                self._add(row)
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        """Marks the index stale so the next search rebuilds it."""
+        with self._lock:
+            self._built_at = None
+
+    @staticmethod
+    def _searchable(row):
+        title, author, genre, isbn = (str(value) if value is not None else "" for value in row[1:5])
+        return title.lower(), author.lower(), genre.lower(), isbn
+
+    def _add(self, row):
+        fields = self._searchable(row)
+        self._fields[row[0]] = fields
+        for gram in set().union(*(_trigrams(field.lower()) for field in fields)):
+            self._postings[gram].add(row[0])
+
+    def _remove(self, book_id):
+        fields = self._fields.pop(book_id, None)
+        if fields is None:
+            return
+        for gram in set().union(*(_trigrams(field.lower()) for field in fields)):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(book_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def upsert(self, row):
+        """Adds or replaces one book row."""
+        with self._lock:
+            self._remove(row[0])
+            self._add(row)
+
+    def remove(self, book_id):
+        """Drops one book from the index."""
+        with self._lock:
+            self._remove(book_id)
+
+    def _candidates(self, term):
+        grams = _trigrams(term.lower())
+        if not grams:  # Terms under 3 characters check every book
+            return list(self._fields)
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return candidates
+
+    def search(self, term):
+        """Returns the IDs of books matching term, best matches first.
+
+        Title matches rank above author, genre and ISBN matches; within a column a
+        match at the start ranks above one at a word start, then anywhere else.
+        """
+        lowered = term.lower()
+        ranked = []
+        with self._lock:
+            for book_id in self._candidates(term):
+                fields = self._fields[book_id]
+                best = None
+                for rank, field in enumerate(fields):
+                    needle = term if rank == 3 else lowered
+                    position = field.find(needle)
+                    if position < 0:
+                        continue
+                    if position == 0:
+                        quality = 0
+                    elif not field[position - 1].isalnum():
+                        quality = 1
+                    else:
+                        quality = 2
+                    score = rank * 3 + quality
+                    if best is None or score < best:
+                        best = score
+                if best is not None:
+                    ranked.append((best, fields[0], book_id))
+        ranked.sort()
+        return [book_id for _, _, book_id in ranked]
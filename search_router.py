@@ -0,0 +1,79 @@
+# File: search_router.py
+# Purpose: Classifies a book search term by shape so it can use the cheapest indexed access path
+import re
+from collections import namedtuple
+
+# Route kinds, cheapest first
+ISBN = "isbn"  # Exact ISBN lookup; value is the stored forms to try (13- and 10-digit)
+BOOK_ID = "book_id"  # Primary key lookup for "#123" or "id:123"; value is the ID
+PREFIX = "prefix"  # Range scan on LOWER(column) for each of columns; value is the lower-cased prefix
+SUBSTRING = "substring"  # LIKE '%term%' over title, author, genre and ISBN; value is the term
+
+# Columns searched by a prefix term without a column name ("dune*")
+NAME_COLUMNS = ("title", "author")
+_BOOK_ID = re.compile(r"^(?:#|id:)\s*(\d{1,18})$", re.IGNORECASE)
+_COLUMN_PREFIX = re.compile(r"^(title|author):\s*(.*)$", re.IGNORECASE | re.DOTALL)
+_ISBN_SEPARATORS = re.compile(r"[\s-]")
+_ISBN_10 = re.compile(r"^\d{9}[\dX]$")
+_ISBN_13 = re.compile(r"^97[89]\d{10}$")
+
+SearchRoute = namedtuple("SearchRoute", ["kind", "value", "columns"])
+
+
+def isbn13_check_digit(digits12):
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits12))
+    return str(-total % 10)
+
+
+def isbn10_check_digit(digits9):
+    check = -sum(int(d) * (10 - i) for i, d in enumerate(digits9)) % 11
+    return "X" if check == 10 else str(check)
+
+
+def isbn_forms(term):
+    """Returns the ISBN-13 and, for 978 numbers, ISBN-10 forms of a valid ISBN, or None.
+
+    Hyphens and spaces are ignored and the check digit must match, so a title
+    or a number that merely has 10 or 13 digits is not mistaken for an ISBN.
+    """
+    isbn = _ISBN_SEPARATORS.sub("", term).upper()
+    if _ISBN_13.match(isbn):
+        if isbn13_check_digit(isbn[:12]) != isbn[12]:
+            return None
+        if isbn.startswith("978"):
+            return [isbn, isbn[3:12] + isbn10_check_digit(isbn[3:12])]
+        return [isbn]
+    if _ISBN_10.match(isbn):
+        if isbn10_check_digit(isbn[:9]) != isbn[9]:
+            return None
+        isbn13 = "978" + isbn[:9]
+        return [isbn13 + isbn13_check_digit(isbn13), isbn]
+    return None
+
+
+def route_search(term):
+    """Returns the SearchRoute for a search term.
+
+    A valid ISBN-10/13 is looked up exactly and "#123" or "id:123" by book ID.
+    "title:" or "author:" searches that column by prefix, and a trailing "*"
+    searches titles and authors by prefix. Everything else, plain numbers
+    included (partial ISBNs, titles such as "1984"), is a substring search.
+    """
+    stripped = term.strip()
+    forms = isbn_forms(stripped) if stripped else None
+    if forms:
+        return SearchRoute(ISBN, forms, ("isbn",))
+    match = _BOOK_ID.match(stripped)
+    if match:
+        return SearchRoute(BOOK_ID, int(match.group(1)), ("book_id",))
+    match = _COLUMN_PREFIX.match(stripped)
+    if match and match.group(2).rstrip("*"):
+        return SearchRoute(PREFIX, match.group(2).rstrip("*").lower(), (match.group(1).lower(),))
+    if stripped.endswith("*") and stripped.rstrip("*"):
+        return SearchRoute(PREFIX, stripped.rstrip("*").lower(), NAME_COLUMNS)
+    return SearchRoute(SUBSTRING, term, ())
+
+
+def prefix_bounds(prefix):
+    """Returns (low, high) such that low <= value < high exactly when value starts with prefix."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
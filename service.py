@@ -0,0 +1,433 @@
+# File: service.py
+# Purpose: Headless HTTP/JSON service exposing the managers to many thin clients over one connection pool
+import argparse
+import asyncio
+import json
+import logging
+import re
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlsplit
+
+from async_database import AsyncDatabase
+from book import Book
+from customer import Customer
+from database import Database, DatabaseError
+from metrics import QueryMetrics
+from overdue_index import OverdueIndex
+from query_cache import QueryCache
+from report import HISTORY_COLUMNS, OVERDUE_COLUMNS, Report
+from search_index import TrigramIndex
+from statements import statement
+from transaction import CHECKED_OUT, NOT_FOUND, ON_LOAN, Transaction
+
+BOOK_COLUMNS = ("book_id", "title", "author", "genre", "isbn", "is_available")
+CUSTOMER_COLUMNS = ("customer_id", "name", "email", "membership_status")
+TRANSACTION_COLUMNS = ("transaction_id", "title", "customer", "checkout_date", "due_date", "return_date", "fine")
+CUSTOMER_TRANSACTION_COLUMNS = ("transaction_id", "book_id", "title", "checkout_date", "due_date", "return_date",
+                                "fine")
+
+# Largest page a client may ask for
+MAX_PAGE_SIZE = 500
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 1024 * 1024
+# Seconds an idle keep-alive connection is held open
+KEEPALIVE_TIMEOUT = 15.0
+# Seconds a request may wait for a free worker before it is answered 503
+QUEUE_TIMEOUT = 5.0
+# Seconds before the shared overdue index is rebuilt to pick up direct database writes
+OVERDUE_INDEX_MAX_AGE = 300
+# Seconds before the book search index is rebuilt to pick up direct database writes
+SEARCH_INDEX_MAX_AGE = 300
+# Milliseconds after which a query is written to the slow-query log
+SLOW_QUERY_MS = 500
+
+# Touches the database without reading rows; SYSDATE keeps it out of the query cache
+HEALTH_QUERY = statement("service.health", "SELECT SYSDATE FROM books WHERE 1 = 0")
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error", 501: "Not Implemented",
+           503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    """Ends a request with status and a JSON {"error": message} body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _record(columns, row):
+    return dict(zip(columns, row)) if row else None
+
+
+def _records(columns, rows):
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} must be an integer") from None
+
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _page_args(query):
+    """Reads the keyset paging parameters after, before, last and limit."""
+    after = _param(query, "after")
+    before = _param(query, "before")
+    limit = _int(_param(query, "limit", "50"), "limit")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return {"after_id": _int(after, "after") if after is not None else None,
+            "before_id": _int(before, "before") if before is not None else None,
+            "last": _param(query, "last", "false").lower() in ("1", "true", "yes"), "limit": limit}
+
+
+def _fields(body, *names):
+    """Returns the named body fields in order; all are required."""
+    missing = [name for name in names if body.get(name) in (None, "")]
+    if missing:
+        raise HTTPError(400, f"Missing fields: {', '.join(missing)}")
+    return [body[name] for name in names]
+
+
+class LibraryService:
+    """Serves the Book, Customer, Transaction and Report managers as JSON over HTTP/1.1.
+
+    Requests are parsed on the event loop and their manager calls run on a
+    worker pool no larger than the database connection pool, so a worker never
+    waits for a connection. At most max_concurrency requests run at once;
+    others queue for up to queue_timeout seconds and are then refused with 503.
+    Connections are kept alive between requests for keepalive_timeout seconds.
+    """
+
+    def __init__(self, db, max_concurrency=None, queue_timeout=QUEUE_TIMEOUT, keepalive_timeout=KEEPALIVE_TIMEOUT):
+        self.db = db
+        self.books = Book(db, search_index=TrigramIndex(max_age=SEARCH_INDEX_MAX_AGE))
+        self.customers = Customer(db)
+        overdue_index = OverdueIndex(max_age=OVERDUE_INDEX_MAX_AGE)
+        self.transactions = Transaction(db, overdue_index=overdue_index)
+        self.reports = Report(db, overdue_index=overdue_index)
+        self.max_concurrency = max_concurrency or (db.pool.max_size if db.pool else 1)
+        self.queue_timeout = queue_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.adb = AsyncDatabase(db, max_workers=self.max_concurrency)
+        self._slots = None  # asyncio.Semaphore, created on the serving loop
+        self._server = None
+        self.routes = [
+            ("GET", r"/books", self.list_books),
+            ("POST", r"/books", self.add_book),
+            ("GET", r"/books/(\d+)", self.get_book),
+            ("PUT", r"/books/(\d+)", self.update_book),
+            ("DELETE", r"/books/(\d+)", self.delete_book),
+            ("GET", r"/customers", self.list_customers),
+            ("POST", r"/customers", self.add_customer),
+            ("GET", r"/customers/(\d+)", self.get_customer),
+            ("PUT", r"/customers/(\d+)", self.update_customer),
+            ("DELETE", r"/customers/(\d+)", self.delete_customer),
+            ("GET", r"/customers/(\d+)/transactions", self.customer_transactions),
+            ("GET", r"/transactions", self.list_transactions),
+            ("GET", r"/transactions/(\d+)", self.get_transaction),
+            ("POST", r"/checkouts", self.checkout),
+            ("POST", r"/returns", self.return_book),
+            ("POST", r"/fines/accrue", self.accrue_fines),
+            ("GET", r"/reports/overdue", self.overdue_report),
+            ("GET", r"/reports/due-soon", self.due_soon_report),
+            ("GET", r"/reports/history", self.history_report),
+            ("GET", r"/stats", self.stats),
+            ("GET", r"/health", self.health),
+        ]
+        self._routes = [(method, re.compile(pattern + r"/?\Z"), handler) for method, pattern, handler in self.routes]
+
+    # Handlers run on a worker thread and return (status, payload)
+
+    def list_books(self, query, body):
+        search = _param(query, "search")
+        rows = self.books.search_books(search) if search else self.books.get_books_page(**_page_args(query))
+        return 200, _records(BOOK_COLUMNS, rows)
+
+    def add_book(self, query, body):
+        row = self.books.add_book(*_fields(body, "title", "author", "genre", "isbn"))
+        if not row:
+            raise HTTPError(500, "Failed to add book")
+        return 201, _record(BOOK_COLUMNS, row)
+
+    def get_book(self, query, body, book_id):
+        row = self.books.get_book(int(book_id))
+        if row is None:
+            raise HTTPError(404, f"Book {book_id} not found")
+        return 200, _record(BOOK_COLUMNS, row)
+
+    def update_book(self, query, body, book_id):
+        fields = _fields(body, "title", "author", "genre", "isbn")
+        row = self.books.update_book(int(book_id), *fields, _int(body.get("is_available", 1), "is_available"))
+        if not row:
+            raise HTTPError(404, f"Book {book_id} not updated")
+        return 200, _record(BOOK_COLUMNS, row)
+
+    def delete_book(self, query, body, book_id):
+        if not self.books.delete_book(int(book_id)):
+            raise HTTPError(500, f"Failed to delete book {book_id}")
+        return 200, {"deleted": int(book_id)}
+
+    def list_customers(self, query, body):
+        return 200, _records(CUSTOMER_COLUMNS, self.customers.get_customers_page(**_page_args(query)))
+
+    def add_customer(self, query, body):
+        row = self.customers.add_customer(*_fields(body, "name", "email", "membership_status"))
+        if not row:
+            raise HTTPError(500, "Failed to add customer")
+        return 201, _record(CUSTOMER_COLUMNS, row)
+
+    def get_customer(self, query, body, customer_id):
+        row = self.customers.get_customer(int(customer_id))
+        if row is None:
+            raise HTTPError(404, f"Customer {customer_id} not found")
+        return 200, _record(CUSTOMER_COLUMNS, row)
+
+    def update_customer(self, query, body, customer_id):
+        row = self.customers.update_customer(int(customer_id), *_fields(body, "name", "email", "membership_status"))
+        if not row:
+            raise HTTPError(404, f"Customer {customer_id} not updated")
+        return 200, _record(CUSTOMER_COLUMNS, row)
+
+    def delete_customer(self, query, body, customer_id):
+        if not self.customers.delete_customer(int(customer_id)):
+            raise HTTPError(500, f"Failed to delete customer {customer_id}")
+        return 200, {"deleted": int(customer_id)}
+
+    def customer_transactions(self, query, body, customer_id):
+        rows = self.transactions.get_transactions_by_customer(int(customer_id))
+        return 200, _records(CUSTOMER_TRANSACTION_COLUMNS, rows)
+
+    def list_transactions(self, query, body):
+        return 200, _records(TRANSACTION_COLUMNS, self.transactions.get_transactions_page(**_page_args(query)))
+
+    def get_transaction(self, query, body, transaction_id):
+        row = self.transactions.get_transaction(int(transaction_id))
+        if row is None:
+            raise HTTPError(404, f"Transaction {transaction_id} not found")
+        return 200, _record(TRANSACTION_COLUMNS, row)
+
+    def checkout(self, query, body):
+        """Lends {"book_id": n} or {"book_ids": [...]} to {"customer_id": n}."""
+        customer_id = _int(_fields(body, "customer_id")[0], "customer_id")
+        if "book_ids" in body:
+            if not isinstance(body["book_ids"], list) or not body["book_ids"]:
+                raise HTTPError(400, "book_ids must be a non-empty list")
+            book_ids = [_int(book_id, "book_ids") for book_id in body["book_ids"]]
+        else:
+            book_ids = [_int(_fields(body, "book_id")[0], "book_id")]
+        results = [{"book_id": result.book_id, "status": result.status,
+                    "transaction": _record(TRANSACTION_COLUMNS, result.transaction)}
+                   for result in self.transactions.checkout_many(book_ids, customer_id)]
+        if "book_ids" in body:
+            return 200, results
+        status = {CHECKED_OUT: 201, ON_LOAN: 409, NOT_FOUND: 404}.get(results[0]["status"], 500)
+        return status, results[0]
+
+    def return_book(self, query, body):
+        """Closes {"book_id": n, "transaction_id": n}, or the open loans of {"book_ids": [...]} in one batch."""
+        if "book_ids" in body:
+            if not isinstance(body["book_ids"], list) or not body["book_ids"]:
+                raise HTTPError(400, "book_ids must be a non-empty list")
+            book_ids = [_int(book_id, "book_ids") for book_id in body["book_ids"]]
+            return 200, [{"book_id": result.book_id, "status": result.status,
+                          "transaction": _record(TRANSACTION_COLUMNS, result.transaction)}
+                         for result in self.transactions.return_many(book_ids)]
+        book_id, transaction_id = (_int(value, name) for value, name in
+                                   zip(_fields(body, "book_id", "transaction_id"), ("book_id", "transaction_id")))
+        row = self.transactions.return_book(book_id, transaction_id)
+        if not row:
+            raise HTTPError(409, f"Transaction {transaction_id} is not an open loan")
+        return 200, _record(TRANSACTION_COLUMNS, row)
+
+    def accrue_fines(self, query, body):
+        return 200, {"updated": self.transactions.accrue_fines()}
+
+    def overdue_report(self, query, body):
+        return 200, _records(OVERDUE_COLUMNS, self.reports.generate_overdue_report())
+
+    def due_soon_report(self, query, body):
+        days = _int(_param(query, "days", "7"), "days")
+        return 200, _records(OVERDUE_COLUMNS[:4], self.reports.generate_due_soon_report(days))
+
+    def history_report(self, query, body):
+        start_date, end_date = _param(query, "start"), _param(query, "end")
+        try:
+            datetime.strptime(start_date or "", "%Y-%m-%d")
+            datetime.strptime(end_date or "", "%Y-%m-%d")
+        except ValueError:
+            raise HTTPError(400, "start and end must be dates in YYYY-MM-DD format") from None
+        return 200, _records(HISTORY_COLUMNS, self.reports.generate_transaction_history(start_date, end_date))
+
+    def stats(self, query, body):
+        return 200, self.db.stats()
+
+    def health(self, query, body):
+        self.db.execute_query(HEALTH_QUERY, fetch=True)
+        return 200, {"status": "ok"}
+
+    # HTTP plumbing on the event loop
+
+    def _route(self, method, path):
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return handler, match.groups()
+                allowed = True
+        raise HTTPError(405 if allowed else 404, f"No route for {method} {path}")
+
+    async def dispatch(self, method, target, body):
+        """Runs one request's handler on a worker; returns (status, payload)."""
+        url = urlsplit(target)
+        handler, args = self._route(method, url.path)
+        query = parse_qs(url.query)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(503, "Server busy, retry later") from None
+        try:
+            return await self.adb.run(handler, query, body, *args)
+        finally:
+            self._slots.release()
+
+    async def _read_request(self, reader):
+        """Returns (method, target, version, headers, body), or None when the client closed."""
+        line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(501, "Chunked request bodies are not supported")
+        length = _int(headers.get("content-length", "0"), "Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+        body = {}
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except ValueError:
+                raise HTTPError(400, "Request body is not valid JSON") from None
+            if not isinstance(body, dict):
+                raise HTTPError(400, "Request body must be a JSON object")
+        return method.upper(), target, version, headers, body
+
+    def _response(self, status, payload, keep_alive):
+        data = json.dumps(payload, default=_json_default).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "Content-Type: application/json",
+                f"Content-Length: {len(data)}"]
+        if keep_alive:
+            head += ["Connection: keep-alive", f"Keep-Alive: timeout={int(self.keepalive_timeout)}"]
+        else:
+            head.append("Connection: close")
+        if status == 503:
+            head.append("Retry-After: 1")
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data
+
+    async def handle_connection(self, reader, writer):
+        """Serves requests on one client connection until it closes or idles out."""
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, target, version, headers, body = request
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    logging.error(f"Service request failed: {e}")
+                    status, payload = 500, {"error": "Internal server error"}
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """Starts listening; returns the asyncio server."""
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        logging.info(f"Library service listening on {host}:{port} with {self.max_concurrency} workers")
+        return self._server
+
+    async def serve_forever(self, host="127.0.0.1", port=8080):
+        """Serves until cancelled, then closes the workers and the database pool."""
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Stops accepting connections, waits for running requests and closes the database."""
+        if self._server is not None:
+            self._server.close()
+        await self.adb.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the library managers as an HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pool-min", type=int, default=2, help="connections opened at startup")
+    parser.add_argument("--pool-max", type=int, default=8, help="largest connection pool (and worker count)")
+    parser.add_argument("--queue-timeout", type=float, default=QUEUE_TIMEOUT,
+                        help="seconds a request waits for a worker before a 503")
+    parser.add_argument("--keepalive-timeout", type=float, default=KEEPALIVE_TIMEOUT)
+    parser.add_argument("--setup", action="store_true", help="create the schema before serving")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, filename="library.log")
+    db = Database(pool_min=args.pool_min, pool_max=args.pool_max, query_cache=QueryCache(),
+                  metrics=QueryMetrics(slow_query_ms=SLOW_QUERY_MS))
+    if args.setup:
+        try:
+            db.setup_database()
+        except DatabaseError as e:
+            logging.error(f"Failed to setup database: {e}")
+    service = LibraryService(db, queue_timeout=args.queue_timeout, keepalive_timeout=args.keepalive_timeout)
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
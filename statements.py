@@ -0,0 +1,163 @@
+# File: statements.py
+# Purpose: Named statement catalog, declared bind types and parse/execute counters
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_WHITESPACE = re.compile(r"\s+")
+
+# Name under which SQL passed as plain text is counted
+ADHOC = "(adhoc)"
+
+
+def normalize_sql(sql):
+    """Collapses whitespace outside string literals so equal statements have equal text."""
+    parts = _STRING_LITERAL.split(sql)
+    for i in range(0, len(parts), 2):  # Even parts are outside string literals
+        parts[i] = _WHITESPACE.sub(" ", parts[i])
+    return "".join(parts).strip()
+
+
+class Statement:
+    """A named SQL statement with its bind declarations.
+
+    binds lists one entry per positional bind: a Python type (int, float, str,
+    datetime) or a (str, max_length) pair. Backends that support it declare
+    these to the driver before executing, so a NULL or a short string in the
+    first call does not force a re-bind later.
+
+    volatile marks statements whose result depends on the clock through their
+    binds (e.g. "now"), which a query cache must not serve.
+    """
+
+    def __init__(self, name, sql, binds=(), volatile=False):
+        self.name = name
+        self.sql = normalize_sql(sql)
+        self.binds = tuple(binds)
+        self.volatile = volatile
+
+    def __str__(self):
+        return self.sql
+
+    def __repr__(self):
+        return f"Statement({self.name!r})"
+
+
+class StatementCatalog:
+    """Registry of the statements the managers run, by name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements = OrderedDict()
+
+    def register(self, name, sql, binds=(), volatile=False):
+        """Adds a statement and returns it; re-registering the same name needs the same SQL."""
+        statement = Statement(name, sql, binds, volatile)
+        with self._lock:
+            existing = self._statements.get(name)
+            if existing is not None:
+                if existing.sql != statement.sql:
+                    raise ValueError(f"Statement {name!r} is already registered with different SQL")
+                return existing
+            self._statements[name] = statement
+            return statement
+
+    def get(self, name):
+        return self._statements[name]
+
+    def __contains__(self, name):
+        return name in self._statements
+
+    def __iter__(self):
+        return iter(list(self._statements.values()))
+
+    def __len__(self):
+        return len(self._statements)
+
+
+# Statements registered by the manager modules at import time
+CATALOG = StatementCatalog()
+
+
+def statement(name, sql, binds=(), volatile=False):
+    """Registers a statement in CATALOG and returns it."""
+    return CATALOG.register(name, sql, binds, volatile)
+
+
+class InListQuery:
+    """A statement with an IN list, registered once per padded list size.
+
+    template contains "{binds}" where the IN list goes. Lists are padded up to
+    the next power of two (repeating the last value, which IN ignores), so any
+    number of IDs maps onto a handful of statements instead of one per length.
+    """
+
+    def __init__(self, name, template, bind_type=int, max_size=512):
+        self.max_size = max_size
+        self._statements = {}
+        size = 1
+        while True:
+            binds = ", ".join(f":{i}" for i in range(1, size + 1))
+            self._statements[size] = statement(f"{name}[{size}]", template.format(binds=binds), (bind_type,) * size)
+            if size >= max_size:
+                break
+            size = min(size * 2, max_size)
+
+    def build(self, values):
+        """Returns (statement, params) for up to max_size values."""
+        values = list(values)
+        if not values or len(values) > self.max_size:
+            raise ValueError(f"IN list needs 1 to {self.max_size} values, got {len(values)}")
+        size = next(size for size in self._statements if size >= len(values))
+        return self._statements[size], values + [values[-1]] * (size - len(values))
+
+
+class StatementCounters:
+    """Counts executions and parses per statement name.
+
+    Drivers keep an LRU cache of prepared statements per connection, keyed by
+    SQL text. This class mirrors that cache, so an execution whose text is not
+    in the mirror is counted as a parse (a hard or soft parse on the server, a
+    prepare in SQLite). It is exact for sqlite3 and a close estimate for Oracle.
+    """
+
+    def __init__(self, cache_size):
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._caches = {}  # id(connection) -> OrderedDict of SQL text
+        self._executions = defaultdict(int)
+        self._parses = defaultdict(int)
+
+    def record(self, connection, sql, name):
+        """Counts one execution of sql on connection; returns True if it needed a parse."""
+        with self._lock:
+            cache = self._caches.setdefault(id(connection), OrderedDict())
+            self._executions[name] += 1
+            if sql in cache:
+                cache.move_to_end(sql)
+                return False
+            self._parses[name] += 1
+            cache[sql] = True
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+            return True
+
+    def forget(self, connection):
+        """Drops the mirror of a closed connection's statement cache."""
+        with self._lock:
+            self._caches.pop(id(connection), None)
+
+    def stats(self):
+        """Returns total and per-name execution and parse counts."""
+        with self._lock:
+            executions = sum(self._executions.values())
+            parses = sum(self._parses.values())
+            return {
+                "statement_cache_size": self.cache_size,
+                "executions": executions,
+                "parses": parses,
+                "parse_ratio": parses / executions if executions else 0.0,
+                "statements": {name: {"executions": count, "parses": self._parses[name]}
+                               for name, count in sorted(self._executions.items())},
+            }
@@ -0,0 +1,98 @@
+# File: tests/test_backends.py
+# Purpose: Checks the Oracle-to-SQLite translation and the connection pool's timeout and health checks
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend, translate_oracle_sql  # noqa: E402
+from database import Database, DatabaseError  # noqa: E402
+from pool import ConnectionPool, PoolTimeout  # noqa: E402
+
+
+class TranslateOracleSqlTest(unittest.TestCase):
+    def test_positional_binds(self):
+        self.assertEqual(translate_oracle_sql("SELECT * FROM books WHERE book_id = :1 AND title = :2"),
+                         "SELECT * FROM books WHERE book_id = ?1 AND title = ?2")
+
+    def test_fetch_first(self):
+        self.assertEqual(translate_oracle_sql("SELECT book_id FROM books ORDER BY book_id FETCH FIRST :1 ROWS ONLY"),
+                         "SELECT book_id FROM books ORDER BY book_id LIMIT ?1")
+
+    def test_sysdate(self):
+        self.assertEqual(translate_oracle_sql("UPDATE transactions SET return_date = SYSDATE"),
+                         "UPDATE transactions SET return_date = datetime('now', 'localtime')")
+
+    def test_string_literals_are_left_alone(self):
+        query = "SELECT ':1 SYSDATE' FROM books WHERE genre = :1"
+        self.assertEqual(translate_oracle_sql(query), "SELECT ':1 SYSDATE' FROM books WHERE genre = ?1")
+
+
+class SQLiteExecutionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database(SQLiteBackend(os.path.join(self.directory.name, "library.db")))
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_to_date(self):
+        rows = self.db.execute_query("SELECT TO_DATE(:1, 'YYYY-MM-DD'), TO_DATE(:2, 'YYYY-MM-DD HH24:MI:SS')",
+                                     ["2024-03-05", "2024-03-05 14:07:09"], fetch=True)
+        self.assertEqual(rows, [("2024-03-05 00:00:00", "2024-03-05 14:07:09")])
+
+    def test_fetch_first_limits_rows(self):
+        self.db.execute_query("CREATE TABLE t (x INTEGER)")
+        self.db.execute_batch("INSERT INTO t (x) VALUES (:1)", [[i] for i in range(10)])
+        rows = self.db.execute_query("SELECT x FROM t ORDER BY x FETCH FIRST :1 ROWS ONLY", [3], fetch=True)
+        self.assertEqual(rows, [(0,), (1,), (2,)])
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.backend = SQLiteBackend(os.path.join(self.directory.name, "library.db"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_acquire_times_out_when_exhausted(self):
+        pool = ConnectionPool(self.backend, min_size=0, max_size=1, acquire_timeout=0.05)
+        connection = pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        pool.release(connection)
+        pool.release(pool.acquire())
+        pool.close()
+
+    def test_database_reports_timeout_as_database_error(self):
+        db = Database(self.backend, pool_max=1, acquire_timeout=0.05)
+        try:
+            rows = db.stream_query("SELECT 1")
+            next(rows)  # Holds the only connection until closed
+            with self.assertRaises(DatabaseError):
+                db.execute_query("SELECT 1", fetch=True)
+            rows.close()
+            self.assertEqual(db.execute_query("SELECT 1", fetch=True), [(1,)])
+        finally:
+            db.close()
+
+    def test_unhealthy_idle_connection_is_replaced(self):
+        pool = ConnectionPool(self.backend, min_size=1, max_size=1, health_check_interval=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.close()  # Simulates a connection the server dropped while idle
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertEqual(replacement.execute("SELECT 1").fetchone(), (1,))
+        self.assertEqual(pool.stats()["health_failures"], 1)
+        pool.release(replacement)
+        pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+# File: tests/test_database.py
+# Purpose: Checks that a failed unit of work leaves nothing behind on the connection
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend  # noqa: E402
+from database import Database  # noqa: E402
+
+
+class AbortedUnitTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "library.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_aborted_unit_rolls_back(self, db):
+        db.execute_query("CREATE TABLE t (x INTEGER)")
+        with self.assertRaises(ValueError):
+            with db.transaction() as unit:
+                unit.execute("INSERT INTO t (x) VALUES (1)")
+                raise ValueError("bug in the unit body")
+        with db.transaction() as unit:
+            unit.execute("INSERT INTO t (x) VALUES (2)")
+        self.assertEqual(db.execute_query("SELECT x FROM t ORDER BY x", fetch=True), [(2,)])
+
+    def test_pooled(self):
+        db = Database(SQLiteBackend(self.path), pool_max=1)
+        try:
+            self.check_aborted_unit_rolls_back(db)
+        finally:
+            db.close()
+
+    def test_shared_connection(self):
+        db = Database(SQLiteBackend(self.path))
+        try:
+            self.check_aborted_unit_rolls_back(db)
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
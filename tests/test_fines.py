@@ -0,0 +1,104 @@
+# File: tests/test_fines.py
+# Purpose: Checks FineEngine's per-membership rates and its bind numbering
+import os
+import re
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend  # noqa: E402
+from database import Database  # noqa: E402
+from fines import FineEngine  # noqa: E402
+
+RATES = {"Gold": 0.5, "Student": 0.25}
+INSERT_LOAN = """
+    INSERT INTO transactions (book_id, customer_id, checkout_date, due_date)
+    VALUES (:1, :2, :3, :4)
+"""
+
+
+class FineEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database(SQLiteBackend(os.path.join(self.directory.name, "library.db")))
+        self.db.setup_database()
+        self.customers = {}
+        for status in ("Gold", "Student", "Basic"):
+            self.customers[status] = self.db.execute_insert(
+                "INSERT INTO customers (name, email, membership_status) VALUES (:1, :2, :3)",
+                [status, f"{status.lower()}@example.com", status], "customer_id")
+        self.book_id = self.db.execute_insert("INSERT INTO books (title, author, genre, isbn) VALUES (:1, :2, :3, :4)",
+                                              ["Dune", "Frank Herbert", "Science Fiction", "9780441172719"], "book_id")
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def lend(self, status, days_overdue):
+        now = datetime.now()
+        return self.db.execute_insert(INSERT_LOAN, [self.book_id, self.customers[status], now - timedelta(days=30),
+                                                    now - timedelta(days=days_overdue)], "transaction_id")
+
+    def fine_of(self, transaction_id):
+        return self.db.execute_query("SELECT fine FROM transactions WHERE transaction_id = :1",
+                                     [transaction_id], fetch=True)[0][0]
+
+    def test_return_charges_the_membership_rate(self):
+        engine = FineEngine(self.db, rates=RATES, daily_rate=1.0)
+        query, params = engine.return_query()
+        expected = {"Gold": 2.0, "Student": 1.0, "Basic": 4.0}
+        for status, fine in expected.items():
+            transaction_id = self.lend(status, 4)
+            self.assertEqual(self.db.execute_query(query, params + [transaction_id]), 1)
+            self.assertAlmostEqual(self.fine_of(transaction_id), fine, msg=status)
+
+    def test_return_before_due_date_is_free(self):
+        engine = FineEngine(self.db, rates=RATES)
+        query, params = engine.return_query()
+        transaction_id = self.lend("Basic", -2)
+        self.db.execute_query(query, params + [transaction_id])
+        self.assertEqual(self.fine_of(transaction_id), 0)
+
+    def test_return_skips_closed_loans(self):
+        query, params = FineEngine(self.db).return_query()
+        transaction_id = self.lend("Basic", 1)
+        self.assertEqual(self.db.execute_query(query, params + [transaction_id]), 1)
+        self.assertEqual(self.db.execute_query(query, params + [transaction_id]), 0)
+
+    def test_accrual_updates_open_overdue_loans_in_chunks(self):
+        engine = FineEngine(self.db, rates=RATES, daily_rate=2.0, chunk_size=2)
+        overdue = {self.lend("Gold", 3): 1.5, self.lend("Student", 8): 2.0, self.lend("Basic", 1): 2.0}
+        not_due = self.lend("Basic", -5)
+        self.assertEqual(engine.accrue_fines(), 3)
+        for transaction_id, fine in overdue.items():
+            self.assertAlmostEqual(self.fine_of(transaction_id), fine)
+        self.assertEqual(self.fine_of(not_due), 0)
+
+    def test_binds_are_numbered_from_first_bind(self):
+        engine = FineEngine(self.db, rates=RATES, daily_rate=1.0)
+        sql, params = engine.fine_sql("SYSDATE", first_bind=4)
+        binds = [int(n) for n in re.findall(r":(\d+)", sql)]
+        self.assertEqual(binds, list(range(4, 4 + len(params))))
+        self.assertEqual(params, ["Gold", 0.5, "Student", 0.25, 1.0])
+
+    def test_flat_rate_needs_no_customer_lookup(self):
+        sql, params = FineEngine(self.db, daily_rate=1.5).fine_sql("SYSDATE")
+        self.assertNotIn("customers", sql)
+        self.assertEqual(params, [1.5])
+
+    def test_statements_are_shared_per_rate_count(self):
+        first = FineEngine(self.db, rates=RATES).return_query()[0]
+        other_rates = FineEngine(self.db, rates={"Gold": 0.1, "Staff": 0.0}).return_query()[0]
+        flat = FineEngine(self.db).return_query()[0]
+        self.assertEqual(first.name, other_rates.name)
+        self.assertEqual(first.name, "fines.return.sqlite[2]")
+        self.assertEqual(flat.name, "fines.return.sqlite[0]")
+        # The transaction ID follows the rate binds
+        self.assertIn(":6 AND return_date IS NULL", first.sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# File: tests/test_overdue_index.py
+# Purpose: Checks the due-date index behind the overdue and due-soon reports
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend  # noqa: E402
+from book import ADD_BOOK_QUERY  # noqa: E402
+from database import Database  # noqa: E402
+from overdue_index import OverdueIndex  # noqa: E402
+from report import Report  # noqa: E402
+from transaction import Transaction  # noqa: E402
+
+NOW = datetime(2024, 5, 10, 12, 0, 0)
+
+
+def loan(transaction_id, due_in_days, fine=0.0):
+    """An overdue report row due due_in_days from NOW (negative is overdue)."""
+    return (transaction_id, f"Book {transaction_id}", "Reader", NOW + timedelta(days=due_in_days), fine)
+
+
+class OverdueIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = OverdueIndex()
+        self.index.rebuild([loan(1, -3), loan(2, 2), loan(3, -10), loan(4, 20)])
+
+    def ids(self, rows):
+        return [row[0] for row in rows]
+
+    def test_overdue_is_most_overdue_first(self):
+        self.assertEqual(self.ids(self.index.overdue(NOW)), [3, 1])
+        self.assertEqual(self.index.overdue_count(NOW), 2)
+
+    def test_due_within_excludes_overdue_loans(self):
+        self.assertEqual(self.ids(self.index.due_within(7, NOW)), [2])
+        self.assertEqual(self.ids(self.index.due_within(30, NOW)), [2, 4])
+        self.assertEqual(self.index.due_within(1, NOW), [])
+
+    def test_loan_due_exactly_now_is_not_overdue(self):
+        self.index.add(loan(5, 0))
+        self.assertNotIn(5, self.ids(self.index.overdue(NOW)))
+        self.assertEqual(self.ids(self.index.due_within(1, NOW)), [5])
+
+    def test_add_and_remove(self):
+        self.index.add(loan(6, -1))
+        self.assertEqual(self.ids(self.index.overdue(NOW)), [3, 1, 6])
+        self.index.remove(1)
+        self.index.remove(99)  # Unknown loans are ignored
+        self.assertEqual(self.ids(self.index.overdue(NOW)), [3, 6])
+        self.assertEqual(len(self.index), 4)
+
+    def test_add_replaces_a_loan_with_the_same_id(self):
+        self.index.add(loan(2, -1, fine=1.0))
+        self.assertEqual(self.index.overdue(NOW)[-1], loan(2, -1, fine=1.0))
+        self.assertEqual(self.ids(self.index.due_within(30, NOW)), [4])
+        self.assertEqual(len(self.index), 4)
+
+    def test_sqlite_text_due_dates(self):
+        index = OverdueIndex()
+        index.rebuild([(1, "Book 1", "Reader", "2024-05-09 08:30:00", 0.0),
+                       (2, "Book 2", "Reader", "2024-05-11 08:30:00", 0.0)])
+        self.assertEqual(self.ids(index.overdue(NOW)), [1])
+        self.assertEqual(self.ids(index.due_within(2, NOW)), [2])
+
+    def test_staleness(self):
+        index = OverdueIndex(max_age=60)
+        self.assertFalse(index.is_loaded)
+        index.rebuild([])
+        self.assertTrue(index.is_loaded)
+        index.invalidate()
+        self.assertFalse(index.is_loaded)
+        expired = OverdueIndex(max_age=0)
+        expired.rebuild([])
+        self.assertFalse(expired.is_loaded)
+
+
+class IndexedReportTest(unittest.TestCase):
+    """The index must answer the reports exactly as their SQL does as loans come and go."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database(SQLiteBackend(os.path.join(self.directory.name, "library.db")))
+        self.db.setup_database()
+        self.db.execute_batch(ADD_BOOK_QUERY, [(f"Book {i}", "Author", "Genre", str(i)) for i in range(6)])
+        customer_id = self.db.execute_insert(
+            "INSERT INTO customers (name, email, membership_status) VALUES (:1, :2, :3)",
+            ["Reader", "reader@example.com", "Basic"], "customer_id")
+        self.index = OverdueIndex()
+        self.transactions = Transaction(self.db, overdue_index=self.index)
+        self.loans = [result.transaction[0] for result in self.transactions.checkout_many(range(1, 6), customer_id)]
+        now = datetime.now().replace(microsecond=0)
+        for transaction_id, days in zip(self.loans, [-5, -1, 1, 3, 40]):
+            self.db.execute_query("UPDATE transactions SET due_date = :1 WHERE transaction_id = :2",
+                                  [now + timedelta(days=days), transaction_id])
+        self.sql = Report(self.db)
+        self.indexed = Report(self.db, overdue_index=self.index)
+        self.index.invalidate()  # Due dates were moved behind its back
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def assertReportsAgree(self):
+        self.assertEqual(self.indexed.generate_overdue_report(), self.sql.generate_overdue_report())
+        self.assertEqual(self.indexed.generate_due_soon_report(7), self.sql.generate_due_soon_report(7))
+        self.assertEqual(self.indexed.count_overdue(), self.sql.count_overdue())
+
+    def test_reports_agree(self):
+        self.assertReportsAgree()
+        self.assertEqual([row[0] for row in self.indexed.generate_overdue_report()], self.loans[:2])
+        self.assertEqual([row[0] for row in self.indexed.generate_due_soon_report(7)], self.loans[2:4])
+
+    def test_returns_leave_the_index(self):
+        self.indexed.generate_overdue_report()  # Loads the index
+        self.transactions.return_book(1, self.loans[0])
+        self.transactions.return_many([3])
+        self.assertReportsAgree()
+        self.assertEqual([row[0] for row in self.indexed.generate_overdue_report()], [self.loans[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# File: tests/test_query_cache.py
+# Purpose: Checks QueryCache's table-tagged invalidation, its write race guard and what it refuses to cache
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend  # noqa: E402
+from database import Database  # noqa: E402
+from query_cache import QueryCache, read_tables, written_table  # noqa: E402
+from report import Report  # noqa: E402
+from statements import Statement  # noqa: E402
+
+BOOKS_READ = "SELECT title FROM books WHERE book_id = :1"
+LOANS_READ = "SELECT b.title FROM transactions t JOIN books b ON b.book_id = t.book_id"
+CUSTOMERS_READ = "SELECT name FROM customers"
+
+
+class QueryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = QueryCache()
+
+    def store(self, query, rows, params=None):
+        tables = read_tables(query)
+        self.cache.put(self.cache.key(query, params), tables, rows, self.cache.snapshot(tables))
+
+    def cached(self, query, params=None):
+        return self.cache.get(self.cache.key(query, params))
+
+    def test_table_names(self):
+        self.assertEqual(read_tables(LOANS_READ), {"transactions", "books"})
+        self.assertEqual(written_table("UPDATE Books SET title = :1"), "books")
+        self.assertEqual(written_table("DELETE FROM transactions"), "transactions")
+        self.assertEqual(written_table("CREATE INDEX x ON books (title)"), "*")
+        self.assertIsNone(written_table(BOOKS_READ))
+
+    def test_write_invalidates_only_readers_of_its_table(self):
+        self.store(BOOKS_READ, [("Dune",)], [1])
+        self.store(LOANS_READ, [("Dune",)])
+        self.store(CUSTOMERS_READ, [("Reader",)])
+        self.cache.invalidate("books")
+        self.assertIsNone(self.cached(BOOKS_READ, [1]))
+        self.assertIsNone(self.cached(LOANS_READ))
+        self.assertEqual(self.cached(CUSTOMERS_READ), [("Reader",)])
+        self.assertEqual(self.cache.stats()["invalidations"], 2)
+
+    def test_schema_change_clears_everything(self):
+        self.store(CUSTOMERS_READ, [("Reader",)])
+        self.cache.invalidate("*")
+        self.assertIsNone(self.cached(CUSTOMERS_READ))
+
+    def test_read_racing_a_write_is_not_stored(self):
+        tables = read_tables(BOOKS_READ)
+        snapshot = self.cache.snapshot(tables)  # Taken before the query runs
+        self.cache.invalidate("books")  # Another thread commits a write meanwhile
+        self.cache.put(self.cache.key(BOOKS_READ, [1]), tables, [("Old title",)], snapshot)
+        self.assertIsNone(self.cached(BOOKS_READ, [1]))
+
+    def test_read_racing_a_schema_change_is_not_stored(self):
+        tables = read_tables(BOOKS_READ)
+        snapshot = self.cache.snapshot(tables)
+        self.cache.invalidate("*")
+        self.cache.put(self.cache.key(BOOKS_READ, [1]), tables, [("Old title",)], snapshot)
+        self.assertIsNone(self.cached(BOOKS_READ, [1]))
+
+    def test_binds_are_part_of_the_key(self):
+        self.store(BOOKS_READ, [("Dune",)], [1])
+        self.assertIsNone(self.cached(BOOKS_READ, [2]))
+        self.assertEqual(self.cached(BOOKS_READ, [1]), [("Dune",)])
+
+    def test_expiry_and_eviction(self):
+        expired = QueryCache(ttl=0)
+        tables = read_tables(BOOKS_READ)
+        expired.put(expired.key(BOOKS_READ, None), tables, [("Dune",)], expired.snapshot(tables))
+        self.assertIsNone(expired.get(expired.key(BOOKS_READ, None)))
+        small = QueryCache(max_entries=2)
+        for book_id in (1, 2, 3):
+            small.put(small.key(BOOKS_READ, [book_id]), tables, [("Dune",)], small.snapshot(tables))
+        self.assertIsNone(small.get(small.key(BOOKS_READ, [1])))
+        self.assertEqual(small.stats()["evictions"], 1)
+
+    def test_cacheable(self):
+        self.assertTrue(QueryCache.cacheable(BOOKS_READ))
+        self.assertFalse(QueryCache.cacheable("UPDATE books SET is_available = 0"))
+        self.assertFalse(QueryCache.cacheable("SELECT COUNT(*) FROM transactions WHERE due_date < SYSDATE"))
+        self.assertTrue(QueryCache.cacheable(Statement("test.read", BOOKS_READ, (int,))))
+        self.assertFalse(QueryCache.cacheable(Statement("test.due", "SELECT 1 FROM transactions WHERE due_date >= :1",
+                                                        (datetime,), volatile=True)))
+
+
+class CachedDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database(SQLiteBackend(os.path.join(self.directory.name, "library.db")), query_cache=True)
+        self.db.setup_database()
+        self.db.execute_query("INSERT INTO books (title, author, genre, isbn) VALUES ('Dune', 'A', 'G', '1')")
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_repeated_read_is_served_from_the_cache(self):
+        self.assertEqual(self.db.execute_query(BOOKS_READ, [1], fetch=True), [("Dune",)])
+        self.assertEqual(self.db.execute_query(BOOKS_READ, [1], fetch=True), [("Dune",)])
+        self.assertEqual(self.db.query_cache.stats()["hits"], 1)
+
+    def test_writes_invalidate(self):
+        self.db.execute_query(BOOKS_READ, [1], fetch=True)
+        self.db.execute_query("UPDATE books SET title = :1 WHERE book_id = :2", ["Dune Messiah", 1])
+        self.assertEqual(self.db.execute_query(BOOKS_READ, [1], fetch=True), [("Dune Messiah",)])
+        with self.db.transaction() as unit:
+            unit.execute("UPDATE books SET title = :1 WHERE book_id = :2", ["Children of Dune", 1])
+        self.assertEqual(self.db.execute_query(BOOKS_READ, [1], fetch=True), [("Children of Dune",)])
+
+    def test_due_soon_report_is_never_cached(self):
+        report = Report(self.db)
+        report.generate_due_soon_report(3)
+        report.generate_due_soon_report(3)
+        self.assertEqual(self.db.query_cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
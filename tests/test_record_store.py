@@ -0,0 +1,84 @@
+# File: tests/test_record_store.py
+# Purpose: Checks that RecordStore behaves like the list of rows it replaces, with keyed access and sorted views
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from record_store import RecordStore  # noqa: E402
+
+FIELDS = ("book_id", "title", "genre", "is_available")
+ROWS = [
+    (7, "Dune", "Science Fiction", 1),
+    (3, "Emma", "Classic", 0),
+    (9, "Beloved", "Classic", 1),
+    (5, "Anathem", "Science Fiction", 1),
+]
+
+
+class RecordStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = RecordStore(FIELDS, ROWS, typecodes={"book_id": "q", "is_available": "b"}, interned=("genre",))
+
+    def test_reads_like_a_list_of_rows(self):
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(list(self.store), ROWS)
+        self.assertEqual(self.store[1], ROWS[1])
+        self.assertEqual(self.store[-1], ROWS[-1])
+        self.assertEqual(self.store[1:3], ROWS[1:3])
+
+    def test_interned_text_is_shared(self):
+        self.assertIs(self.store[1][2], self.store[2][2])
+
+    def test_lookup_by_key(self):
+        self.assertIn(9, self.store)
+        self.assertNotIn(4, self.store)
+        self.assertEqual(self.store.position_of(9), 2)
+        self.assertEqual(self.store.get(9), ROWS[2])
+        self.assertIsNone(self.store.get(4))
+
+    def test_setitem_replaces_a_row_and_its_key(self):
+        self.store[0] = (8, "Dune Messiah", "Science Fiction", 0)
+        self.assertNotIn(7, self.store)
+        self.assertEqual(self.store.get(8), (8, "Dune Messiah", "Science Fiction", 0))
+        self.assertEqual(self.store.position_of(8), 0)
+
+    def test_delitem_shifts_positions(self):
+        del self.store[1]
+        self.assertEqual(list(self.store), [ROWS[0], ROWS[2], ROWS[3]])
+        self.assertNotIn(3, self.store)
+        self.assertEqual(self.store.position_of(9), 1)
+        self.assertEqual(self.store.position_of(5), 2)
+        del self.store[-1]
+        self.assertEqual(list(self.store), [ROWS[0], ROWS[2]])
+
+    def test_replace_update_and_remove(self):
+        self.assertTrue(self.store.replace((3, "Emma", "Classic", 1)))
+        self.assertFalse(self.store.replace((4, "Missing", "Classic", 1)))
+        self.assertTrue(self.store.update(9, is_available=0, title="Beloved (2nd ed.)"))
+        self.assertFalse(self.store.update(4, is_available=0))
+        self.assertEqual(self.store.get(3), (3, "Emma", "Classic", 1))
+        self.assertEqual(self.store.get(9), (9, "Beloved (2nd ed.)", "Classic", 0))
+        self.assertTrue(self.store.remove(7))
+        self.assertFalse(self.store.remove(7))
+        self.assertEqual([row[0] for row in self.store], [3, 9, 5])
+
+    def test_sorted_view(self):
+        self.assertEqual(self.store.sorted_view("title"), [3, 2, 0, 1])
+        self.assertEqual(self.store.sorted_view(0), [1, 3, 0, 2])
+        self.assertEqual(self.store.sorted_view("title", key=len), [0, 1, 2, 3])  # Stable on ties
+
+    def test_sorted_view_is_cached_until_a_change(self):
+        view = self.store.sorted_view("title")
+        self.assertIs(self.store.sorted_view("title"), view)
+        self.store.update(5, title="Zodiac")
+        self.assertEqual(self.store.sorted_view("title"), [2, 0, 1, 3])
+        self.store.append((1, "Aurora", "Science Fiction", 1))
+        self.assertEqual(self.store.sorted_view("title")[0], 4)
+        del self.store[4]
+        self.assertEqual(self.store.sorted_view("title"), [2, 0, 1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
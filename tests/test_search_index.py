@@ -0,0 +1,87 @@
+# File: tests/test_search_index.py
+# Purpose: Checks that searches served by the trigram index return exactly what the LIKE query returns
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend  # noqa: E402
+from book import ADD_BOOK_QUERY, Book  # noqa: E402
+from database import Database  # noqa: E402
+from metrics import QueryMetrics  # noqa: E402
+
+BOOKS = [
+    ("Dune", "Frank Herbert", "Science Fiction", "9780441172719"),
+    ("Dune Messiah", "Frank Herbert", "Science Fiction", "9780441172696"),
+    ("The Left Hand of Darkness", "Ursula K. Le Guin", "Science Fiction", "9780441478125"),
+    ("Emma", "Jane Austen", "Classic", "9780141439587"),
+    ("100% Pure", "Anon", "Cookery", "0-14-044913-X"),
+    ("snake_case for beginners", "Anon", "Computing", "0-596-00797-3"),
+    ("Sandworms", "Brian Herbert", "Science Fiction", None),
+]
+TERMS = ["dune", "DUNE", "herbert", "ert", "Science", "0441", "913-X", "0-596", "Le Gu", "worms", "missing",
+         "%", "100%", "_", "snake_case", "e_c", "du", "E", ""]
+
+
+class TrigramSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database(SQLiteBackend(os.path.join(self.directory.name, "library.db")), metrics=QueryMetrics())
+        self.db.setup_database()
+        self.db.execute_batch(ADD_BOOK_QUERY, BOOKS)
+        self.plain = Book(self.db)
+        self.indexed = Book(self.db, search_index=True)
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def assertSameResults(self, term):
+        self.assertEqual(sorted(self.indexed.search_books(term)), sorted(self.plain.search_books(term)), term)
+
+    def like_searches(self):
+        return self.db.metrics.stats().get("book.search", {}).get("count", 0)
+
+    def test_matches_like(self):
+        for term in TERMS:
+            self.assertSameResults(term)
+
+    def test_wildcards_and_short_terms_use_like(self):
+        for term in ["100%", "e_c", "du"]:
+            before = self.like_searches()
+            self.indexed.search_books(term)
+            self.assertEqual(self.like_searches(), before + 1, term)
+        before = self.like_searches()
+        self.indexed.search_books("herbert")
+        self.assertEqual(self.like_searches(), before)
+
+    def test_ranks_title_matches_first(self):
+        titles = [row[1] for row in self.indexed.search_books("dune")]
+        self.assertEqual(titles, ["Dune", "Dune Messiah"])
+        authors_first = [row[1] for row in self.indexed.search_books("herbert")]
+        self.assertEqual(authors_first, ["Dune", "Dune Messiah", "Sandworms"])
+
+    def test_follows_edits(self):
+        self.indexed.search_books("dune")  # Builds the index
+        book_id = self.indexed.add_book("Children of Dune", "Frank Herbert", "Science Fiction", "9780441104024")[0]
+        self.assertSameResults("children")
+        self.indexed.update_book(book_id, "Chapterhouse", "Frank Herbert", "Science Fiction", "9780441102679", 1)
+        self.assertEqual(self.indexed.search_books("children"), [])
+        self.assertSameResults("chapter")
+        self.indexed.delete_book(book_id)
+        self.assertEqual(self.indexed.search_books("chapter"), [])
+
+    def test_broad_term_falls_back_to_one_like_query_in_rank_order(self):
+        self.indexed.INDEXED_FETCH_LIMIT = 2
+        before = self.like_searches()
+        rows = self.indexed.search_books("science")
+        self.assertEqual(self.like_searches(), before + 1)
+        self.assertEqual(sorted(rows), sorted(self.plain.search_books("science")))
+        self.assertEqual([row[1] for row in rows],
+                         ["Dune", "Dune Messiah", "Sandworms", "The Left Hand of Darkness"])
+
+
+if __name__ == "__main__":
+    unittest.main()
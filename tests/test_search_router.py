@@ -0,0 +1,104 @@
+# File: tests/test_search_router.py
+# Purpose: Checks how search terms are routed (ISBN checksums, book IDs, prefixes) and when a search narrows
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend  # noqa: E402
+from book import Book, matches_search, search_narrows  # noqa: E402
+from database import Database  # noqa: E402
+from search_router import BOOK_ID, ISBN, PREFIX, SUBSTRING, isbn_forms, prefix_bounds, route_search  # noqa: E402
+
+
+class RouteSearchTest(unittest.TestCase):
+    def test_isbn13_with_its_isbn10_form(self):
+        self.assertEqual(route_search("9780441013593"), (ISBN, ["9780441013593", "0441013597"], ("isbn",)))
+        self.assertEqual(route_search(" 978-0-441-01359-3 ").value, ["9780441013593", "0441013597"])
+
+    def test_isbn10_with_its_isbn13_form(self):
+        self.assertEqual(isbn_forms("0-451-52634-1"), ["9780451526342", "0451526341"])
+        self.assertEqual(isbn_forms("0 8044 2957 x"), ["9780804429573", "080442957X"])
+
+    def test_979_has_no_isbn10_form(self):
+        self.assertEqual(isbn_forms("979-10-90636-07-1"), ["9791090636071"])
+
+    def test_bad_check_digits_are_not_isbns(self):
+        for term in ("9780441013594", "0441013598", "1111111111111", "080442957"):
+            self.assertIsNone(isbn_forms(term), term)
+            self.assertEqual(route_search(term).kind, SUBSTRING, term)
+
+    def test_book_ids(self):
+        self.assertEqual(route_search("#12"), (BOOK_ID, 12, ("book_id",)))
+        self.assertEqual(route_search("ID: 7").value, 7)
+        self.assertEqual(route_search("1984").kind, SUBSTRING)  # Plain numbers are titles or partial ISBNs
+
+    def test_prefixes(self):
+        self.assertEqual(route_search("title:Dune*"), (PREFIX, "dune", ("title",)))
+        self.assertEqual(route_search("Author: herb"), (PREFIX, "herb", ("author",)))
+        self.assertEqual(route_search("dune*"), (PREFIX, "dune", ("title", "author")))
+        for term in ("author:", "*"):
+            self.assertEqual(route_search(term).kind, SUBSTRING, term)
+
+    def test_prefix_bounds(self):
+        low, high = prefix_bounds("dun")
+        self.assertEqual((low, high), ("dun", "duo"))
+        self.assertTrue(low <= "dune messiah" < high)
+        self.assertFalse(low <= "duo" < high)
+
+
+class SearchNarrowsTest(unittest.TestCase):
+    def test_extended_substrings_narrow(self):
+        self.assertTrue(search_narrows("dun", "dune"))
+        self.assertTrue(search_narrows("1", "19"))
+        self.assertFalse(search_narrows("dune", "dun"))
+
+    def test_prefixes_narrow_within_their_columns(self):
+        self.assertTrue(search_narrows("du*", "dune*"))
+        self.assertTrue(search_narrows("du*", "title:dune"))
+        self.assertFalse(search_narrows("title:du", "dune*"))
+        self.assertTrue(search_narrows("du", "Dune*"))
+
+    def test_exact_lookups_and_wildcards_never_narrow(self):
+        self.assertFalse(search_narrows("978", "9780441013593"))
+        self.assertFalse(search_narrows("#1", "#12"))
+        self.assertFalse(search_narrows("du", "du%"))
+        self.assertFalse(search_narrows("d_", "d_n"))
+
+
+class BookSearchRoutingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database(SQLiteBackend(os.path.join(self.directory.name, "library.db")))
+        self.db.setup_database()
+        self.books = Book(self.db)
+        self.dune = self.books.add_book("Dune", "Frank Herbert", "Science Fiction", "9780441013593")
+        self.orwell = self.books.add_book("1984", "George Orwell", "Fiction", "0-451-52634-1")
+        self.other = self.books.add_book("Other", "Anon", "Fiction", "1111111111111")
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_isbn_lookups(self):
+        self.assertEqual(self.books.search_books("978-0-441-01359-3"), [self.dune])
+        self.assertEqual(self.books.search_books("0441013597"), [self.dune])
+        # Stored with hyphens, so the exact lookup misses and the substring search finds it
+        self.assertEqual(self.books.search_books("0-451-52634-1"), [self.orwell])
+
+    def test_book_ids_and_numbers(self):
+        self.assertEqual(self.books.search_books(f"#{self.other[0]}"), [self.other])
+        self.assertEqual(self.books.search_books("#999"), [])
+        self.assertEqual(self.books.search_books("1984"), [self.orwell])
+
+    def test_matches_search_agrees_with_search_books(self):
+        for term in ("0441013597", "0-451-52634-1", "1", "#1", "dune*", "author:geo", "fiction"):
+            found = self.books.search_books(term)
+            for book in (self.dune, self.orwell, self.other):
+                self.assertEqual(matches_search(book, term), book in found, (term, book))
+
+
+if __name__ == "__main__":
+    unittest.main()
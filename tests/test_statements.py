@@ -0,0 +1,73 @@
+# File: tests/test_statements.py
+# Purpose: Checks the statement catalog and InListQuery's power-of-two padding
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend  # noqa: E402
+from database import Database  # noqa: E402
+from statements import CATALOG, InListQuery, normalize_sql, statement  # noqa: E402
+
+BY_IDS = InListQuery("test.by_ids", "SELECT x FROM t WHERE x IN ({binds}) ORDER BY x", max_size=12)
+
+
+class CatalogTest(unittest.TestCase):
+    def test_normalize_keeps_string_literals(self):
+        self.assertEqual(normalize_sql("SELECT  a\n  FROM t WHERE b = 'two  spaces'\n"),
+                         "SELECT a FROM t WHERE b = 'two  spaces'")
+
+    def test_reregistering(self):
+        first = statement("test.catalog", "SELECT 1 FROM t", (int,))
+        self.assertIs(statement("test.catalog", "SELECT 1\n    FROM t", (int,)), first)
+        self.assertIs(CATALOG.get("test.catalog"), first)
+        with self.assertRaises(ValueError):
+            statement("test.catalog", "SELECT 2 FROM t")
+
+
+class InListQueryTest(unittest.TestCase):
+    def test_sizes_are_powers_of_two_capped_at_max_size(self):
+        registered = [size for size in range(1, 17) if f"test.by_ids[{size}]" in CATALOG]
+        self.assertEqual(registered, [1, 2, 4, 8, 12])
+
+    def test_build_pads_with_the_last_value(self):
+        query, params = BY_IDS.build([5, 3, 9])
+        self.assertEqual(query.name, "test.by_ids[4]")
+        self.assertEqual(params, [5, 3, 9, 9])
+        self.assertEqual(query.binds, (int,) * 4)
+        self.assertIn("IN (:1, :2, :3, :4)", query.sql)
+
+    def test_exact_sizes_are_not_padded(self):
+        query, params = BY_IDS.build(range(8))
+        self.assertEqual(query.name, "test.by_ids[8]")
+        self.assertEqual(params, list(range(8)))
+
+    def test_lists_above_the_largest_power_use_max_size(self):
+        query, params = BY_IDS.build(range(9))
+        self.assertEqual(query.name, "test.by_ids[12]")
+        self.assertEqual(params, list(range(9)) + [8, 8, 8])
+
+    def test_empty_and_oversized_lists_are_refused(self):
+        with self.assertRaises(ValueError):
+            BY_IDS.build([])
+        with self.assertRaises(ValueError):
+            BY_IDS.build(range(13))
+
+    def test_padding_does_not_change_the_result(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = Database(SQLiteBackend(os.path.join(directory, "library.db")))
+            try:
+                db.execute_query("CREATE TABLE t (x INTEGER)")
+                db.execute_batch("INSERT INTO t (x) VALUES (:1)", [[i] for i in range(20)])
+                for values in ([7], [3, 1, 2], [19, 4, 11, 0, 5], list(range(10, 20)) + [99]):
+                    query, params = BY_IDS.build(values)
+                    rows = db.execute_query(query, params, fetch=True)
+                    self.assertEqual(rows, [(x,) for x in sorted(set(values)) if x < 20])
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
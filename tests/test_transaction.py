@@ -0,0 +1,91 @@
+# File: tests/test_transaction.py
+# Purpose: Checks the per-scan statuses of batch returns, including loans another desk closes first
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import SQLiteBackend  # noqa: E402
+from book import ADD_BOOK_QUERY, Book  # noqa: E402
+from database import Database, Unit  # noqa: E402
+from detail_cache import DetailCache  # noqa: E402
+from overdue_index import OverdueIndex  # noqa: E402
+from transaction import (CHECKED_OUT, DUPLICATE, NOT_FOUND, NOT_ON_LOAN, OPEN_LOANS_BY_BOOKS, RETURNED,  # noqa: E402
+                         Transaction)
+
+
+class ReturnManyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database(SQLiteBackend(os.path.join(self.directory.name, "library.db")), pool_max=2)
+        self.db.setup_database()
+        self.db.execute_batch(ADD_BOOK_QUERY, [(f"Book {i}", "Author", "Genre", str(i)) for i in range(1, 7)])
+        self.customer_id = self.db.execute_insert(
+            "INSERT INTO customers (name, email, membership_status) VALUES (:1, :2, :3)",
+            ["Reader", "reader@example.com", "Basic"], "customer_id")
+        self.books = Book(self.db)
+        self.index = OverdueIndex()
+        self.transactions = Transaction(self.db, overdue_index=self.index, detail_cache=DetailCache())
+        results = self.transactions.checkout_many([1, 2, 3, 4], self.customer_id)
+        self.assertTrue(all(result.status == CHECKED_OUT for result in results))
+        self.loans = {result.book_id: result.transaction[0] for result in results}
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def available(self, book_id):
+        return self.books.get_book(book_id)[5]
+
+    def test_statuses(self):
+        results = self.transactions.return_many([1, 5, 99, 2, 1])
+        self.assertEqual([result.status for result in results], [RETURNED, NOT_ON_LOAN, NOT_FOUND, RETURNED, DUPLICATE])
+        self.assertEqual([bool(result) for result in results], [True, False, False, True, False])
+        returned = results[0].transaction
+        self.assertEqual(returned[0], self.loans[1])
+        self.assertIsNotNone(returned[5])  # Return date
+        self.assertEqual([self.available(book_id) for book_id in (1, 2, 3, 4)], [1, 1, 0, 0])
+
+    def test_returned_loans_leave_the_overdue_index(self):
+        self.transactions.return_many([3])
+        self.assertNotIn(self.loans[3], [row[0] for row in self.index.due_within(30)])
+        self.assertIn(self.loans[4], [row[0] for row in self.index.due_within(30)])
+
+    def test_scanning_a_returned_book_again(self):
+        self.transactions.return_many([1])
+        self.assertEqual([result.status for result in self.transactions.return_many([1])], [NOT_ON_LOAN])
+
+    def test_empty_batch(self):
+        self.assertEqual(self.transactions.return_many([]), [])
+
+    def test_batches_larger_than_one_lookup(self):
+        size = OPEN_LOANS_BY_BOOKS.max_size
+        self.db.execute_batch(ADD_BOOK_QUERY, [(f"Extra {i}", "Author", "Genre", f"x{i}") for i in range(size)])
+        extra = list(range(7, 7 + size))
+        self.transactions.checkout_many(extra, self.customer_id)
+        results = self.transactions.return_many(extra + [1])
+        self.assertTrue(all(result.status == RETURNED for result in results))
+
+    def test_loan_closed_by_another_desk_meanwhile(self):
+        closed_elsewhere = self.loans[2]
+        execute = Unit.execute
+
+        def execute_then_close_elsewhere(unit, query, params=None, fetch=False):
+            result = execute(unit, query, params, fetch)
+            if getattr(query, "name", "").startswith("transaction.open_loans_by_books"):
+                # Stands in for a second desk whose return commits after this batch's lookup
+                unit.cursor.execute("UPDATE transactions SET return_date = datetime('now') WHERE transaction_id = ?",
+                                    [closed_elsewhere])
+            return result
+
+        with mock.patch.object(Unit, "execute", execute_then_close_elsewhere):
+            results = self.transactions.return_many([1, 2, 3])
+        self.assertEqual([result.status for result in results], [RETURNED, NOT_ON_LOAN, RETURNED])
+        self.assertEqual([self.available(book_id) for book_id in (1, 2, 3)], [1, 0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
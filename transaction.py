@@ -1,57 +1,321 @@
 # File: transaction.py
 # Purpose: Manages checkout and return operations
+import logging
 from datetime import datetime, timedelta
 
+from database import DatabaseError
+from detail_cache import DetailCache
+from fines import FineEngine
+from paging import KeysetQuery
+from statements import InListQuery, statement
+
+
+# Checkout outcomes reported in CheckoutResult.status
+CHECKED_OUT = "checked_out"
+ON_LOAN = "on_loan"
+NOT_FOUND = "not_found"
+FAILED = "failed"
+# Return outcomes reported in ReturnResult.status
+RETURNED = "returned"
+NOT_ON_LOAN = "not_on_loan"
+DUPLICATE = "duplicate"
+
+LOAN_DAYS = 14  # 2-week loan period
+
+# Claims the book only if nobody else has it; zero rows updated means it is on loan
+CLAIM_BOOK_QUERY = statement("transaction.claim_book", """
+    UPDATE books SET is_available = 0 WHERE book_id = :1 AND is_available = 1
+""", (int,))
+BOOK_EXISTS_QUERY = statement("transaction.book_exists", "SELECT 1 FROM books WHERE book_id = :1", (int,))
+INSERT_LOAN_QUERY = statement("transaction.insert_loan", """
+    INSERT INTO transactions (book_id, customer_id, checkout_date, due_date)
+    VALUES (:1, :2, SYSDATE, :3)
+""", (int, int, datetime))
+RELEASE_BOOK_QUERY = statement("transaction.release_book", "UPDATE books SET is_available = 1 WHERE book_id = :1",
+                               (int,))
+# Scanned books with their open loan, if any; books that do not exist are absent
+OPEN_LOANS_BY_BOOKS = InListQuery("transaction.open_loans_by_books", """
+    SELECT b.book_id, t.transaction_id
+    FROM books b
+    LEFT JOIN transactions t ON t.book_id = b.book_id AND t.return_date IS NULL
+    WHERE b.book_id IN ({binds})
+""", max_size=500)
+TRANSACTION_SELECT = """
+    SELECT t.transaction_id, b.title, c.name, t.checkout_date, t.due_date, t.return_date, t.fine
+    FROM transactions t
+    JOIN books b ON t.book_id = b.book_id
+    JOIN customers c ON t.customer_id = c.customer_id
+"""
+GET_TRANSACTION_QUERY = statement("transaction.get", f"{TRANSACTION_SELECT} WHERE t.transaction_id = :1", (int,))
+CUSTOMER_TRANSACTIONS_QUERY = statement("transaction.by_customer", """
+    SELECT t.transaction_id, t.book_id, b.title, t.checkout_date, t.due_date, t.return_date, t.fine
+    FROM transactions t
+    JOIN books b ON t.book_id = b.book_id
+    WHERE t.customer_id = :1
+""", (int,))
+# The same rows for several customers in one round trip, with customer_id last for grouping
+CUSTOMERS_TRANSACTIONS = InListQuery("transaction.by_customers", """
+    SELECT t.transaction_id, t.book_id, b.title, t.checkout_date, t.due_date, t.return_date, t.fine, t.customer_id
+    FROM transactions t
+    JOIN books b ON t.book_id = b.book_id
+    WHERE t.customer_id IN ({binds})
+    ORDER BY t.transaction_id
+""", max_size=64)
+TRANSACTIONS_PAGE = KeysetQuery("transaction.page", TRANSACTION_SELECT, "t.transaction_id")
+# Oracle allows at most 1000 entries in an IN list
+TRANSACTIONS_BY_IDS = InListQuery("transaction.by_ids", TRANSACTION_SELECT + " WHERE t.transaction_id IN ({binds})",
+                                  max_size=500)
+
+
+class CheckoutResult:
+    """Outcome of checking out one book; true only when the loan was recorded."""
+
+    def __init__(self, book_id, status, transaction=None):
+        self.book_id = book_id
+        self.status = status
+        self.transaction = transaction  # Transaction row when status is CHECKED_OUT
+
+    def __bool__(self):
+        return self.status == CHECKED_OUT
+
+    def __repr__(self):
+        return f"CheckoutResult(book_id={self.book_id!r}, status={self.status!r})"
+
+
+class ReturnResult:
+    """Outcome of returning one scanned book; true only when its loan was closed."""
+
+    def __init__(self, book_id, status, transaction=None):
+        self.book_id = book_id
+        self.status = status
+        self.transaction = transaction  # Closed transaction row when status is RETURNED
+
+    def __bool__(self):
+        return self.status == RETURNED
+
+    def __repr__(self):
+        return f"ReturnResult(book_id={self.book_id!r}, status={self.status!r})"
+
+
 class Transaction:
-    def __init__(self, db):
+    FETCH_CHUNK = TRANSACTIONS_BY_IDS.max_size
+
+    def __init__(self, db, fine_engine=None, overdue_index=None, detail_cache=None):
+        """fine_engine: a FineEngine with the library's membership rates (default: flat rate).
+
+        overdue_index: an OverdueIndex to keep current on checkout and return.
+        detail_cache: a DetailCache (or True for a default one) of transactions per
+        customer, filled by prefetch and invalidated on checkout and return.
+        """
         self.db = db
+        self.fine_engine = fine_engine or FineEngine(db)
+        self.overdue_index = overdue_index
+        self.detail_cache = DetailCache() if detail_cache is True else detail_cache
+
+    @staticmethod
+    def _checkout(unit, book_id, customer_id, due_date):
+        """Claims one book and records the loan inside unit; returns (status, transaction_id)."""
+        if unit.execute(CLAIM_BOOK_QUERY, [book_id]):
+            return CHECKED_OUT, unit.insert(INSERT_LOAN_QUERY, [book_id, customer_id, due_date], "transaction_id")
+        exists = unit.execute(BOOK_EXISTS_QUERY, [book_id], fetch=True)
+        return (ON_LOAN if exists else NOT_FOUND), None
 
     def checkout_book(self, book_id, customer_id):
-        """Checks out a book to a customer."""
-        due_date = datetime.now() + timedelta(days=14)  # 2-week loan period
-        query = """
-            INSERT INTO transactions (book_id, customer_id, checkout_date, due_date)
-            VALUES (:1, :2, SYSDATE, :3)
+        """Checks out a book to a customer in one transaction; returns a CheckoutResult.
+
+        The availability check and the loan insert commit together, so two desks
+        can never lend the same copy.
         """
-        update_book_query = """
-            UPDATE books SET is_available = 0 WHERE book_id = :1
+        return self.checkout_many([book_id], customer_id)[0]
+
+    def checkout_many(self, book_ids, customer_id):
+        """Checks out several books to one customer with a single commit.
+
+        Returns a CheckoutResult per book, in order. Books already on loan or
+        missing are skipped; the rest are lent. A database error lends none.
         """
+        due_date = datetime.now() + timedelta(days=LOAN_DAYS)
+        outcomes = []
         try:
-            self.db.execute_query(query, [book_id, customer_id, due_date])
-            self.db.execute_query(update_book_query, [book_id])
-            return True
-        except oracledb.Error as e:
-            logging.error(f"Error checking out book: {e}")
-            return False
+            with self.db.transaction() as unit:
+                for book_id in book_ids:
+                    outcomes.append((book_id,) + self._checkout(unit, book_id, customer_id, due_date))
+        except DatabaseError as e:
+            logging.error(f"Error checking out books: {e}")
+            return [CheckoutResult(book_id, FAILED) for book_id in book_ids]
+        if self.detail_cache is not None and any(status == CHECKED_OUT for _, status, _ in outcomes):
+            self.detail_cache.invalidate(customer_id)
+        rows = self.get_transactions_by_ids([tid for _, _, tid in outcomes if tid is not None])
+        if self.overdue_index is not None:
+            for row in rows.values():
+                self.overdue_index.add((row[0], row[1], row[2], row[4], row[6]))
+        return [CheckoutResult(book_id, status, rows.get(tid)) for book_id, status, tid in outcomes]
 
     def return_book(self, book_id, transaction_id):
-        """Returns a book to the library."""
-        query = """
-            UPDATE transactions
-            SET return_date = SYSDATE
-            WHERE transaction_id = :1
-        """
-        update_book_query = """
-            UPDATE books SET is_available = 1 WHERE book_id = :1
+        """Returns a book to the library and returns the updated transaction row, or False.
+
+        The return date and the fine are set by one UPDATE, committed together
+        with the book's availability.
         """
+        query, params = self.fine_engine.return_query()
         try:
-            self.db.execute_query(query, [transaction_id])
-            self.db.execute_query(update_book_query, [book_id])
-            return True
-        except oracledb.Error as e:
+            with self.db.transaction() as unit:
+                if not unit.execute(query, params + [transaction_id]):
+                    logging.error(f"Error returning book: transaction {transaction_id} is not an open loan")
+                    return False
+                unit.execute(RELEASE_BOOK_QUERY, [book_id])
+            if self.overdue_index is not None:
+                self.overdue_index.remove(transaction_id)
+            if self.detail_cache is not None:
+                self.detail_cache.invalidate_detail(transaction_id)
+            return self.get_transaction(transaction_id) or False
+        except DatabaseError as e:
             logging.error(f"Error returning book: {e}")
             return False
 
-    def get_transactions_by_customer(self, customer_id):
-        """Fetches all transactions for a customer."""
-        query = """
-            SELECT t.transaction_id, t.book_id, b.title, t.checkout_date, t.due_date, t.return_date, t.fine
-            FROM transactions t
-            JOIN books b ON t.book_id = b.book_id
-            WHERE t.customer_id = :1
+    def return_many(self, book_ids):
+        """Returns a batch of scanned books with a single commit; returns a ReturnResult per scan.
+
+        The scans are resolved to their open loans with one IN query per 500
+        books, then the loans are closed (return date and fine) with one
+        executemany that reports each loan's own row count, and the books whose
+        loans this call closed are released with another, all in one
+        transaction. Books with no open loan, including loans another desk
+        closed in the meantime, are reported NOT_ON_LOAN, unknown IDs NOT_FOUND
+        and repeat scans DUPLICATE. A database error returns none of them.
+        """
+        unique_ids = list(dict.fromkeys(book_ids))
+        query, params = self.fine_engine.return_query()
+        loans = {}  # book_id -> open transaction IDs this call closed (normally one)
+        try:
+            with self.db.transaction() as unit:
+                for start in range(0, len(unique_ids), OPEN_LOANS_BY_BOOKS.max_size):
+                    lookup, lookup_params = OPEN_LOANS_BY_BOOKS.build(
+                        unique_ids[start:start + OPEN_LOANS_BY_BOOKS.max_size])
+                    for book_id, transaction_id in unit.execute(lookup, lookup_params, fetch=True):
+                        loans.setdefault(book_id, [])
+                        if transaction_id is not None:
+                            loans[book_id].append(transaction_id)
+                open_loans = [(book_id, tid) for book_id, tids in loans.items() for tid in tids]
+                if open_loans:
+                    counts = unit.execute_many(query, [params + [tid] for _, tid in open_loans], per_row=True)
+                    for book_id in loans:
+                        loans[book_id] = []
+                    for (book_id, tid), count in zip(open_loans, counts):
+                        if count:  # 0 when another desk closed the loan after the lookup
+                            loans[book_id].append(tid)
+                    released = [[book_id] for book_id, tids in loans.items() if tids]
+                    if released:
+                        unit.execute_many(RELEASE_BOOK_QUERY, released)
+        except DatabaseError as e:
+            logging.error(f"Error returning books: {e}")
+            return [ReturnResult(book_id, FAILED) for book_id in book_ids]
+        transaction_ids = [tid for tids in loans.values() for tid in tids]
+        for transaction_id in transaction_ids:
+            if self.overdue_index is not None:
+                self.overdue_index.remove(transaction_id)
+            if self.detail_cache is not None:
+                self.detail_cache.invalidate_detail(transaction_id)
+        rows = self.get_transactions_by_ids(transaction_ids)
+        results, seen = [], set()
+        for book_id in book_ids:
+            if book_id in seen:
+                results.append(ReturnResult(book_id, DUPLICATE))
+                continue
+            seen.add(book_id)
+            if book_id not in loans:
+                results.append(ReturnResult(book_id, NOT_FOUND))
+            elif not loans[book_id]:
+                results.append(ReturnResult(book_id, NOT_ON_LOAN))
+            else:
+                results.append(ReturnResult(book_id, RETURNED, rows.get(loans[book_id][-1])))
+        return results
+
+    def accrue_fines(self):
+        """Recomputes running fines on open overdue loans; returns the number of loans updated."""
+        changed = self.fine_engine.accrue_fines()
+        if self.overdue_index is not None:
+            self.overdue_index.invalidate()  # Cached rows carry the old fines
+        if self.detail_cache is not None:
+            self.detail_cache.invalidate()
+        return changed
+
+    def get_transaction(self, transaction_id):
+        """Fetches one transaction with book and customer names, as shown in the transaction list."""
+        try:
+            result = self.db.execute_query(GET_TRANSACTION_QUERY, [transaction_id], fetch=True)
+            return result[0] if result else None
+        except DatabaseError as e:
+            logging.error(f"Error fetching transaction: {e}")
+            return None
+
+    def get_transactions_by_ids(self, transaction_ids):
+        """Fetches transaction rows for many IDs with chunked IN queries; returns {id: row}."""
+        rows = {}
+        for start in range(0, len(transaction_ids), self.FETCH_CHUNK):
+            query, params = TRANSACTIONS_BY_IDS.build(transaction_ids[start:start + self.FETCH_CHUNK])
+            try:
+                for row in self.db.execute_query(query, params, fetch=True):
+                    rows[row[0]] = row
+            except DatabaseError as e:
+                logging.error(f"Error fetching transactions: {e}")
+        return rows
+
+    def get_transactions_by_customer(self, customer_id, prefetch=()):
+        """Fetches all transactions for a customer.
+
+        With a detail cache, cached customers are answered without a query, and
+        the customer plus any uncached prefetch IDs (e.g. the neighbours in the
+        browse order) are fetched with one IN query.
         """
+        if self.detail_cache is not None:
+            rows = self.detail_cache.get(customer_id)
+            if rows is None:
+                rows = self.prefetch_transactions_by_customers([customer_id, *prefetch]).get(customer_id, [])
+            return rows
         try:
-            return self.db.execute_query(query, [customer_id], fetch=True)
-        except oracledb.Error as e:
+            return self.db.execute_query(CUSTOMER_TRANSACTIONS_QUERY, [customer_id], fetch=True)
+        except DatabaseError as e:
             logging.error(f"Error fetching transactions: {e}")
             return []
+
+    def get_transactions_by_customers(self, customer_ids):
+        """Fetches transactions for many customers with chunked IN queries; returns {customer_id: rows}.
+
+        Rows have the get_transactions_by_customer shape; customers without loans map to [].
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        grouped = {customer_id: [] for customer_id in customer_ids}
+        chunk = CUSTOMERS_TRANSACTIONS.max_size
+        for start in range(0, len(customer_ids), chunk):
+            query, params = CUSTOMERS_TRANSACTIONS.build(customer_ids[start:start + chunk])
+            for row in self.db.execute_query(query, params, fetch=True):
+                grouped[row[-1]].append(row[:-1])
+        return grouped
+
+    def prefetch_transactions_by_customers(self, customer_ids):
+        """Loads the uncached customers among customer_ids into the detail cache in one batch.
+
+        Returns the rows fetched, {customer_id: rows}; empty if all were cached or on error.
+        """
+        generation = self.detail_cache.generation
+        missing = self.detail_cache.missing(customer_ids)
+        if not missing:
+            return {}
+        try:
+            fetched = self.get_transactions_by_customers(missing)
+        except DatabaseError as e:
+            logging.error(f"Error prefetching transactions: {e}")
+            return {}
+        self.detail_cache.put_many(fetched, generation)
+        return fetched
+
+    def get_transactions_page(self, after_id=None, before_id=None, last=False, limit=50):
+        """Fetches one page of transactions with book and customer names (keyset pagination)."""
+        query, params, reverse = TRANSACTIONS_PAGE.build(after_id, before_id, last, limit)
+        try:
+            rows = self.db.execute_query(query, params, fetch=True)
+            return rows[::-1] if reverse else rows
+        except DatabaseError as e:
+            logging.error(f"Error fetching transactions page: {e}")
+            return []
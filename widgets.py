@@ -0,0 +1,250 @@
+# File: widgets.py
+# Purpose: Reusable Tkinter widgets for the library GUI
+from tkinter import ttk
+
+
+def _sort_key(value):
+    """Orders numbers before text and empty cells last, without comparing mixed types."""
+    if value is None or value == "":
+        return (2, "")
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, str(value).lower())
+
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview that only materializes the visible rows of a large row list.
+
+    Rows stay in a plain Python sequence; the widget keeps height + 2 * overscan
+    Treeview items and recycles them as the user scrolls, so showing 100k rows
+    costs the same as showing a page. Sorting reorders an index over the rows and
+    selection is tracked by record key (column 0 by default), not by item. Rows
+    with position_of(key) and sorted_view(column, key) (a RecordStore) are
+    looked up and sorted through those instead of a scan.
+    """
+
+    def __init__(self, parent, columns, height=10, overscan=20, key=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.height = height
+        self.overscan = overscan
+        self.key = key or (lambda row: row[0])
+        self.format_row = None
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings", height=height, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self._rows = []
+        self._order = None  # Display position -> row index while sorted
+        self._ranks = None  # Row index -> display position, built on demand from _order
+        self._sort_column = None
+        self._sort_reverse = False
+        self._offset = 0  # First visible display position
+        self._window = (0, 0)  # Display positions currently materialized
+        self._slots = []  # Recycled Treeview item ids
+        self._slot_positions = {}  # Item id -> display position
+        self._selected_key = None
+        self._selected_position = None  # Hint for position_of, checked before use
+        self._select_callbacks = []
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self._scroll_units(-3))
+        self.tree.bind("<Button-5>", lambda event: self._scroll_units(3))
+        self.tree.bind("<Up>", lambda event: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self._move_selection(-self.height))
+        self.tree.bind("<Next>", lambda event: self._move_selection(self.height))
+
+    def heading(self, column, text):
+        """Sets a column heading; clicking it sorts by that column."""
+        self.tree.heading(column, text=text, command=lambda: self.sort_by(column))
+
+    def bind_select(self, callback):
+        """Calls callback(event) when the user selects a different record."""
+        self._select_callbacks.append(callback)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def set_rows(self, rows, format_row=None):
+        """Shows rows (any sequence); format_row maps a row to the displayed values."""
+        self._rows = rows
+        self.format_row = format_row
+        self._order = None
+        self._ranks = None
+        self._sort_column = None
+        self._offset = 0
+        self._render()
+
+    def refresh(self):
+        """Redraws after the row sequence was changed in place."""
+        if self._sort_column is not None:
+            self._apply_sort()
+        self._offset = max(0, min(self._offset, len(self._rows) - self.height))
+        self._render()
+
+    def row_at(self, position):
+        """Returns the row shown at a display position."""
+        return self._rows[self._order[position] if self._order is not None else position]
+
+    def selected_row(self):
+        """Returns the selected record, or None."""
+        position = self.position_of(self._selected_key)
+        return None if position is None else self.row_at(position)
+
+    def selected_key(self):
+        """Returns the key of the selected record, or None."""
+        return self._selected_key
+
+    def position_of(self, key):
+        """Returns the display position of the record with key, or None."""
+        if key is None:
+            return None
+        hint = self._selected_position
+        if key == self._selected_key and hint is not None and hint < len(self._rows):
+            if self.key(self.row_at(hint)) == key:
+                return hint
+        index = self._index_of(key)
+        if index is None or self._order is None:
+            return index
+        if self._ranks is None:
+            self._ranks = [0] * len(self._order)
+            for position, row_index in enumerate(self._order):
+                self._ranks[row_index] = position
+        return self._ranks[index]
+
+    def _index_of(self, key):
+        if hasattr(self._rows, "position_of"):
+            return self._rows.position_of(key)
+        for index, row in enumerate(self._rows):
+            if self.key(row) == key:
+                return index
+        return None
+
+    def see_key(self, key, select=False):
+        """Scrolls the record with key into view, optionally selecting it."""
+        position = self.position_of(key)
+        if position is None:
+            return
+        if select:
+            self._selected_key = key
+            self._selected_position = position
+        if not self._offset <= position < self._offset + self.height:
+            self._offset = max(0, min(position - self.height // 2, len(self._rows) - self.height))
+        self._render()
+
+    def sort_by(self, column):
+        """Sorts by a column, toggling the direction on repeated clicks."""
+        self._sort_reverse = self._sort_column == column and not self._sort_reverse
+        self._sort_column = column
+        self._apply_sort()
+        self._offset = 0
+        self._render()
+
+    def _apply_sort(self):
+        index = self.columns.index(self._sort_column)
+        self._ranks = None
+        if self.format_row is None and hasattr(self._rows, "sorted_view"):
+            order = self._rows.sorted_view(index, _sort_key)
+            self._order = order[::-1] if self._sort_reverse else order
+            return
+        values = self._values
+        self._order = sorted(range(len(self._rows)), key=lambda i: _sort_key(values(self._rows[i])[index]),
+                             reverse=self._sort_reverse)
+
+    def _values(self, row):
+        return self.format_row(row) if self.format_row else row
+
+    def _render(self):
+        """Fills the recycled items with the window around the visible rows."""
+        total = len(self._rows)
+        count = min(total, self.height + 2 * self.overscan)
+        start = max(0, min(self._offset - self.overscan, total - count))
+        while len(self._slots) < count:
+            self._slots.append(self.tree.insert("", "end"))
+        self._slot_positions = {}
+        selected_slot = None
+        for i, slot in enumerate(self._slots):
+            if i >= count:
+                self.tree.detach(slot)
+                continue
+            position = start + i
+            row = self.row_at(position)
+            self.tree.item(slot, values=self._values(row))
+            self.tree.move(slot, "", i)
+            self._slot_positions[slot] = position
+            if self._selected_key is not None and self.key(row) == self._selected_key:
+                selected_slot = slot
+        self._window = (start, start + count)
+        if selected_slot:
+            self.tree.selection_set(selected_slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self._sync_view()
+
+    def _sync_view(self):
+        start, end = self._window
+        total = len(self._rows)
+        if end > start:
+            self.tree.yview_moveto((self._offset - start) / (end - start))
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + self.height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll_to(self, offset):
+        total = len(self._rows)
+        self._offset = max(0, min(int(offset), total - self.height))
+        start, end = self._window
+        if start <= self._offset and (self._offset + self.height <= end or end == total):
+            self._sync_view()  # Still inside the overscan window, no items to rewrite
+        else:
+            self._render()
+
+    def _scroll_units(self, units):
+        self._scroll_to(self._offset + units)
+        return "break"
+
+    def _on_wheel(self, event):
+        return self._scroll_units(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(float(amount) * len(self._rows))
+        elif unit == "pages":
+            self._scroll_to(self._offset + int(amount) * self.height)
+        else:
+            self._scroll_to(self._offset + int(amount))
+
+    def _move_selection(self, step):
+        if not self._rows:
+            return "break"
+        current = self.position_of(self._selected_key)
+        position = 0 if current is None else max(0, min(current + step, len(self._rows) - 1))
+        self._select_position(position)
+        return "break"
+
+    def _select_position(self, position):
+        self._selected_key = self.key(self.row_at(position))
+        if not self._offset <= position < self._offset + self.height:
+            offset = position if position < self._offset else position - self.height + 1
+            self._offset = max(0, min(offset, len(self._rows) - self.height))
+        self._selected_position = position
+        self._render()
+        for callback in self._select_callbacks:
+            callback(None)
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._slot_positions:
+            return
+        position = self._slot_positions[selection[0]]
+        key = self.key(self.row_at(position))
+        if key == self._selected_key:
+            return  # Selection restored by a redraw, not a user choice
+        self._selected_key = key
+        self._selected_position = position
+        for callback in self._select_callbacks:
+            callback(event)